@@ -0,0 +1,89 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Benchmark Alert Model
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>.
+
+Compares memory and construction time of decoded alert dicts vs Alert.
+
+Usage:
+    python -m benchmarks.bench_alert_model [count]"""
+import gc
+import random
+import sys
+import time
+import tracemalloc
+
+import rapidjson
+
+from bricata_api_client.models import Alert
+
+SIGNATURES = [f'ET POLICY Suspicious Activity Rule {i}' for i in range(200)]
+SENSORS = [f'sensor-{i:03d}.example.com' for i in range(20)]
+TAGS = ['ATO', 'Testing', 'Escalated', 'FalsePositive']
+
+
+def alerts(count: int) -> bytes:
+    """Encodes count synthetic alerts so each decode allocates fresh strings, like a real response."""
+    rnd = random.Random(0)
+
+    return rapidjson.dumps([{'uuid':      f'{i:032x}',
+                             'timestamp': f'2020-01-{1 + i % 28:02d}T12:00:{i % 60:02d}.000000Z',
+                             'data':      {'alert':   {'signature':    (sig := rnd.choice(SIGNATURES)),
+                                                       'signature_id': 2000000 + SIGNATURES.index(sig),
+                                                       'category':     'Potentially Bad Traffic',
+                                                       'severity':     2},
+                                           'host':    rnd.choice(SENSORS),
+                                           'src_ip':  f'10.0.{rnd.randint(0, 255)}.{rnd.randint(0, 255)}',
+                                           'dest_ip': f'192.168.{rnd.randint(0, 255)}.{rnd.randint(0, 255)}',
+                                           'proto':   'TCP',
+                                           'bricata': {'tag': rnd.sample(TAGS, rnd.randint(0, 2))}}}
+                            for i in range(count)]).encode()
+
+
+def measure(label: str, build) -> list:
+    gc.collect()
+    ts = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - ts
+    del result
+
+    gc.collect()
+    tracemalloc.start()  # Separate pass; tracing distorts timings
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f'{label:<12} {elapsed:8.3f} s {current / 2 ** 20:10.1f} MiB')
+
+    return result
+
+
+def main(count: int):
+    body = alerts(count)
+    print(f'{count} alerts, {len(body) / 2 ** 20:.1f} MiB of JSON')
+
+    measure('dict', lambda: rapidjson.loads(body))
+    models = measure('Alert', lambda: [Alert.from_dict(a) for a in rapidjson.loads(body)])
+
+    ts = time.perf_counter()
+    [a.dict() for a in models]
+    print(f'{"-> dict":<12} {time.perf_counter() - ts:8.3f} s')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Benchmark Client
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>.
+
+Runs the client against the local stub server and reports throughput, p50/p99
+latency and peak Python memory per scenario. Needs no network access.
+
+Usage:
+    python -m benchmarks.bench_client [--alerts 5000] [--latency 0.005] [--json out.json]
+                                      [--baseline base.json --tolerance 0.2]
+
+With --baseline, exits 1 if any scenario's throughput drops more than
+tolerance below the baseline's."""
+import argparse
+import asyncio
+import datetime as dt
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, List
+
+import rapidjson
+
+from benchmarks.stub_server import EPOCH, serve, StubConfig
+from bricata_api_client import BricataApiClient, NdjsonSink
+from bricata_api_client.models import AlertQuery
+
+
+@dataclass
+class Report:
+    """
+    Attributes:
+        scenario (str):
+        operations (int): Timed calls made
+        items (int): Records/requests handled
+        seconds (float): Wall time
+        throughput (float): Items per second
+        p50 (float): Median seconds per timed call
+        p99 (float): 99th percentile seconds per timed call
+        peak_mib (float): Peak traced Python memory
+    """
+    scenario: str
+    operations: int
+    items: int
+    seconds: float
+    throughput: float
+    p50: float
+    p99: float
+    peak_mib: float
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))] if ordered else 0.0
+
+
+async def run(scenario: str, body: Callable[[List[float]], Awaitable[int]]) -> Report:
+    """Times body, which appends per-call latencies and returns the item count."""
+    latencies = []
+    tracemalloc.start()
+    ts = time.perf_counter()
+    items = await body(latencies)
+    seconds = time.perf_counter() - ts
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return Report(scenario=scenario, operations=len(latencies), items=items, seconds=round(seconds, 4),
+                  throughput=round(items / seconds, 2), p50=round(percentile(latencies, 0.5), 5),
+                  p99=round(percentile(latencies, 0.99), 5), peak_mib=round(peak / 2 ** 20, 2))
+
+
+async def timed(latencies: List[float], awaitable: Awaitable):
+    ts = time.perf_counter()
+    result = await awaitable
+    latencies.append(time.perf_counter() - ts)
+
+    return result
+
+
+async def benchmark(stub: StubConfig, fetches: int) -> List[Report]:
+    uuids = [f'{i:032x}' for i in range(stub.alerts)]
+    reports = []
+
+    async with serve(stub) as (_, cfg):
+        async with BricataApiClient(cfg=cfg) as bac:
+            await bac.login()
+
+            async def single(latencies):
+                bac.COALESCE = False  # Measure the CMC round trip, not the dedupe
+                await asyncio.gather(*[timed(latencies, bac.get_alert(uuids[i % len(uuids)])) for i in range(fetches)])
+                bac.COALESCE = True
+                return fetches
+
+            async def paginate(latencies):
+                count, ts = 0, time.perf_counter()
+                async for _ in bac.iter_records(AlertQuery(limit=500)):
+                    count += 1
+                    latencies.append(time.perf_counter() - ts)
+                    ts = time.perf_counter()
+                return count
+
+            async def bulk_tag(latencies):
+                results = await timed(latencies, bac.tag_alerts(tag='Bench', uuids=uuids[:fetches]))
+                await timed(latencies, bac.untag_alerts(tag='Bench', uuids=uuids[:fetches]))
+                return 2 * len(results.success)
+
+            async def export(latencies):
+                query = AlertQuery(start_time=EPOCH, end_time=EPOCH + dt.timedelta(seconds=stub.alerts - 1), limit=500)
+                with NdjsonSink(os.devnull) as sink:
+                    return await timed(latencies, bac.write_records(bac.export_records(query), sink))
+
+            for name, body in (('single', single), ('paginate', paginate), ('bulk_tag', bulk_tag), ('export', export)):
+                reports.append(await run(name, body))
+
+    return reports
+
+
+def compare(reports: List[Report], baseline: dict, tolerance: float) -> List[str]:
+    regressions = []
+    for r in reports:
+        base = baseline.get(r.scenario)
+        if base and r.throughput < base['throughput'] * (1 - tolerance):
+            regressions.append(f'{r.scenario}: {r.throughput}/s vs baseline {base["throughput"]}/s')
+
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Offline Bricata API Client benchmarks')
+    parser.add_argument('--alerts', type=int, default=5000)
+    parser.add_argument('--fetches', type=int, default=1000, help='Single fetches and bulk tags')
+    parser.add_argument('--latency', type=float, default=0.005)
+    parser.add_argument('--jitter', type=float, default=0.005)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--payload-size', type=int, default=512)
+    parser.add_argument('--json', help='Write the reports to this file')
+    parser.add_argument('--baseline', help='Reports from a previous --json run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    stub = StubConfig(alerts=args.alerts, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                      payload_size=args.payload_size)
+    reports = asyncio.run(benchmark(stub, args.fetches))
+
+    print(f'{"scenario":<10} {"items":>8} {"seconds":>9} {"items/s":>10} {"p50 ms":>8} {"p99 ms":>8} {"peak MiB":>9}')
+    for r in reports:
+        print(f'{r.scenario:<10} {r.items:>8} {r.seconds:>9.3f} {r.throughput:>10.1f} {r.p50 * 1e3:>8.2f} '
+              f'{r.p99 * 1e3:>8.2f} {r.peak_mib:>9.2f}')
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            rapidjson.dump({r.scenario: asdict(r) for r in reports}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(reports, rapidjson.load(f), args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}', file=sys.stderr)
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,502 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Stub Server
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>.
+
+Local stand-in for a Bricata CMC with configurable latency, error rate and
+payload size, for offline tests and benchmarks.
+
+Usage:
+    python -m benchmarks.stub_server [--port 8443] [--alerts 10000] [--latency 0.02]"""
+import argparse
+import asyncio
+import csv
+import datetime as dt
+import gzip
+import hashlib
+import io
+import logging
+import random
+import re
+from contextlib import asynccontextmanager
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Optional, Tuple
+
+import rapidjson
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+TOKEN: str = 'stub-token'
+EPOCH: dt.datetime = dt.datetime(2020, 1, 1, tzinfo=dt.timezone.utc)
+
+
+@dataclass
+class StubConfig:
+    """
+    Attributes:
+        alerts (int): Number of alerts served, one per second from EPOCH
+        latency (float): Seconds added to every response
+        jitter (float): Up to this many seconds are added at random
+        error_rate (float): Fraction of requests answered with a 503
+        payload_size (int): Bytes of padding in every alert
+        connections (int): Number of connection metadata records served
+        max_limit (int): Largest page /alerts/ or /metadata/activity/ will return
+        seed (Optional[int]): Seeds latency/error randomness for reproducible runs
+        tags (dict): uuid -> set of tags applied
+        geo_events (int): Events /alerts/geo/stream/ sends before going quiet
+        geo_disconnect (int): Drop the stream connection after this many events; 0 never
+        geo_close (bool): End the stream once its events are sent rather than idling
+        capture_size (int): Bytes served by the capture and logdump end points
+        ranges (bool): Honour Range requests on them
+        capture_cut (int): Drop those connections after this many bytes; 0 never
+        report_polls (int): Polls of /system/reports before the stub report's run finishes
+        rules (dict): id -> Suricata rule written through the API; also served as
+            every policy's rules
+        rule_fetches (int): Policy rule detail requests served
+        sensors (dict): uuid -> health status (ok | warning | critical); change it
+            to emulate sensors failing
+        token_uses (int): Requests a login's token answers before it expires; 0 never
+        logins (int): Logins served
+        requests (Counter): Path -> requests received
+    """
+    alerts: int = 10000
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    payload_size: int = 512
+    connections: int = 1000
+    geo_events: int = 100
+    geo_disconnect: int = 0
+    geo_close: bool = False
+    capture_size: int = 2 ** 20
+    ranges: bool = True
+    capture_cut: int = 0
+    report_polls: int = 2
+    max_limit: int = 1000
+    seed: Optional[int] = 0
+    tags: dict = field(default_factory=dict)  # uuid -> set of tags
+    sensors: dict = field(default_factory=dict)  # uuid -> health status
+    rules: dict = field(default_factory=dict)  # id -> rule
+    rule_fetches: int = 0
+    token_uses: int = 0
+    logins: int = 0
+    requests: Counter = field(default_factory=Counter)  # path -> requests received
+
+
+def alert(i: int, cfg: StubConfig) -> dict:
+    return {'uuid':      f'{i:032x}',
+            'timestamp': (EPOCH + dt.timedelta(seconds=i)).strftime('%Y-%m-%dT%H:%M:%S.%f+0000'),
+            'data':      {'alert':   {'signature':    f'ET STUB Signature {i % 97}',
+                                      'signature_id': 2000000 + i % 97,
+                                      'severity':     1 + i % 3},
+                          'host':    f'sensor-{i % 16:02d}',
+                          'src_ip':  f'10.0.{i // 256 % 256}.{i % 256}',
+                          'dest_ip': f'192.168.{i % 7}.{i % 251}',
+                          'payload': 'x' * cfg.payload_size,
+                          'bricata': {'tag': sorted(cfg.tags.get(f'{i:032x}', ()))}}}
+
+
+def connection(i: int) -> dict:
+    return {'uid':       f'C{i:016x}',
+            'timestamp': (EPOCH + dt.timedelta(seconds=i)).strftime('%Y-%m-%dT%H:%M:%S.%f+0000'),
+            'data':      {'src_ip':    f'10.0.{i // 256 % 256}.{i % 256}',
+                          'src_port':  1024 + i % 60000,
+                          'dest_ip':   f'192.168.{i % 7}.{i % 251}',
+                          'dest_port': (53, 80, 443)[i % 3],
+                          'proto':     'tcp' if i % 3 else 'udp',
+                          'bytes':     i % 10000}}
+
+
+def blob(size: int) -> bytes:
+    """Deterministic, incompressible bytes standing in for a pcap or log dump."""
+    return b''.join(hashlib.sha256(i.to_bytes(4, 'big')).digest() for i in range(size // 32 + 1))[:size]
+
+
+def index(uuid: str, cfg: StubConfig) -> Optional[int]:
+    try:
+        i = int(uuid, 16)
+    except ValueError:
+        return None
+
+    return i if 0 <= i < cfg.alerts else None
+
+
+def second(value: Optional[str], default: int) -> int:
+    """Alert index at an RFC 3339 time."""
+    if not value:
+        return default
+
+    ts = dt.datetime.strptime(value.replace('Z', '+0000'), '%Y-%m-%dT%H:%M:%S.%f%z')
+
+    return int((ts - EPOCH).total_seconds())
+
+
+def make_app(cfg: Optional[StubConfig] = None) -> web.Application:
+    """
+    Args:
+        cfg (Optional[StubConfig]):
+
+    Returns:
+        app (aiohttp.web.Application)"""
+    cfg = cfg or StubConfig()
+    rnd = random.Random(cfg.seed)
+    uses = [0]  # Requests answered with the current token
+
+    @web.middleware
+    async def emulate(request: web.Request, handler):
+        cfg.requests[request.path] += 1
+        if cfg.latency or cfg.jitter:
+            await asyncio.sleep(cfg.latency + rnd.uniform(0, cfg.jitter))
+
+        if cfg.error_rate and rnd.random() < cfg.error_rate:
+            return web.json_response({'error': 'stub error'}, status=503)
+
+        if request.path not in ('/login/', '/logout/'):
+            if request.headers.get('Authorization') != f'Bearer {token()}' or (cfg.token_uses and uses[0] >= cfg.token_uses):
+                return web.json_response({'error': 'unauthorized'}, status=401)
+            uses[0] += 1
+
+        return await handler(request)
+
+    def token() -> str:
+        return f'{TOKEN}-{cfg.logins}' if cfg.token_uses else TOKEN  # A new one per login when they expire
+
+    def respond(body) -> web.Response:
+        return web.Response(body=rapidjson.dumps(body).encode(), content_type='application/json')
+
+    async def login(request: web.Request) -> web.Response:
+        cfg.logins += 1
+        uses[0] = 0
+        return respond({'token': token(), 'token_type': 'Bearer'})
+
+    async def logout(request: web.Request) -> web.Response:
+        return respond({'status': 'ok'})
+
+    async def alerts(request: web.Request) -> web.Response:
+        q = request.query
+        start = max(0, second(q.get('start_time'), 0))
+        end = min(cfg.alerts - 1, second(q.get('end_time'), cfg.alerts - 1))
+        tags = set(q['tags'].split(',')) if q.get('tags') else None
+
+        matched = range(start, end + 1)
+        if tags:
+            matched = [i for i in matched if tags & cfg.tags.get(f'{i:032x}', set())]
+
+        offset = int(q.get('offset', 0))
+        limit = min(int(q.get('limit', 100)), cfg.max_limit)
+
+        return respond({'objects': [alert(i, cfg) for i in matched[offset:offset + limit]],
+                        'total':   len(matched),
+                        'offset':  offset,
+                        'limit':   limit})
+
+    async def get_alert(request: web.Request) -> web.Response:
+        i = index(request.match_info['uuid'], cfg)
+        if i is None:
+            return web.json_response({'error': 'not found'}, status=404)
+
+        return respond(alert(i, cfg))
+
+    async def tag_alert(request: web.Request) -> web.Response:
+        uuid, tag = request.match_info['uuid'], request.match_info['tag']
+        if index(uuid, cfg) is None:
+            return web.json_response({'error': 'not found'}, status=404)
+
+        if request.method == 'PUT':
+            cfg.tags.setdefault(uuid, set()).add(tag)
+        else:
+            cfg.tags.get(uuid, set()).discard(tag)
+
+        return respond({'uuid': uuid, 'tag': tag})
+
+    async def activity(request: web.Request) -> web.Response:
+        offset = int(request.query.get('offset', 0))
+        limit = min(int(request.query.get('limit', 100)), cfg.max_limit)
+
+        return respond({'objects': [connection(i) for i in range(offset, min(offset + limit, cfg.connections))],
+                        'total':   cfg.connections,
+                        'offset':  offset,
+                        'limit':   limit})
+
+    async def get_connection(request: web.Request) -> web.Response:
+        try:
+            i = int(request.match_info['uid'][1:], 16)
+        except ValueError:
+            i = -1
+        if not 0 <= i < cfg.connections:
+            return web.json_response({'error': 'not found'}, status=404)
+
+        return respond(connection(i))
+
+    async def geo_stream(request: web.Request) -> web.StreamResponse:
+        response = web.StreamResponse(headers={'Content-Type': 'text/event-stream'})
+        await response.prepare(request)
+        await response.write(b': connected\n\n')
+
+        first = int(request.headers.get('Last-Event-ID', -1)) + 1
+        for n, i in enumerate(range(first, cfg.geo_events)):
+            if cfg.geo_disconnect and n >= cfg.geo_disconnect:
+                return response  # Ends the chunked body; the client reconnects
+            event = {'uuid': f'{i:032x}', 'lat': i % 180 - 90, 'lon': i % 360 - 180}
+            await response.write(f'id: {i}\ndata: {rapidjson.dumps(event)}\n\n'.encode())
+
+        if cfg.geo_close:
+            return response
+
+        while True:  # Live streams stay open; keep-alive until the client leaves
+            await asyncio.sleep(1)
+            await response.write(b': keep-alive\n\n')
+
+    async def download(request: web.Request) -> web.StreamResponse:
+        data, etag = blob(cfg.capture_size), '"stub-blob"'
+        start, end, status = 0, len(data) - 1, 200
+
+        m = re.match(r'bytes=(\d+)-(\d*)$', request.headers.get('Range', ''))
+        if m and cfg.ranges and request.headers.get('If-Range', etag) == etag:
+            start, end, status = int(m.group(1)), min(int(m.group(2) or end), end), 206
+            if start > end:
+                return web.Response(status=416, headers={'Content-Range': f'bytes */{len(data)}'})
+
+        headers = {'ETag': etag, 'Accept-Ranges': 'bytes' if cfg.ranges else 'none', 'Content-Length': str(end - start + 1),
+                   'Content-Type': 'application/octet-stream'}
+        if status == 206:
+            headers['Content-Range'] = f'bytes {start}-{end}/{len(data)}'
+
+        response = web.StreamResponse(status=status, headers=headers)
+        await response.prepare(request)
+        for offset in range(start, end + 1, 2 ** 16):
+            if cfg.capture_cut and offset - start >= cfg.capture_cut:
+                request.transport.close()  # Interrupted mid-body
+                return response
+            await response.write(data[offset:min(offset + 2 ** 16, end + 1)])
+        await response.write_eof()
+
+        return response
+
+    report_polls = 0
+
+    def alerts_csv(start: int, end: int) -> bytes:
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(['uuid', 'timestamp', 'signature', 'src_ip', 'dest_ip'])
+        for i in range(start, end):
+            a = alert(i, cfg)
+            writer.writerow([a['uuid'], a['timestamp'], a['data']['alert']['signature'], a['data']['src_ip'],
+                             a['data']['dest_ip']])
+
+        return out.getvalue().encode()
+
+    async def reports(request: web.Request) -> web.Response:
+        nonlocal report_polls
+        report_polls += 1
+        status = 'complete' if report_polls > cfg.report_polls else 'running'
+
+        return respond([{'uuid': 'stub-report', 'name': 'Nightly', 'history': [{'seq': 1, 'status': 'complete', 'key': 'k1'},
+                                                                              {'seq': 2, 'status': status, 'key': 'k2'}]}])
+
+    async def alerts_report(request: web.Request) -> web.Response:
+        start = max(0, second(request.query.get('start_time'), 0))
+        end = min(cfg.alerts - 1, second(request.query.get('end_time'), cfg.alerts - 1))
+
+        return web.Response(body=alerts_csv(start, end + 1), content_type='text/csv')
+
+    async def export(request: web.Request) -> web.StreamResponse:
+        response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson'})
+        await response.prepare(request)
+        for i in range(cfg.alerts):
+            await response.write(rapidjson.dumps(alert(i, cfg)).encode() + b'\n')
+        await response.write_eof()
+
+        return response
+
+    async def report_history(request: web.Request) -> web.Response:
+        if request.match_info['uuid'] != 'stub-report':
+            return web.json_response({'error': 'not found'}, status=404)
+
+        return web.Response(body=alerts_csv(0, cfg.alerts), content_type='text/csv')
+
+    async def upload_rules(request: web.Request) -> web.Response:
+        reader = await request.multipart()
+        part = await reader.next()
+        body = bytearray()
+        while True:
+            chunk = await part.read_chunk()
+            if not chunk:
+                break
+            body += chunk
+        if part.filename.endswith('.gz'):
+            body = gzip.decompress(body)
+
+        rules = [line for line in body.decode().splitlines() if line.strip() and not line.startswith('#')]
+
+        return respond({'filename': part.filename, 'imported': len(rules), 'bytes': len(body)})
+
+    async def create_rule(request: web.Request) -> web.Response:
+        rule = await request.json(loads=rapidjson.loads)
+        rule['id'] = f'r{len(cfg.rules) + 1}'
+        cfg.rules[rule['id']] = rule
+
+        return respond(rule)
+
+    async def update_rule(request: web.Request) -> web.Response:
+        rule_id = request.match_info['id']
+        if rule_id not in cfg.rules:
+            return web.json_response({'error': 'not found'}, status=404)
+        cfg.rules[rule_id] = {**await request.json(loads=rapidjson.loads), 'id': rule_id}
+
+        return respond(cfg.rules[rule_id])
+
+    def policy_rule(rule: dict) -> dict:
+        return {'id': rule['id'], 'rev': rule.get('rev', 1), 'enabled': rule.get('enabled', True)}
+
+    async def policy_rules(request: web.Request) -> web.Response:
+        rules = [policy_rule(cfg.rules[k]) for k in sorted(cfg.rules)]
+        offset = int(request.query.get('offset', 0))
+        limit = min(int(request.query.get('limit', 100)), cfg.max_limit)
+
+        return respond({'objects': rules[offset:offset + limit], 'total': len(rules), 'offset': offset, 'limit': limit})
+
+    async def policy_rule_detail(request: web.Request) -> web.Response:
+        rule = cfg.rules.get(request.match_info['id'])
+        if rule is None:
+            return web.json_response({'error': 'not found'}, status=404)
+        cfg.rule_fetches += 1
+
+        return respond({**rule, **policy_rule(rule), 'policy': request.match_info['policy']})
+
+    async def rule_history(request: web.Request) -> web.Response:
+        rule = cfg.rules.get(request.match_info['id'])
+        if rule is None:
+            return web.json_response({'error': 'not found'}, status=404)
+
+        return respond([{'rev': r, 'rule': rule.get('rule')} for r in range(1, rule.get('rev', 1) + 1)])
+
+    listings = 0
+
+    async def sensors(request: web.Request) -> web.Response:
+        nonlocal listings
+        listings += 1  # Delivery stats churn on every listing; health doesn't
+
+        return respond([{'uuid': u, 'name': f'sensor-{i:02d}', 'health': {'status': h}, 'delivered': listings * 1000 + i}
+                        for i, (u, h) in enumerate(sorted(cfg.sensors.items()))])
+
+    async def health_count(request: web.Request) -> web.Response:
+        return respond({'count': sum(h == 'critical' for h in cfg.sensors.values())})
+
+    async def health_history(request: web.Request) -> web.Response:
+        health = cfg.sensors.get(request.match_info['uuid'])
+        if health is None:
+            return web.json_response({'error': 'not found'}, status=404)
+
+        return respond([{'timestamp': EPOCH.strftime('%Y-%m-%dT%H:%M:%S.%f+0000'), 'status': health}])
+
+    async def get_tags(request: web.Request) -> web.Response:
+        names = sorted({t for tags in cfg.tags.values() for t in tags} | {'ATO'})
+
+        return respond([{'name': n, 'color': '#4472D9', 'icon': 'fas fa-tag'} for n in names])
+
+    app = web.Application(middlewares=[emulate])
+    app['cfg'] = cfg
+    app.add_routes([web.post('/login/', login),
+                    web.post('/logout/', logout),
+                    web.get('/alerts/', alerts),
+                    web.get('/alert/{uuid}', get_alert),
+                    web.get('/alerts/geo/stream/', geo_stream),
+                    web.put('/alerts/{uuid}/tag/{tag}/', tag_alert),
+                    web.delete('/alerts/{uuid}/tag/{tag}/', tag_alert),
+                    web.get('/metadata/activity/', activity),
+                    web.get('/metadata/connections/{uid}/', get_connection),
+                    web.post('/rules/file/suricata/-upload/', upload_rules),
+                    web.post('/rules/rule/suricata/', create_rule),
+                    web.put('/rules/rule/suricata/{id}/', update_rule),
+                    web.get('/rules/rule/suricata/{id}/history/', rule_history),
+                    web.get('/rules/policy/suricata/{policy}/{type}/rule/', policy_rules),
+                    web.get('/rules/policy/suricata/{policy}/{type}/rule/{id}/', policy_rule_detail),
+                    web.get('/sensors/', sensors),
+                    web.get('/sensors/health/count', health_count),
+                    web.get('/sensors/{host}/capture/', download),
+                    web.get('/sensors/{host}/logdump/', download),
+                    web.get('/system/logdump', download),
+                    web.get('/system/reports', reports),
+                    web.get('/system/reports/alerts/', alerts_report),
+                    web.post('/system/-export', export),
+                    web.post('/system/reports/{uuid}/history/{seq}/{key}/-download', report_history),
+                    web.get('/sensors/{uuid}/health/history', health_history),
+                    web.get('/tags/', get_tags)])
+
+    return app
+
+
+async def start(cfg: Optional[StubConfig] = None, host: Optional[str] = '127.0.0.1', port: Optional[int] = 0) -> tuple:
+    """Starts the stub in the running loop.
+
+    Args:
+        cfg (Optional[StubConfig]):
+        host (Optional[str]):
+        port (Optional[int]): 0 picks a free port
+
+    Returns:
+        (runner, client_cfg) (tuple): Call runner.cleanup() to stop; client_cfg
+            can be passed straight to BricataApiClient(cfg=...)"""
+    runner = web.AppRunner(make_app(cfg), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    return runner, {'Auth':    {'Username': 'stub', 'Password': 'stub'},
+                    'URI':     {'Base': f'http://{host}:{port}'},
+                    'Options': {'CAPath': '', 'VerifySSL': False}}
+
+
+@asynccontextmanager
+async def serve(cfg: Optional[StubConfig] = None, host: Optional[str] = '127.0.0.1',
+                port: Optional[int] = 0) -> AsyncIterator[Tuple[StubConfig, dict]]:
+    """start() as a context manager; the stub is stopped on exit.
+
+    Yields:
+        (stub, client_cfg) (Tuple[StubConfig, dict]): Change stub to alter the
+            running server's behaviour; see start for client_cfg"""
+    cfg = cfg or StubConfig()
+    runner, client_cfg = await start(cfg, host, port)
+    try:
+        yield cfg, client_cfg
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bricata CMC stub server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8443)
+    parser.add_argument('--alerts', type=int, default=StubConfig.alerts)
+    parser.add_argument('--latency', type=float, default=StubConfig.latency)
+    parser.add_argument('--jitter', type=float, default=StubConfig.jitter)
+    parser.add_argument('--error-rate', type=float, default=StubConfig.error_rate)
+    parser.add_argument('--payload-size', type=int, default=StubConfig.payload_size)
+    args = parser.parse_args()
+
+    web.run_app(make_app(StubConfig(alerts=args.alerts, latency=args.latency, jitter=args.jitter,
+                                    error_rate=args.error_rate, payload_size=args.payload_size)),
+                host=args.host, port=args.port, access_log=None)
+
+
+if __name__ == '__main__':
+    main()
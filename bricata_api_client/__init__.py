@@ -18,5 +18,60 @@ copies or substantial portions of the Software.
 You should have received a copy of the SSPL along with this program.
 If not, see <https://www.mongodb.com/licensing/server-side-public-license>."""
 
-from bricata_api_client.client import BricataApiClient
-from bricata_api_client.models import *
+from importlib import import_module
+
+# Exports are imported on first access so light entry points (e.g. bricata-export --help)
+# don't pay for aiohttp et al. up front.
+_EXPORTS = {'AdaptiveLimiter':       'bricata_api_client.limiter',
+            'AlertIndex':            'bricata_api_client.index',
+            'AlertSync':             'bricata_api_client.sync',
+            'ArrowSink':             'bricata_api_client.sinks',
+            'BricataApiClient':      'bricata_api_client.client',
+            'BricataApiPool':        'bricata_api_client.pool',
+            'DiskResponseCache':     'bricata_api_client.cache',
+            'DownloadResult':        'bricata_api_client.download',
+            'FileTokenCache':        'bricata_api_client.tokens',
+            'GeoStream':             'bricata_api_client.geo',
+            'Metrics':               'bricata_api_client.metrics',
+            'NdjsonSink':            'bricata_api_client.sinks',
+            'ParquetSink':           'bricata_api_client.sinks',
+            'ResponseCache':         'bricata_api_client.cache',
+            'SensorChange':          'bricata_api_client.health',
+            'SensorHealthPoller':    'bricata_api_client.health',
+            'RetryPolicy':           'bricata_api_client.retry',
+            'RuleDelta':             'bricata_api_client.mirror',
+            'RuleMirror':            'bricata_api_client.mirror',
+            'Sink':                  'bricata_api_client.sinks',
+            'TokenCache':            'bricata_api_client.tokens',
+            # Models
+            'Alert':                 'bricata_api_client.models',
+            'alert_time_key':        'bricata_api_client.models',
+            'alert_timestamp':       'bricata_api_client.models',
+            'AlertQuery':            'bricata_api_client.models',
+            'AlertsFilter':          'bricata_api_client.models',
+            'MetadataGroupsQuery':   'bricata_api_client.models',
+            'MetadataQuery':         'bricata_api_client.models',
+            'MetadataTimelineQuery': 'bricata_api_client.models',
+            'PolicyRuleQuery':       'bricata_api_client.models',
+            'SuricataRule':          'bricata_api_client.models',
+            'TagRequest':            'bricata_api_client.models',
+            'time_key':              'bricata_api_client.models',
+            'to_datetime':           'bricata_api_client.models'}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    try:
+        module = _EXPORTS[name]
+    except KeyError:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}') from None
+
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Cache
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>."""
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from fnmatch import fnmatch
+from typing import Optional, Tuple
+from urllib.parse import urlencode
+
+import aiohttp as aio
+import rapidjson
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    """
+    Attributes:
+        end_point (str):
+        result (dict): As returned by BaseApiClient.request
+        stored (float): time.time() it was stored or last revalidated
+        etag (Optional[str]):
+        last_modified (Optional[str]):
+    """
+    end_point: str
+    result: dict
+    stored: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+def resource(end_point: str) -> str:
+    """The resource an end point belongs to; /alert/{uuid} and /alerts/ are both 'alert'.
+
+    Args:
+        end_point (str):
+
+    Returns:
+        resource (str)"""
+    return end_point.strip('/').split('/')[0].rstrip('s')
+
+
+class ResponseCache:
+    """In-memory LRU cache of GET responses with a TTL.
+
+    Expired entries that have an ETag or Last-Modified are revalidated with a
+    conditional GET instead of being refetched. The client invalidates every entry
+    of a resource whenever it sends a write to that resource (see resource())."""
+    END_POINTS: Tuple[str, ...] = ('/tags/*', '/alert/*', '/system/-constants*', '/sensornames/*')
+
+    def __init__(self, ttl: Optional[float] = 60, max_entries: Optional[int] = 1024,
+                 end_points: Optional[Tuple[str, ...]] = None):
+        """Initializes Class
+
+        Args:
+            ttl (Optional[float]): Seconds a response is served without asking the CMC
+            max_entries (Optional[int]): Least recently used entries are evicted past this
+            end_points (Optional[Tuple[str, ...]]): Glob patterns of cacheable end
+                points (default: END_POINTS)"""
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.end_points = end_points or self.END_POINTS
+        self.entries = OrderedDict()
+
+    @staticmethod
+    def key(end_point: str, params: Optional[dict] = None) -> str:
+        return f'{end_point}?{urlencode(sorted((params or {}).items()))}'
+
+    def cacheable(self, method: str, end_point: str) -> bool:
+        return method.lower() == 'get' and any(fnmatch(end_point, p) for p in self.end_points)
+
+    def fresh(self, entry: CacheEntry) -> bool:
+        return time.time() - entry.stored < self.ttl
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self.entries.get(key)
+        if entry:
+            self.entries.move_to_end(key)
+
+        return entry
+
+    def set(self, key: str, entry: CacheEntry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, end_point: str):
+        """Drops every entry of end_point's resource."""
+        root = resource(end_point)
+        for key in [k for k, e in self.entries.items() if resource(e.end_point) == root]:
+            del self.entries[key]
+
+    def clear(self):
+        self.entries.clear()
+
+    def trace_config(self) -> aio.TraceConfig:
+        """Records response validators into the dict passed as trace_request_ctx."""
+        async def on_request_end(session, ctx, params):
+            if type(ctx.trace_request_ctx) is dict:
+                ctx.trace_request_ctx['etag'] = params.response.headers.get('ETag')
+                ctx.trace_request_ctx['last_modified'] = params.response.headers.get('Last-Modified')
+
+        trace_config = aio.TraceConfig()
+        trace_config.on_request_end.append(on_request_end)
+
+        return trace_config
+
+
+class DiskResponseCache(ResponseCache):
+    """ResponseCache persisted to a SQLite file, so it survives restarts and can
+    be shared by processes on one host."""
+
+    def __init__(self, path: str, ttl: Optional[float] = 60, max_entries: Optional[int] = 1024,
+                 end_points: Optional[Tuple[str, ...]] = None):
+        """Initializes Class
+
+        Args:
+            path (str): Full path to the SQLite file; created if missing.
+            ttl, max_entries, end_points: See ResponseCache"""
+        ResponseCache.__init__(self, ttl=ttl, max_entries=max_entries, end_points=end_points)
+        self.db = sqlite3.connect(path)
+        self.db.execute('CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, end_point TEXT NOT NULL, '
+                        'resource TEXT NOT NULL, stored REAL NOT NULL, accessed REAL NOT NULL, etag TEXT, '
+                        'last_modified TEXT, result TEXT NOT NULL)')
+        self.db.commit()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        row = self.db.execute('SELECT end_point, result, stored, etag, last_modified FROM responses WHERE key = ?',
+                              (key,)).fetchone()
+        if not row:
+            return None
+
+        with self.db:
+            self.db.execute('UPDATE responses SET accessed = ? WHERE key = ?', (time.time(), key))
+
+        return CacheEntry(end_point=row[0], result=rapidjson.loads(row[1]), stored=row[2], etag=row[3],
+                          last_modified=row[4])
+
+    def set(self, key: str, entry: CacheEntry):
+        with self.db:
+            self.db.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                            (key, entry.end_point, resource(entry.end_point), entry.stored, time.time(), entry.etag,
+                             entry.last_modified, rapidjson.dumps(entry.result)))
+            self.db.execute('DELETE FROM responses WHERE key IN '
+                            '(SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)', (self.max_entries,))
+
+    def invalidate(self, end_point: str):
+        with self.db:
+            self.db.execute('DELETE FROM responses WHERE resource = ?', (resource(end_point),))
+
+    def clear(self):
+        with self.db:
+            self.db.execute('DELETE FROM responses')
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: CLI
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>.
+
+bricata-export: streams alerts for a time range to stdout or a file.
+
+Examples:
+    bricata-export -c ~/.config/bricata_api_client.toml --start 1h > alerts.ndjson
+    bricata-export -c cfg.toml --start 2020-01-01 --end 2020-01-08 --tags ATO -o week.parquet -f parquet
+    bricata-export -c cfg.toml --start 15m -o alerts.ndjson --checkpoint alerts.ckpt  # cron; resumes"""
+import argparse
+import datetime as dt
+import json
+import logging
+import os
+import re
+import sys
+import time
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+RELATIVE = re.compile(r'^(\d+)([smhdw])$')
+UNITS = {'s': 'seconds', 'm': 'minutes', 'h': 'hours', 'd': 'days', 'w': 'weeks'}
+
+
+def parse_time(value: Optional[str]) -> Optional[dt.datetime]:
+    """
+    Args:
+        value (Optional[str]): RFC 3339 (or anything delorean parses), or a
+            duration before now such as 15m, 2h, 7d
+
+    Returns:
+        datetime (Optional[datetime.datetime])"""
+    if not value:
+        return None
+
+    m = RELATIVE.match(value)
+    if m:
+        return dt.datetime.now(tz=dt.timezone.utc) - dt.timedelta(**{UNITS[m.group(2)]: int(m.group(1))})
+
+    from bricata_api_client.models.query import to_datetime
+
+    return to_datetime(value)
+
+
+class Checkpoint:
+    """High-water mark of an export, saved as JSON after every written batch.
+
+    Alerts older than the saved mark, or at the mark and already seen, are
+    skipped on resume; the output file is appended to. An export stops at the
+    first failed request, so the mark never passes alerts it didn't get. Marks
+    are alert_time_keys, so offsets and fraction widths compare by instant."""
+
+    def __init__(self, path: str):
+        from bricata_api_client.models import alert_time_key
+
+        self.path = path
+        self.mark, self.seen = None, set()
+        if os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            # Marks saved before they were normalised are raw alert timestamps
+            self.mark, self.seen = alert_time_key(state['mark']) or None, set(state['seen'])
+        self.resume = self.mark, frozenset(self.seen)
+
+    def skip(self, ts: str, uuid: str) -> bool:
+        mark, seen = self.resume
+        return bool(mark) and (ts < mark or (ts == mark and uuid in seen))
+
+    def advance(self, ts: str, uuid: str):
+        if ts != self.mark:
+            self.mark, self.seen = ts, set()
+        self.seen.add(uuid)
+
+    def state(self) -> dict:
+        return {'mark': self.mark, 'seen': sorted(self.seen)}
+
+    def save(self, state: dict):
+        tmp = f'{self.path}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp, self.path)
+
+
+class Progress:
+    """Writes a count/rate line to stderr at most once per interval."""
+
+    def __init__(self, enabled: bool, interval: Optional[float] = 1.0):
+        self.enabled = enabled and sys.stderr.isatty()
+        self.interval = interval
+        self.start = self.last = time.perf_counter()
+        self.count = 0
+
+    def update(self, count: int, limit: int):
+        self.count = count
+        now = time.perf_counter()
+        if self.enabled and now - self.last >= self.interval:
+            self.last = now
+            sys.stderr.write(f'\r{count:,} alerts  {count / (now - self.start):,.0f}/s  concurrency {limit}   ')
+            sys.stderr.flush()
+
+    def done(self):
+        elapsed = time.perf_counter() - self.start
+        if self.enabled:
+            sys.stderr.write('\n')
+        logger.info(f'Exported {self.count:,} alerts in {elapsed:.1f}s ({self.count / max(elapsed, 1e-9):,.0f}/s)')
+
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='bricata-export', description='Stream Bricata alerts to stdout or a file.',
+                                     epilog='Times are RFC 3339 or a duration before now, e.g. 15m, 2h, 7d.')
+    parser.add_argument('-c', '--config', required=True, help='Full path to a json/toml configuration file')
+    parser.add_argument('--start', help='Required unless resuming from --checkpoint')
+    parser.add_argument('--end', help='Default: now')
+    parser.add_argument('--tags', help='Comma separated tags')
+    parser.add_argument('--tags-op', choices=['and', 'or'])
+    parser.add_argument('--group')
+    parser.add_argument('-o', '--output', default='-', help="File to write; '-' is stdout (default)")
+    parser.add_argument('-f', '--format', choices=['ndjson', 'arrow', 'parquet'], default='ndjson')
+    parser.add_argument('--compression', help='ndjson: gzip|bz2|xz; arrow: lz4|zstd; parquet: snappy|zstd|...')
+    parser.add_argument('-w', '--workers', type=int, help='Max parallel requests (default: adaptive)')
+    parser.add_argument('--shards', type=int, help='Initial time windows (default: workers)')
+    parser.add_argument('--page-size', type=int, default=500)
+    parser.add_argument('--batch-size', type=int, default=5000, help='Records per write/checkpoint')
+    parser.add_argument('--checkpoint', help='Resume file; ndjson output only')
+    parser.add_argument('-q', '--quiet', action='store_true', help='No progress display')
+    parser.add_argument('-v', '--verbose', action='count', default=0)
+
+    return parser
+
+
+async def export(args: argparse.Namespace) -> int:
+    import asyncio
+
+    from bricata_api_client.client import BricataApiClient
+    from bricata_api_client.models import alert_time_key, AlertQuery
+    from bricata_api_client.sinks import ArrowSink, NdjsonSink, ParquetSink
+
+    checkpoint = Checkpoint(args.checkpoint) if args.checkpoint else None
+    start = (checkpoint and checkpoint.mark) or parse_time(args.start)
+    if not start:
+        logger.error('--start is required')
+        return 2
+
+    if args.format == 'ndjson':
+        sink = NdjsonSink(args.output, batch_size=args.batch_size, compression=args.compression,
+                          append=bool(checkpoint and checkpoint.mark))
+    else:
+        sink = (ArrowSink if args.format == 'arrow' else ParquetSink)(args.output, batch_size=args.batch_size,
+                                                                      compression=args.compression)
+
+    query = AlertQuery(start_time=start, end_time=parse_time(args.end), tags=args.tags, tags_op=args.tags_op,
+                       group=args.group, limit=args.page_size)
+    progress = Progress(enabled=not args.quiet)
+    failures, count = [], 0
+
+    async with BricataApiClient(cfg=args.config) as bac:
+        if args.workers:
+            bac.limiter.maximum = args.workers
+            bac.limiter.current = float(min(bac.limiter.current, args.workers))
+
+        with sink:
+            loop = asyncio.get_running_loop()
+            batch, writing = [], None
+
+            async def write(batch: list, state: Optional[dict]):
+                await loop.run_in_executor(None, sink.write_batch, batch)
+                if state:  # Only once the batch is on disk
+                    await loop.run_in_executor(None, sink.file.flush)
+                    checkpoint.save(state)
+
+            records = bac.export_records(query, shards=args.shards, failures=failures)
+            try:
+                async for alert in records:
+                    if checkpoint:
+                        if failures:  # This alert may follow a lost window; stop so the mark stays before it
+                            break
+                        ts, uuid = alert_time_key(alert), alert.get('uuid')
+                        if checkpoint.skip(ts, uuid):
+                            continue
+                        checkpoint.advance(ts, uuid)
+
+                    batch.append(alert)
+                    count += 1
+                    progress.update(count, bac.limiter.limit)
+                    if len(batch) >= sink.batch_size:
+                        if writing:
+                            await writing  # One write in flight; keeps batches and checkpoints in order
+                        writing = asyncio.ensure_future(write(batch, checkpoint.state() if checkpoint else None))
+                        batch = []
+            finally:
+                await records.aclose()
+
+            if writing:
+                await writing
+            if batch:
+                await write(batch, checkpoint.state() if checkpoint else None)
+
+    progress.done()
+
+    if failures:
+        logger.error(f'{len(failures)} request(s) failed; the export is incomplete'
+                     + ('; run again to resume from the checkpoint' if checkpoint else ''))
+        return 1
+
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = make_parser().parse_args(argv)
+
+    if args.checkpoint and args.format != 'ndjson':
+        make_parser().error('--checkpoint requires --format ndjson')
+    if args.checkpoint and args.output == '-':
+        make_parser().error('--checkpoint requires --output')
+
+    logging.basicConfig(level=(logging.WARNING, logging.INFO, logging.DEBUG)[min(args.verbose, 2)],
+                        format='%(levelname)s %(message)s', stream=sys.stderr)
+
+    import asyncio
+
+    try:
+        return asyncio.run(export(args))
+    except KeyboardInterrupt:
+        return 130
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -18,24 +18,54 @@ copies or substantial portions of the Software.
 You should have received a copy of the SSPL along with this program.
 If not, see <https://www.mongodb.com/licensing/server-side-public-license>."""
 import asyncio
+import datetime as dt
+import hashlib
 import logging
-from typing import NoReturn, Optional, Union
+import os
+import random
+import zlib
+import ssl
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from copy import deepcopy
+from dataclasses import replace
+from fnmatch import fnmatch
+from typing import AsyncIterator, Callable, Dict, Iterable, List, NoReturn, Optional, Tuple, Union
+from urllib.parse import urlencode
 from uuid import uuid4
 
 import aiohttp as aio
 import rapidjson
 
 from base_api_client import BaseApiClient, Results
-from bricata_api_client.models import AlertsFilter, TagRequest, AlertQuery
+from bricata_api_client.cache import CacheEntry, ResponseCache
+from bricata_api_client.download import content_range, DownloadResult, PartialDownload, RangeIgnored
+from bricata_api_client.limiter import AdaptiveLimiter
+from bricata_api_client.metrics import Metrics
+from bricata_api_client.models import alert_time_key, AlertsFilter, TagRequest, AlertQuery, MetadataQuery, PolicyRuleQuery, \
+    Query, SuricataRule, to_datetime
+from bricata_api_client.retry import RetryPolicy
+from bricata_api_client.sinks import Sink
+from bricata_api_client.stream import CsvStream, EventStream, JsonArrayStream
+from bricata_api_client.tokens import TokenCache
 
 logger = logging.getLogger(__name__)
 
 
 class BricataApiClient(BaseApiClient):
     """Bricata API Client"""
-    SEM: int = 5  # This defines the number of parallel async requests to make.
-
-    def __init__(self, cfg: Union[str, dict]):
+    SEM: int = 5  # This defines the initial number of parallel async requests to make; see AdaptiveLimiter.
+    PAGE_SIZE: int = 100  # Default number of records per page when iterating.
+    CHUNK_SIZE: int = 2 ** 16  # Bytes read from the socket at a time when streaming.
+    COALESCE: bool = True  # Concurrent identical GETs share one in-flight request.
+    PART_SIZE: int = 2 ** 24  # Bytes per range when downloading in parallel.
+    REPORT_DONE: Tuple[str, ...] = ('complete', 'completed', 'done', 'finished', 'success')  # Report history statuses.
+    REPORT_FAILED: Tuple[str, ...] = ('error', 'failed', 'failure')
+
+    def __init__(self, cfg: Union[str, dict], token_cache: Optional[TokenCache] = None, logout: Optional[bool] = True,
+                 retry_policies: Optional[Dict[str, RetryPolicy]] = None, cache: Optional[ResponseCache] = None,
+                 metrics: Optional[Metrics] = None):
         """Initializes Class
 
         Args:
@@ -43,22 +73,325 @@ class BricataApiClient(BaseApiClient):
                 pointing to a configuration file (json/toml). See
                 config.* in the examples folder for reference.
             sem (Optional[int]): An integer that defines the number of parallel
-                requests to make."""
+                requests to make.
+            token_cache (Optional[TokenCache]): Checked for a valid token before
+                logging in; tokens from login() are stored in it.
+            logout (Optional[bool]): Log out on exit; disable to keep a cached
+                token valid for other clients/processes.
+            retry_policies (Optional[Dict[str, RetryPolicy]]): End point glob
+                patterns (e.g. '/alert/*') to policies; the first match wins,
+                so put '*' last. Default: RetryPolicy() for every end point.
+            cache (Optional[ResponseCache]): Serves repeated GETs of cacheable
+                end points; writes invalidate the resource they touch.
+            metrics (Optional[Metrics]): Collects per end point latency, status,
+                bytes, connection, retry and concurrency wait metrics."""
         BaseApiClient.__init__(self, cfg=cfg)
         self.header = None
+        self.pooled = False
+        self.token_cache = token_cache
+        self.logout_on_exit = logout
+        self.login_lock = None
+
+        opts = self.cfg.get('Options', {})
+        self.limiter = AdaptiveLimiter(initial=opts.get('Concurrency', self.SEM),
+                                       minimum=opts.get('MinConcurrency', 1),
+                                       maximum=opts.get('MaxConcurrency', 64))
+        self.sem = self.limiter  # BaseApiClient.request acquires self.sem around every request
+        self.retry_policies = retry_policies if retry_policies is not None else {'*': RetryPolicy()}
+        self.cache = cache
+        self.metrics = metrics
+        self.trace_configs = [x.trace_config() for x in (cache, metrics) if x]
+        self.in_flight = {}
+        if metrics:
+            self.limiter.on_wait = metrics.observe_wait
 
     async def __aenter__(self):
+        await self.__pool()
+
+        if self.cfg.get('Options', {}).get('WarmUp'):
+            await self.warm_up(self.cfg['Options']['WarmUp'])
+
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.logout()
+        if self.logout_on_exit:
+            await self.logout()
         await BaseApiClient.__aexit__(self, exc_type, exc_val, exc_tb)
 
+    def __ssl(self) -> Union[ssl.SSLContext, bool]:
+        opts = self.cfg.get('Options', {})
+        if not opts.get('VerifySSL', True):
+            return False
+
+        return ssl.create_default_context(cafile=opts.get('CAPath') or None)
+
+    async def __pool(self) -> NoReturn:
+        """Replaces the default session, once, with a long-lived pooled session
+        configured from [Options]; authentication is applied to its headers."""
+        if self.pooled:
+            return
+
+        opts = self.cfg.get('Options', {})
+        connector = aio.TCPConnector(limit=opts.get('PoolSize', 100),
+                                     limit_per_host=opts.get('PoolSizePerHost', 0),
+                                     keepalive_timeout=opts.get('KeepaliveTimeout', 15),
+                                     ttl_dns_cache=opts.get('DNSCacheTTL', 10),
+                                     ssl=self.__ssl())
+
+        await self.session.close()
+        self.session = aio.ClientSession(connector=connector, headers=self.HDR, json_serialize=rapidjson.dumps,
+                                         trace_configs=self.trace_configs)
+        self.pooled = True
+
+    async def warm_up(self, connections: Optional[int] = None) -> NoReturn:
+        """Opens connections ahead of time so later requests skip the TCP/TLS handshake.
+
+        Args:
+            connections (Optional[int]): Number of connections to open (default: limiter.limit)"""
+        await self.__pool()
+
+        logger.debug('Warming up connections to Bricata...')
+
+        async def connect():
+            try:
+                async with self.session.head(f'{self.cfg["URI"]["Base"]}/'):
+                    pass
+            except (aio.ClientError, asyncio.TimeoutError) as e:
+                logger.debug(f'Warm up connection failed: {e}')
+
+        await asyncio.gather(*[connect() for _ in range(connections if type(connections) is int else self.limiter.limit)])
+
+        logger.debug('-> Complete.')
+
+    @property
+    def token_key(self) -> str:
+        return f'{self.cfg["URI"]["Base"]}|{self.cfg["Auth"]["Username"]}'
+
+    def __set_header(self, authorization: str) -> NoReturn:
+        self.header = {**self.HDR, **{'Authorization': authorization}}
+        self.session.headers.update(self.header)
+
     async def __check_login(self) -> NoReturn:
-        if not self.header:
+        if self.header:
+            return
+
+        if not self.login_lock:
+            self.login_lock = asyncio.Lock()
+
+        async with self.login_lock:  # Concurrent first requests share one login
+            if self.header:
+                return
+
+            token = self.token_cache.get(self.token_key) if self.token_cache else None
+            if token:
+                await self.__pool()
+                self.__set_header(token)
+            else:
+                await self.login()
+
+    async def __relogin(self, rejected: Optional[str]) -> NoReturn:
+        if not self.login_lock:
+            self.login_lock = asyncio.Lock()
+
+        async with self.login_lock:
+            if self.header and self.header['Authorization'] != rejected:
+                return  # Another request already re-authenticated
+
+            logger.debug('Token rejected; Logging in again...')
+
+            if self.token_cache:
+                self.token_cache.delete(self.token_key)
+            self.header = None
             await self.login()
 
+    @asynccontextmanager
+    async def __open(self, method: str, end_point: str, **kwargs) -> AsyncIterator[aio.ClientResponse]:
+        """Sends a request whose body the caller streams, holding a limiter slot
+        until the caller is done with the response. A rejected token is replaced
+        with the slot released (login takes a slot of its own) and the request
+        sent once more.
+
+        Raises:
+            aiohttp.ClientResponseError: The CMC didn't answer 2xx"""
+        for attempt in range(2):
+            rejected = self.header['Authorization'] if self.header else None
+            async with self.limiter:
+                response = await self.session.request(method, f'{self.cfg["URI"]["Base"]}{end_point}', **kwargs)
+                try:
+                    if response.status != 401 or attempt:
+                        response.raise_for_status()
+                        yield response
+                        return
+                finally:
+                    response.release()
+
+            await self.__relogin(rejected)
+
+    async def __request(self, method: str, end_point: str, request_id: str, **kwargs) -> dict:
+        try:
+            result = await BaseApiClient.request(self, method=method, end_point=end_point, request_id=request_id, **kwargs)
+        except (aio.ClientError, asyncio.TimeoutError):
+            self.limiter.record(error=True)
+            raise
+
+        self.limiter.record(status=result.get('status') if type(result) is dict else None)
+
+        return result
+
+    async def __authed_request(self, method: str, end_point: str, request_id: str, **kwargs) -> dict:
+        authorization = self.header['Authorization'] if self.header else None
+        result = await self.__request(method=method, end_point=end_point, request_id=request_id, **kwargs)
+
+        if authorization and type(result) is dict and result.get('status') == 401:
+            await self.__relogin(authorization)
+            result = await self.__request(method=method, end_point=end_point, request_id=request_id, **kwargs)
+
+        return result
+
+    def retry_policy(self, method: str, end_point: str) -> Optional[RetryPolicy]:
+        for pattern, policy in self.retry_policies.items():
+            if fnmatch(end_point, pattern):
+                return policy if method.lower() in policy.methods else None
+
+        return None
+
+    async def __timed(self, policy: RetryPolicy, **kwargs) -> dict:
+        ts = time.perf_counter()
+        result = await self.__authed_request(**kwargs)
+        policy.latencies.append(time.perf_counter() - ts)
+
+        return result
+
+    async def __hedged(self, policy: RetryPolicy, **kwargs) -> dict:
+        first = asyncio.create_task(self.__timed(policy, **kwargs))
+        done, _ = await asyncio.wait({first}, timeout=policy.hedge_delay())
+        if done:
+            return first.result()
+
+        logger.debug(f'Hedging request: {kwargs["request_id"]}')
+
+        pending = {first, asyncio.create_task(self.__timed(policy, **kwargs))}
+        try:
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if not task.exception():
+                        return task.result()  # First answer wins
+                if not pending:
+                    return done.pop().result()  # Both failed; raises
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def __cached(self, method: str, end_point: str, request_id: str, **kwargs) -> dict:
+        key = self.cache.key(end_point, kwargs.get('params'))
+        entry = self.cache.get(key)
+
+        if entry and self.cache.fresh(entry):
+            return deepcopy(entry.result)
+
+        headers = dict(kwargs.pop('headers', None) or {})
+        if entry and entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry and entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+
+        if headers:
+            kwargs['headers'] = headers
+
+        validators = {}
+        result = await self.__retried(method=method, end_point=end_point, request_id=request_id,
+                                      trace_request_ctx=validators, **kwargs)
+        status = result.get('status') if type(result) is dict else None
+
+        if status == 304 and entry:
+            logger.debug(f'Revalidated cached: {end_point}')
+            entry.stored = time.time()
+            self.cache.set(key, entry)
+            return deepcopy(entry.result)
+
+        if status == 200:
+            self.cache.set(key, CacheEntry(end_point=end_point, result=deepcopy(result), stored=time.time(),
+                                           etag=validators.get('etag'), last_modified=validators.get('last_modified')))
+
+        return result
+
+    async def request(self, method: str, end_point: str, request_id: str, **kwargs) -> dict:
+        """Wraps BaseApiClient.request; coalesces identical in-flight GETs, serves
+        and invalidates the response cache, feeds the adaptive limiter,
+        re-authenticates once on a 401 and applies the end point's RetryPolicy
+        (retries with jittered exponential backoff and, for GETs, optional hedging)."""
+        if not self.COALESCE or method.lower() != 'get':
+            return await self.__uncoalesced(method=method, end_point=end_point, request_id=request_id, **kwargs)
+
+        key = (ResponseCache.key(end_point, kwargs.get('params')), repr(sorted((k, v) for k, v in kwargs.items() if k != 'params')))
+        flight = self.in_flight.get(key)
+
+        if flight is None:
+            flight = asyncio.ensure_future(self.__uncoalesced(method=method, end_point=end_point, request_id=request_id,
+                                                              **kwargs))
+            flight.followers = 0
+            self.in_flight[key] = flight
+            flight.add_done_callback(lambda f: self.in_flight.pop(key) if self.in_flight.get(key) is f else None)
+
+            result = await asyncio.shield(flight)  # Shielded so a cancelled caller doesn't cancel it for the others
+
+            return deepcopy(result) if flight.followers else result  # Each caller may mutate its own copy
+
+        logger.debug(f'Coalescing request: {request_id} with in-flight: {end_point}')
+
+        flight.followers += 1
+        result = deepcopy(await asyncio.shield(flight))
+        if type(result) is dict and 'request_id' in result:
+            result['request_id'] = request_id
+
+        return result
+
+    async def __uncoalesced(self, method: str, end_point: str, request_id: str, **kwargs) -> dict:
+        if self.cache:
+            if self.cache.cacheable(method, end_point):
+                return await self.__cached(method=method, end_point=end_point, request_id=request_id, **kwargs)
+
+            if method.lower() != 'get':
+                self.cache.invalidate(end_point)
+                try:
+                    return await self.__retried(method=method, end_point=end_point, request_id=request_id, **kwargs)
+                finally:
+                    self.cache.invalidate(end_point)  # Again, in case a read re-cached it while the write was in flight
+
+        return await self.__retried(method=method, end_point=end_point, request_id=request_id, **kwargs)
+
+    async def __retried(self, method: str, end_point: str, request_id: str, **kwargs) -> dict:
+        kwargs = {'method': method, 'end_point': end_point, 'request_id': request_id, **kwargs}
+        policy = self.retry_policy(method, end_point)
+
+        if not policy:
+            return await self.__authed_request(**kwargs)
+
+        for attempt in range(policy.attempts):
+            last = attempt + 1 >= policy.attempts
+            try:
+                if policy.hedge is not None and method.lower() == 'get':
+                    result = await self.__hedged(policy, **kwargs)
+                else:
+                    result = await self.__timed(policy, **kwargs)
+            except (aio.ClientError, asyncio.TimeoutError) as e:
+                if last:
+                    raise
+                logger.debug(f'Request: {request_id} failed ({e}); Retrying...')
+            else:
+                if last or type(result) is not dict or result.get('status') not in policy.statuses:
+                    return result
+                logger.debug(f'Request: {request_id} returned {result.get("status")}; Retrying...')
+
+            if self.metrics:
+                self.metrics.observe_retry(end_point)
+
+            await asyncio.sleep(policy.delay(attempt))
+
     async def login(self) -> Results:
+        await self.__pool()
+
         payload = {'username': self.cfg['Auth']['Username'], 'password': self.cfg['Auth']['Password']}
 
         logger.debug('Logging in to Bricata...')
@@ -73,12 +406,24 @@ class BricataApiClient(BaseApiClient):
 
         results = await self.process_results(results)
 
-        self.header = {**self.HDR, **{'Authorization': f'{results.success[0]["token_type"]} {results.success[0]["token"]}'}}
-        await self.session.close()
+        self.__set_header(f'{results.success[0]["token_type"]} {results.success[0]["token"]}')
+        if self.token_cache:
+            self.token_cache.set(self.token_key, self.header['Authorization'])
 
-        self.session = aio.ClientSession(headers=self.header, json_serialize=rapidjson.dumps)
         return results
 
+    async def ensure_login(self, rejected: Optional[str] = None) -> NoReturn:
+        """Gets a token if there's none yet (from token_cache when it has one), or
+        replaces one the CMC rejected; concurrent callers share a single login.
+        For requests made on self.session directly rather than through request.
+
+        Args:
+            rejected (Optional[str]): Authorization header that was answered with a 401"""
+        if rejected:
+            await self.__relogin(rejected)
+        else:
+            await self.__check_login()
+
     async def logout(self) -> Results:
         payload = {'username': self.cfg['Auth']['Username']}
 
@@ -93,13 +438,20 @@ class BricataApiClient(BaseApiClient):
         logger.debug('-> Complete.')
 
         self.header = None
+        self.session.headers.pop('Authorization', None)
+        if self.token_cache:
+            self.token_cache.delete(self.token_key)
 
         return await self.process_results(results)
 
-    async def get_records(self, query: Union[AlertQuery]) -> Results:
+    async def get_records(self, query: Union[AlertQuery, MetadataQuery, PolicyRuleQuery], model: Optional[type] = None,
+                          sink: Optional[Sink] = None) -> Results:
         """
         Args:
-            query (Union[AlertQuery]):
+            query (Union[AlertQuery, MetadataQuery, PolicyRuleQuery]):
+            model (Optional[type]): e.g. Alert; success records are converted
+                with model.from_dict instead of being left as dicts
+            sink (Optional[Sink]): Success records are also written to it
 
         Returns:
             results (Results)"""
@@ -112,11 +464,277 @@ class BricataApiClient(BaseApiClient):
                                                   params=query.dict()))]
 
         results = await self.process_results(Results(data=await asyncio.gather(*tasks)), query.data_key)
+        if model:
+            results.success = [model.from_dict(r) for r in results.success]
+        if sink:
+            await asyncio.get_running_loop().run_in_executor(None, sink.write_batch, results.success)
 
         logger.debug('-> Complete.')
 
         return results
 
+    async def __get_page(self, query: Union[AlertQuery, MetadataQuery, PolicyRuleQuery], offset: int, limit: int) -> Results:
+        page = replace(query, offset=offset, limit=limit)
+        tasks = [asyncio.create_task(self.request(method='get',
+                                                  end_point=page.end_point,
+                                                  request_id=uuid4().hex,
+                                                  params=page.dict()))]
+
+        return await self.process_results(Results(data=await asyncio.gather(*tasks)))
+
+    @staticmethod
+    def __page_total(page: dict) -> Optional[int]:
+        for key in ('total', 'count'):
+            if type(page.get(key)) is int:
+                return page[key]
+
+        return None
+
+    async def iter_records(self, query: Union[AlertQuery, MetadataQuery, PolicyRuleQuery], failures: Optional[List[dict]] = None,
+                           model: Optional[type] = None) -> AsyncIterator[Union[dict, object]]:
+        """Iterates every record matched by query, fetching pages concurrently.
+
+        The first page is fetched to determine the total; the remaining pages are
+        requested in a sliding window of limiter.limit requests and yielded in offset order.
+        If the server doesn't report a total, pages are requested until one comes
+        back short.
+
+        Args:
+            query (Union[AlertQuery, MetadataQuery, PolicyRuleQuery]): query.limit is used as the page size
+                (default: PAGE_SIZE); query.offset as the starting record.
+            failures (Optional[List[dict]]): If provided, failed page requests
+                are appended to it; otherwise they are only logged.
+            model (Optional[type]): See get_records
+
+        Yields:
+            record (Union[dict, object])"""
+        if query.id:
+            for record in (await self.get_records(query, model=model)).success:
+                yield record
+            return
+
+        await self.__check_login()
+
+        limit = query.limit or self.PAGE_SIZE
+        offset = query.offset or 0
+
+        logger.debug(f'Iterating {type(query)}, record(s)...')
+
+        first = await self.__get_page(query, offset, limit)
+        if first.failure:
+            logger.error(f'Failed to get page at offset {offset}: {first.failure}')
+            if failures is not None:
+                failures.extend(first.failure)
+            return
+
+        page = first.success[0]
+        records = page.get(query.data_key) or []
+        stop = self.__page_total(page)  # Matches in all, not just from offset
+
+        for record in records:
+            yield model.from_dict(record) if model else record
+
+        if len(records) < limit or (stop is not None and offset + limit >= stop):  # Also covers offset >= total
+            logger.debug('-> Complete.')
+            return
+
+        pending = deque()
+        next_offset = offset + limit
+        exhausted = False
+
+        try:
+            while True:
+                while not exhausted and len(pending) < self.limiter.limit and (stop is None or next_offset < stop):
+                    pending.append((next_offset, asyncio.create_task(self.__get_page(query, next_offset, limit))))
+                    next_offset += limit
+
+                if not pending:
+                    break
+
+                page_offset, task = pending.popleft()
+                results = await task
+
+                if results.failure:
+                    logger.error(f'Failed to get page at offset {page_offset}: {results.failure}')
+                    if failures is not None:
+                        failures.extend(results.failure)
+                    exhausted = exhausted or stop is None  # Without a total we can't tell if more pages exist
+                    continue
+
+                records = results.success[0].get(query.data_key) or []
+                for record in records:
+                    yield model.from_dict(record) if model else record
+
+                if len(records) < limit and stop is None:
+                    exhausted = True
+                    for _, t in pending:
+                        t.cancel()
+                    pending.clear()
+        finally:
+            for _, t in pending:
+                t.cancel()
+
+        logger.debug('-> Complete.')
+
+    async def stream_records(self, query: Union[AlertQuery, MetadataQuery, PolicyRuleQuery],
+                             model: Optional[type] = None) -> AsyncIterator[Union[dict, object]]:
+        """Streams the records of a single response, decoding each as it arrives.
+
+        Unlike get_records the body is never held in memory whole; only the
+        record being received is buffered, and the first record is yielded before
+        the last byte arrives. Use query.limit/offset to choose the page.
+
+        Args:
+            query (Union[AlertQuery, MetadataQuery, PolicyRuleQuery]):
+            model (Optional[type]): See get_records
+
+        Yields:
+            record (Union[dict, object])
+
+        Raises:
+            aiohttp.ClientResponseError: The CMC didn't answer 200, or rejected a fresh token"""
+        if query.id:
+            for record in (await self.get_records(query, model=model)).success:
+                yield record
+            return
+
+        await self.__check_login()
+
+        logger.debug(f'Streaming {type(query)}, record(s)...')
+
+        decoder = JsonArrayStream(key=query.data_key)
+        count = 0
+        async with self.__open('get', query.end_point, params=query.dict()) as response:
+            async for chunk in response.content.iter_chunked(self.CHUNK_SIZE):
+                for record in decoder.feed(chunk):
+                    count += 1
+                    yield model.from_dict(record) if model else record
+
+        logger.debug(f'-> Complete; Streamed {count}, record(s).')
+
+    async def __get_window(self, query: AlertQuery, start: dt.datetime, end: dt.datetime, limit: int,
+                           min_window: dt.timedelta, failures: Optional[List[dict]]) -> List[dict]:
+        window = replace(query, start_time=start, end_time=end, offset=0, limit=limit)
+        results = await self.__get_page(window, 0, limit)
+
+        if results.failure:
+            logger.error(f'Failed to get window {window.start_time} - {window.end_time}: {results.failure}')
+            if failures is not None:
+                failures.extend(results.failure)
+            return []
+
+        page = results.success[0]
+        records = page.get(window.data_key) or []
+        total = self.__page_total(page)
+
+        if len(records) >= limit or (total is not None and total > len(records)):  # Window is full; split it again
+            if end - start > min_window:
+                middle = start + (end - start) / 2
+                halves = await asyncio.gather(self.__get_window(query, start, middle, limit, min_window, failures),
+                                              self.__get_window(query, middle, end, limit, min_window, failures))
+                return halves[0] + halves[1]
+
+            records = [r async for r in self.iter_records(window, failures=failures)]  # Can't split further; page it
+
+        return sorted(records, key=alert_time_key)
+
+    async def export_records(self, query: AlertQuery, shards: Optional[int] = None,
+                             min_window: Optional[dt.timedelta] = dt.timedelta(seconds=1),
+                             failures: Optional[List[dict]] = None) -> AsyncIterator[dict]:
+        """Exports every alert in query's time range by fetching time-window shards concurrently.
+
+        The start_time/end_time range is split into shards; any shard that comes back
+        full (query.limit or PAGE_SIZE records) is split in half and re-fetched until
+        it fits in a single page or is narrower than min_window, in which case it's
+        paged with iter_records. Shards are fetched limiter.limit at a time and yielded in
+        time order; alerts on a shard boundary are only yielded once.
+
+        Args:
+            query (AlertQuery): start_time is required; end_time defaults to now.
+            shards (Optional[int]): Initial number of windows (default: limiter.limit).
+            min_window (Optional[datetime.timedelta]): Narrowest window to split to.
+            failures (Optional[List[dict]]): If provided, failed requests are
+                appended to it; otherwise they are only logged.
+
+        Yields:
+            record (dict): Ordered by timestamp"""
+        if not query.start_time:
+            raise ValueError('export_records requires query.start_time')
+
+        await self.__check_login()
+
+        start = to_datetime(query.start_time)
+        end = to_datetime(query.end_time) if query.end_time else dt.datetime.now(tz=start.tzinfo or dt.timezone.utc)
+        limit = query.limit or self.PAGE_SIZE
+        shards = max(1, shards or self.limiter.limit)
+        step = (end - start) / shards
+        bounds = [start + step * i for i in range(shards)] + [end]
+
+        logger.debug(f'Exporting {type(query)}, record(s) from {shards} shard(s)...')
+
+        pending = deque()
+        windows = iter(zip(bounds, bounds[1:]))
+        last_ts, last_uuids = '', set()
+
+        try:
+            while True:
+                for s, e in windows:
+                    pending.append(asyncio.create_task(self.__get_window(query, s, e, limit, min_window, failures)))
+                    if len(pending) >= self.limiter.limit:
+                        break
+
+                if not pending:
+                    break
+
+                for record in await pending.popleft():
+                    ts = alert_time_key(record)
+                    if ts < last_ts or (ts == last_ts and record.get('uuid') in last_uuids):
+                        continue  # Already yielded from the previous window
+
+                    if ts != last_ts:
+                        last_ts, last_uuids = ts, set()
+                    last_uuids.add(record.get('uuid'))
+
+                    yield record
+        finally:
+            for t in pending:
+                t.cancel()
+
+        logger.debug('-> Complete.')
+
+    async def write_records(self, records: AsyncIterator[Union[dict, object]], sink: Sink) -> int:
+        """Writes an async iterable of records, e.g. iter_records(), to a sink as they arrive.
+
+        Batches are written in the default executor so encoding and compression
+        don't stall requests still in flight.
+
+        Args:
+            records (AsyncIterator[Union[dict, object]]):
+            sink (Sink): Not closed afterwards
+
+        Returns:
+            count (int): Records written"""
+        loop = asyncio.get_running_loop()
+        batch, count, writing = [], 0, None
+
+        async for record in records:
+            batch.append(record)
+            if len(batch) >= sink.batch_size:
+                if writing:
+                    await writing  # Keep batches in order; one write in flight at a time
+                writing = loop.run_in_executor(None, sink.write_batch, batch)
+                count, batch = count + len(batch), []
+
+        if writing:
+            await writing
+        if batch:
+            await loop.run_in_executor(None, sink.write_batch, batch)
+            count += len(batch)
+
+        logger.debug(f'-> Complete; Wrote {count}, record(s).')
+
+        return count
+
     async def get_alerts(self, filters: Optional[AlertsFilter] = None) -> Results:
         await self.__check_login()
 
@@ -174,6 +792,625 @@ class BricataApiClient(BaseApiClient):
 
         return await self.process_results(results)
 
+    async def __bulk_tag(self, method: str, tag: str, uuids: Optional[List[str]],
+                         query: Optional[Union[AlertQuery, AlertsFilter]]) -> Results:
+        if not tag:
+            raise ValueError('tag is required')
+        if uuids is None and query is None:
+            raise ValueError('Either uuids or query is required')
+
+        await self.__check_login()
+
+        if query is not None:
+            params = query.dict() if isinstance(query, AlertQuery) else query.dict
+            tasks = [asyncio.create_task(self.request(method=method,
+                                                      end_point=f'/alerts/tags/{tag}/',
+                                                      request_id=uuid4().hex,
+                                                      params=params))]
+        else:
+            tasks = [asyncio.create_task(self.request(method=method,
+                                                      end_point=f'/alerts/{uuid}/tag/{tag}/',
+                                                      request_id=uuid)) for uuid in dict.fromkeys(uuids or [])]
+
+        return await self.process_results(Results(data=await asyncio.gather(*tasks)))
+
+    async def tag_alerts(self, uuids: Optional[List[str]] = None, tag: Optional[str] = None,
+                         query: Optional[Union[AlertQuery, AlertsFilter]] = None) -> Results:
+        """Tags many alerts at once.
+
+        With a query, a single request to the bulk /alerts/tags/{tag}/ endpoint tags
+        every matching alert server-side. Otherwise one request is made per uuid,
+        limiter.limit at a time; each result's request_id is the alert's uuid.
+
+        Args:
+            uuids (Optional[List[str]]): Ignored when query is given
+            tag (str):
+            query (Optional[Union[AlertQuery, AlertsFilter]]): Pass by keyword, e.g.
+                tag_alerts(tag='ATO', query=AlertsFilter(...))
+
+        Returns:
+            results (Results)
+
+        Raises:
+            ValueError: No tag, or neither uuids nor query"""
+        logger.debug(f'Tagging: {tag} alert(s), in Bricata...')
+
+        results = await self.__bulk_tag('put', tag, uuids, query)
+
+        logger.debug(f'-> Complete; {len(results.success)} succeeded, {len(results.failure)} failed.')
+
+        return results
+
+    async def untag_alerts(self, uuids: Optional[List[str]] = None, tag: Optional[str] = None,
+                           query: Optional[Union[AlertQuery, AlertsFilter]] = None) -> Results:
+        """Untags many alerts at once; see tag_alerts.
+
+        Args:
+            uuids (Optional[List[str]]): Ignored when query is given
+            tag (str):
+            query (Optional[Union[AlertQuery, AlertsFilter]]): Pass by keyword
+
+        Returns:
+            results (Results)
+
+        Raises:
+            ValueError: No tag, or neither uuids nor query"""
+        logger.debug(f'Untagging: {tag} from alert(s), in Bricata...')
+
+        results = await self.__bulk_tag('delete', tag, uuids, query)
+
+        logger.debug(f'-> Complete; {len(results.success)} succeeded, {len(results.failure)} failed.')
+
+        return results
+
+    async def get_metadata(self, query: Optional[MetadataQuery] = None) -> Results:
+        """One page of connection metadata, or a connection's details when query.id is set.
+
+        Args:
+            query (Optional[MetadataQuery]): Or MetadataGroupsQuery / MetadataTimelineQuery
+
+        Returns:
+            results (Results)"""
+        return await self.get_records(query or MetadataQuery())
+
+    async def iter_metadata(self, query: Optional[MetadataQuery] = None,
+                            failures: Optional[List[dict]] = None) -> AsyncIterator[dict]:
+        """Iterates every connection metadata record matched by query.
+
+        Pages are fetched concurrently (limiter.limit at a time) and yielded as
+        each is decoded, so at most that many pages are held in memory however
+        many flows match; use query.limit to size them.
+
+        Args:
+            query (Optional[MetadataQuery]):
+            failures (Optional[List[dict]]): See iter_records
+
+        Yields:
+            record (dict)"""
+        async for record in self.iter_records(query or MetadataQuery(), failures=failures):
+            yield record
+
+    async def get_sensors(self) -> Results:
+        await self.__check_login()
+
+        logger.debug('Getting sensors from Bricata...')
+
+        tasks = [asyncio.create_task(self.request(method='get', end_point='/sensors/', request_id=uuid4().hex))]
+        results = Results(data=await asyncio.gather(*tasks))
+
+        logger.debug('-> Complete.')
+
+        return await self.process_results(results)
+
+    async def get_sensor_health_count(self) -> Results:
+        await self.__check_login()
+
+        logger.debug('Getting critical sensor count from Bricata...')
+
+        tasks = [asyncio.create_task(self.request(method='get', end_point='/sensors/health/count', request_id=uuid4().hex))]
+        results = Results(data=await asyncio.gather(*tasks))
+
+        logger.debug('-> Complete.')
+
+        return await self.process_results(results)
+
+    async def get_sensor_health_history(self, uuid: str, query: Optional[Query] = None) -> Results:
+        """
+        Args:
+            uuid (str): Sensor uuid
+            query (Optional[Query]): start_time/end_time/limit/offset
+
+        Returns:
+            results (Results)"""
+        await self.__check_login()
+
+        logger.debug(f'Getting health history for sensor: {uuid} from Bricata...')
+
+        tasks = [asyncio.create_task(self.request(method='get',
+                                                  end_point=f'/sensors/{uuid}/health/history',
+                                                  request_id=uuid4().hex,
+                                                  params=query.dict() if query else None))]
+        results = Results(data=await asyncio.gather(*tasks))
+
+        logger.debug('-> Complete.')
+
+        return await self.process_results(results)
+
+    async def __download_part(self, end_point: str, params: Optional[dict], state: PartialDownload, part: List[int],
+                              timeout: aio.ClientTimeout, on_chunk: Callable[[int, bytes], None],
+                              on_size: Optional[Callable[[Optional[int]], None]] = None, method: Optional[str] = 'get',
+                              json: Optional[dict] = None) -> NoReturn:
+        """Streams one byte range of a download into the partial file, retrying per the
+        end point's RetryPolicy; a retry continues from the last byte written. A rejected
+        token is replaced once, outside the limiter slot, and the range asked for again."""
+        policy = self.retry_policy(method, end_point) or RetryPolicy(attempts=1)
+
+        attempt, relogged = 0, False
+        while True:
+            start = part[0] + part[2]
+            headers = {'Accept-Encoding': 'identity'}  # Ranges are of the stored bytes, not a compressed stream
+            if method.lower() == 'get':
+                headers['Range'] = f'bytes={start}-{"" if part[1] is None else part[1]}'
+            elif start:
+                raise RangeIgnored(end_point)  # Can't resume a POST mid-body; start over
+            if state.validator and start:
+                headers['If-Range'] = state.validator  # Changed since? Then the server sends it all (200)
+
+            rejected = self.header['Authorization'] if self.header else None
+            try:
+                async with self.limiter:
+                    async with self.session.request(method, f'{self.cfg["URI"]["Base"]}{end_point}', params=params,
+                                                    json=json, headers=headers, timeout=timeout) as response:
+                        if response.status == 416 and part[1] is None:
+                            part[1] = start - 1  # Open-ended part was already complete
+                            return
+                        response.raise_for_status()
+
+                        if response.status == 200:
+                            if start:
+                                raise RangeIgnored(end_point)
+                            part[1] = None  # Whole body, in one piece
+                            state.parts = [part]
+                            state.size = response.content_length
+                        elif on_size and state.size is None:
+                            state.validator = response.headers.get('ETag') or response.headers.get('Last-Modified')
+                            on_size((content_range(response.headers.get('Content-Range')) or (0, 0, None))[2])
+
+                        async for chunk in response.content.iter_chunked(self.CHUNK_SIZE):
+                            on_chunk(part[0] + part[2], chunk)
+                            state.write(part, chunk)
+
+                if part[1] is None:
+                    part[1] = part[0] + part[2] - 1
+                return
+            except (aio.ClientError, asyncio.TimeoutError) as e:
+                if isinstance(e, aio.ClientResponseError) and e.status == 401 and not relogged:
+                    relogged = True
+                    await self.__relogin(rejected)  # With the slot released; login takes one of its own
+                    continue  # Not counted as an attempt
+                retryable = not isinstance(e, aio.ClientResponseError) or e.status in policy.statuses
+                if attempt + 1 >= policy.attempts or not retryable:
+                    raise
+                logger.debug(f'Download of {end_point} bytes {start}- failed ({e}); Retrying...')
+
+            await asyncio.sleep(policy.delay(attempt))
+            attempt += 1
+
+    async def download(self, end_point: str, path: str, params: Optional[dict] = None, parts: Optional[int] = None,
+                       part_size: Optional[int] = None, checksum: Optional[str] = None, expected: Optional[str] = None,
+                       resume: Optional[bool] = True, read_timeout: Optional[float] = 300.0, method: Optional[str] = 'get',
+                       json: Optional[dict] = None) -> DownloadResult:
+        """Streams a (large, binary) response body straight to a file.
+
+        Nothing is buffered beyond CHUNK_SIZE. The first request asks for the first
+        part_size bytes; if the server answers with a range, the rest of the file is
+        fetched as parallel ranges, parts at a time, while the first one is still
+        streaming. Otherwise the whole body is streamed in one piece. Progress is kept
+        beside the file (path.part, path.part.json), so an interrupted download
+        resumes where it stopped; If-Range makes the server send the whole file
+        again if it changed in the meantime.
+
+        Args:
+            end_point (str):
+            path (str): Where to write the file; replaced once complete
+            params (Optional[dict]): Query string
+            parts (Optional[int]): Ranges fetched at once (default: limiter.limit)
+            part_size (Optional[int]): Bytes per range (default: PART_SIZE)
+            checksum (Optional[str]): hashlib algorithm, e.g. sha256; bytes that
+                arrive in order are hashed as they're written, the rest read back
+            expected (Optional[str]): Hex digest the file must match
+            resume (Optional[bool]): Continue a partial download of the same source
+            read_timeout (Optional[float]): Seconds without data before a range is retried
+            method (Optional[str]): get | post; a POST is streamed in one piece and
+                starts over rather than resuming
+            json (Optional[dict]): Body of a POST
+
+        Returns:
+            result (DownloadResult)
+
+        Raises:
+            aiohttp.ClientResponseError: The CMC refused the download; progress is kept
+            ValueError: The checksum didn't match expected; the file is discarded"""
+        await self.__check_login()
+
+        url = f'{self.cfg["URI"]["Base"]}{end_point}'
+        part_size = part_size or self.PART_SIZE
+        timeout = aio.ClientTimeout(total=None, sock_read=read_timeout)  # Multi-GB bodies outlast any total timeout
+        state = PartialDownload(path, f'{method.upper()} {url}?{urlencode(sorted((params or {}).items()))} '
+                                      f'{rapidjson.dumps(json, sort_keys=True) if json else ""}')
+        resumed = bool(resume and state.load())
+        if not resumed:
+            state.reset()
+
+        checksum = checksum or ('sha256' if expected else None)
+        hashed = {'hasher': hashlib.new(checksum) if checksum else None, 'offset': 0}
+
+        def on_chunk(offset: int, chunk: bytes):
+            if hashed['hasher'] and offset == hashed['offset']:  # Contiguous with what's hashed so far
+                hashed['hasher'].update(chunk)
+                hashed['offset'] += len(chunk)
+
+        async def fetch(pending: List[List[int]]):
+            slots = asyncio.Semaphore(parts or self.limiter.limit)
+
+            async def one(part: List[int]):
+                async with slots:
+                    await self.__download_part(end_point, params, state, part, timeout, on_chunk, method=method, json=json)
+
+            tasks = [asyncio.ensure_future(one(p)) for p in pending]
+            try:
+                await asyncio.gather(*tasks)
+            finally:  # One range failed; stop the rest before the file is touched again
+                for t in tasks:
+                    t.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+        async def fresh():
+            first, rest = [0, part_size - 1, 0], []
+
+            def on_size(total: Optional[int]):
+                if total is None:  # Ranges, but no length; continue open-ended once the first part is in
+                    state.parts = [first, [first[1] + 1, None, 0]]
+                    return
+                state.plan(total, part_size, first)
+                rest.append(asyncio.ensure_future(fetch(state.parts[1:])))
+
+            state.parts = [first]
+            try:
+                await self.__download_part(end_point, params, state, first, timeout, on_chunk, on_size=on_size,
+                                           method=method, json=json)
+                if rest:
+                    await rest[0]
+                elif len(state.parts) > 1:
+                    await fetch(state.parts[1:])
+            finally:
+                for t in rest:
+                    t.cancel()
+                await asyncio.gather(*rest, return_exceptions=True)
+
+        logger.debug(f'Downloading {end_point} to {path}{" (resuming)" if resumed else ""}...')
+
+        try:
+            try:
+                if resumed:
+                    await fetch(state.pending())
+                else:
+                    await fresh()
+            except RangeIgnored:
+                logger.debug(f'{end_point} changed since the partial download; Starting over...')
+                state.reset()
+                resumed, hashed['offset'] = False, 0
+                hashed['hasher'] = hashlib.new(checksum) if checksum else None
+                await fresh()
+        except BaseException:
+            if state.file and not state.file.closed:
+                state.save()  # Keep what we have for the next attempt
+            raise
+
+        loop = asyncio.get_running_loop()
+        digest = await loop.run_in_executor(None, state.checksum, checksum, hashed['hasher'],
+                                            hashed['offset']) if checksum else None
+        if expected and digest != expected.lower():
+            state.discard()
+            raise ValueError(f'{checksum} of {end_point} is {digest}, expected {expected}')
+
+        ranged = len(state.parts) > 1
+        size = state.finish()
+
+        logger.debug(f'-> Complete; Downloaded {size}, byte(s).')
+
+        return DownloadResult(path=path, size=size, checksum=digest, resumed=resumed, ranged=ranged)
+
+    async def download_capture(self, host: str, path: str, params: Optional[dict] = None, **kwargs) -> DownloadResult:
+        """Packet capture from a sensor; see download for kwargs."""
+        return await self.download(f'/sensors/{host}/capture/', path, params=params, **kwargs)
+
+    async def download_sensor_logs(self, host: str, path: str, **kwargs) -> DownloadResult:
+        """Log dump from a sensor; see download for kwargs."""
+        return await self.download(f'/sensors/{host}/logdump/', path, **kwargs)
+
+    async def download_system_logs(self, path: str, **kwargs) -> DownloadResult:
+        """CMC log dump; see download for kwargs."""
+        return await self.download('/system/logdump', path, **kwargs)
+
+    async def get_reports(self) -> Results:
+        await self.__check_login()
+
+        logger.debug('Getting reports from Bricata...')
+
+        tasks = [asyncio.create_task(self.request(method='get', end_point='/system/reports', request_id=uuid4().hex))]
+        results = Results(data=await asyncio.gather(*tasks))
+
+        logger.debug('-> Complete.')
+
+        return await self.process_results(results)
+
+    @staticmethod
+    def __objects(results: Results) -> List[dict]:
+        objects = results.success
+        if len(objects) == 1 and type(objects[0]) is list:
+            objects = objects[0]
+        elif len(objects) == 1 and type(objects[0]) is dict and type(objects[0].get('objects')) is list:
+            objects = objects[0]['objects']
+
+        return objects
+
+    async def wait_for_report(self, uuid: str, seq: Optional[int] = None, interval: Optional[float] = 2.0,
+                              max_interval: Optional[float] = 60.0, timeout: Optional[float] = 3600.0) -> dict:
+        """Polls a report's history until a run finishes.
+
+        The interval grows by half after every poll that finds the run still going,
+        with jitter, up to max_interval.
+
+        Args:
+            uuid (str): Report (template) uuid
+            seq (Optional[int]): History entry to wait for (default: the latest run)
+            interval (Optional[float]): Seconds before the second poll
+            max_interval (Optional[float]):
+            timeout (Optional[float]): Give up after this many seconds
+
+        Returns:
+            entry (dict): The finished history entry; pass its seq and key to
+                download_report_history or iter_report_rows
+
+        Raises:
+            RuntimeError: The run failed
+            asyncio.TimeoutError: It didn't finish within timeout"""
+        deadline = time.monotonic() + timeout
+
+        while True:
+            reports = self.__objects(await self.get_reports())
+            report = next((r for r in reports if type(r) is dict and r.get('uuid') == uuid), None)
+            history = sorted((report or {}).get('history') or [], key=lambda h: h.get('seq', 0))
+            entry = next((h for h in history if h.get('seq') == seq), None) if seq is not None else (history or [None])[-1]
+            status = str((entry or {}).get('status') or (entry or {}).get('state') or '').lower()
+
+            if status in self.REPORT_DONE:
+                return entry
+            if status in self.REPORT_FAILED:
+                raise RuntimeError(f'Report {uuid} run {entry.get("seq")} failed: {entry}')
+
+            if time.monotonic() + interval > deadline:
+                raise asyncio.TimeoutError(f'Report {uuid} not finished after {timeout}s')
+
+            logger.debug(f'Report {uuid} is {status or "pending"}; Polling again in {interval:.1f}s...')
+            await asyncio.sleep(random.uniform(interval / 2, interval))
+            interval = min(interval * 1.5, max_interval)
+
+    async def export_report(self, path: str, report: dict, **kwargs) -> DownloadResult:
+        """Generates a report (/system/-export) and streams it to path; see download for kwargs."""
+        return await self.download('/system/-export', path, method='post', json=report, **kwargs)
+
+    async def download_alerts_report(self, path: str, query: Optional[AlertQuery] = None, **kwargs) -> DownloadResult:
+        """The Alerts page report for query, streamed to path; see download for kwargs."""
+        return await self.download('/system/reports/alerts/', path, params=query.dict() if query else None, **kwargs)
+
+    async def download_report_history(self, uuid: str, seq: int, key: str, path: str, **kwargs) -> DownloadResult:
+        """A finished report run, streamed to path; see wait_for_report and download."""
+        return await self.download(f'/system/reports/{uuid}/history/{seq}/{key}/-download', path, method='post', **kwargs)
+
+    async def fetch_report(self, uuid: str, path: str, seq: Optional[int] = None, timeout: Optional[float] = 3600.0,
+                           **kwargs) -> DownloadResult:
+        """Waits for a report run to finish, then streams it to path.
+
+        Args:
+            uuid (str):
+            path (str):
+            seq (Optional[int]): See wait_for_report
+            timeout (Optional[float]): See wait_for_report
+            **kwargs: See download
+
+        Returns:
+            result (DownloadResult)"""
+        entry = await self.wait_for_report(uuid, seq=seq, timeout=timeout)
+
+        return await self.download_report_history(uuid, entry['seq'], entry['key'], path, **kwargs)
+
+    async def iter_report_rows(self, end_point: str, method: Optional[str] = 'get', params: Optional[dict] = None,
+                               json: Optional[dict] = None, key: Optional[str] = 'objects',
+                               read_timeout: Optional[float] = 300.0) -> AsyncIterator[Union[dict, list]]:
+        """Streams a report and yields its rows as they're decoded; nothing is written to disk.
+
+        The format is taken from the Content-Type: CSV rows become dicts keyed by
+        the header, NDJSON yields one document per line and JSON yields the
+        elements of key's array (or of the document, if it's an array).
+
+        Args:
+            end_point (str): e.g. /system/reports/alerts/, /system/-export (post)
+                or /system/reports/{uuid}/history/{seq}/{key}/-download (post)
+            method (Optional[str]):
+            params (Optional[dict]): Query string
+            json (Optional[dict]): Body of a POST
+            key (Optional[str]): JSON reports only
+            read_timeout (Optional[float]): Seconds without data before giving up
+
+        Yields:
+            row (Union[dict, list])
+
+        Raises:
+            aiohttp.ClientResponseError: The CMC didn't answer 200"""
+        await self.__check_login()
+
+        logger.debug(f'Streaming report {end_point}...')
+
+        count = 0
+        async with self.__open(method, end_point, params=params, json=json,
+                               timeout=aio.ClientTimeout(total=None, sock_read=read_timeout)) as response:
+            content_type = response.content_type
+            if 'csv' in content_type or content_type.startswith('text/plain'):
+                decoder = CsvStream()
+            elif 'ndjson' in content_type or 'jsonl' in content_type:
+                decoder = EventStream(sse=False)
+            else:
+                decoder = JsonArrayStream(key=key)
+
+            async for chunk in response.content.iter_chunked(self.CHUNK_SIZE):
+                for row in decoder.feed(chunk):
+                    count += 1
+                    yield row
+
+            if isinstance(decoder, CsvStream):
+                for row in decoder.feed(b'', final=True):
+                    count += 1
+                    yield row
+            elif isinstance(decoder, EventStream) and decoder.buf.strip():
+                count += 1
+                yield rapidjson.loads(decoder.buf)
+
+        logger.debug(f'-> Complete; Streamed {count}, row(s).')
+
+    async def __read_file(self, path: str, compress: bool) -> AsyncIterator[bytes]:
+        """Reads path CHUNK_SIZE at a time in the default executor, optionally gzipping it on the way."""
+        loop = asyncio.get_running_loop()
+        gz = zlib.compressobj(wbits=31) if compress else None  # wbits=31: gzip container
+
+        with open(path, 'rb') as f:
+            while True:
+                chunk = await loop.run_in_executor(None, f.read, self.CHUNK_SIZE)
+                if not chunk:
+                    break
+                chunk = gz.compress(chunk) if gz else chunk
+                if chunk:
+                    yield chunk
+
+        if gz:
+            yield gz.flush()
+
+    def __upload_form(self, path: str, compress: bool, field: str, filename: str) -> aio.MultipartWriter:
+        payload = aio.payload.AsyncIterablePayload(self.__read_file(path, compress),
+                                                   content_type='application/gzip' if compress else 'text/plain')
+        payload.set_content_disposition('form-data', name=field, filename=filename)
+        with aio.MultipartWriter('form-data') as form:
+            form.append_payload(payload)
+
+        return form
+
+    async def upload_suricata_rules(self, path: str, compress: Optional[bool] = False, params: Optional[dict] = None,
+                                    field: Optional[str] = 'file', read_timeout: Optional[float] = 600.0) -> dict:
+        """Imports a Suricata rules file (/rules/file/suricata/-upload/) as a streamed multipart upload.
+
+        The file is read and sent CHUNK_SIZE at a time, so it's never held in memory
+        whole. Uploads aren't retried, as the body can only be streamed once; a rejected
+        token is the exception: it's replaced and the file read and sent again.
+
+        Args:
+            path (str): Rules file on disk
+            compress (Optional[bool]): gzip the file as it's sent (filename gets .gz)
+            params (Optional[dict]): Query string
+            field (Optional[str]): Multipart field name
+            read_timeout (Optional[float]): Seconds to wait on the CMC; importing
+                tens of thousands of rules takes a while
+
+        Returns:
+            response (dict): The CMC's answer
+
+        Raises:
+            aiohttp.ClientResponseError: The CMC didn't accept the upload"""
+        await self.__check_login()
+
+        filename = os.path.basename(path) + ('.gz' if compress else '')
+        logger.debug(f'Uploading {filename} to Bricata...')
+
+        for attempt in range(2):
+            rejected = self.header['Authorization'] if self.header else None
+            form = self.__upload_form(path, compress, field, filename)
+            async with self.limiter:
+                async with self.session.post(f'{self.cfg["URI"]["Base"]}/rules/file/suricata/-upload/', params=params,
+                                             data=form, headers={'Content-Type': form.content_type},  # Not the session's JSON
+                                             timeout=aio.ClientTimeout(total=None, sock_read=read_timeout)) as response:
+                    if response.status != 401 or attempt:
+                        response.raise_for_status()
+                        body = await response.read()
+                        result = rapidjson.loads(body) if body.strip() else {}
+                        break
+
+            await self.__relogin(rejected)  # With the slot released; login takes one of its own
+
+        logger.debug('-> Complete.')
+
+        return result
+
+    async def create_suricata_rule(self, rule: SuricataRule) -> Results:
+        if rule.id:
+            raise ValueError('create_suricata_rule requires a rule without an id')
+
+        return await self.put_suricata_rules([rule])
+
+    async def update_suricata_rule(self, rule: SuricataRule) -> Results:
+        if not rule.id:
+            raise ValueError('update_suricata_rule requires rule.id')
+
+        return await self.put_suricata_rules([rule])
+
+    async def put_suricata_rules(self, rules: Iterable[SuricataRule]) -> Results:
+        """Creates rules without an id (post /rules/rule/suricata/) and updates rules
+        with one (put /rules/rule/suricata/{id}/), concurrently, limiter.limit at a time.
+
+        Each result's request_id is the rule's id, else its sid, so per-rule
+        outcomes can be matched to the rules sent. Only limiter.maximum writes are
+        queued at a time, however many rules there are.
+
+        Args:
+            rules (Iterable[SuricataRule]):
+
+        Returns:
+            results (Results)"""
+        await self.__check_login()
+
+        rules = list(rules)
+        logger.debug(f'Writing {len(rules)} Suricata rule(s) to Bricata...')
+
+        data, pending = [None] * len(rules), iter(enumerate(rules))
+
+        async def worker():
+            for i, r in pending:  # Workers share the iterator; each rule is sent once
+                data[i] = await self.request(method='put' if r.id else 'post',
+                                             end_point=f'/rules/rule/suricata/{r.id}/' if r.id else '/rules/rule/suricata/',
+                                             request_id=str(r.id or r.sid or uuid4().hex),
+                                             json=r.dict)
+
+        # At most limiter.maximum writes wait on the limiter rather than one task per rule
+        await asyncio.gather(*[worker() for _ in range(min(len(rules), self.limiter.maximum))])
+        results = await self.process_results(Results(data=data))
+
+        logger.debug(f'-> Complete; {len(results.success)} succeeded, {len(results.failure)} failed.')
+
+        return results
+
+    async def get_rule_history(self, rule_id: str) -> Results:
+        await self.__check_login()
+
+        logger.debug(f'Getting version history for rule: {rule_id} from Bricata...')
+
+        tasks = [asyncio.create_task(self.request(method='get',
+                                                  end_point=f'/rules/rule/suricata/{rule_id}/history/',
+                                                  request_id=rule_id))]
+        results = Results(data=await asyncio.gather(*tasks))
+
+        logger.debug('-> Complete.')
+
+        return await self.process_results(results)
+
     async def get_tags(self) -> Results:
         await self.__check_login()
 
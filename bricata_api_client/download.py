@@ -0,0 +1,197 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Download
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>."""
+import hashlib
+import logging
+import os
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import rapidjson
+
+logger = logging.getLogger(__name__)
+
+CONTENT_RANGE = re.compile(r'bytes (\d+)-(\d+)/(\d+|\*)')
+
+
+@dataclass
+class DownloadResult:
+    """
+    Attributes:
+        path (str): Where the file was written
+        size (int): Bytes
+        checksum (Optional[str]): Hex digest, if one was requested
+        resumed (bool): Picked up from an earlier, interrupted download
+        ranged (bool): Fetched as parallel byte ranges
+    """
+    path: str
+    size: int
+    checksum: Optional[str] = None
+    resumed: bool = False
+    ranged: bool = False
+
+
+class RangeIgnored(Exception):
+    """The server answered a range request with the whole body; the resource
+    changed since the partial download or ranges aren't supported."""
+
+
+def content_range(value: Optional[str]) -> Optional[Tuple[int, int, Optional[int]]]:
+    """
+    Args:
+        value (Optional[str]): Content-Range header, e.g. 'bytes 0-1023/4096'
+
+    Returns:
+        range (Optional[Tuple[int, int, Optional[int]]]): First byte, last byte, total (None if unknown)"""
+    m = CONTENT_RANGE.match(value or '')
+    if not m:
+        return None
+
+    return int(m.group(1)), int(m.group(2)), None if m.group(3) == '*' else int(m.group(3))
+
+
+class PartialDownload:
+    """Resumable download state: bytes go to path.part, progress to path.part.json.
+
+    The file is split into parts, each [start, end, written] with end inclusive
+    (None for a body of unknown length fetched in one piece). Progress is only
+    saved after the bytes it covers are flushed, so a resume never skips data;
+    at worst it re-fetches what was written since the last save."""
+    SAVE_EVERY: int = 2 ** 24  # Bytes written between progress saves.
+
+    def __init__(self, path: str, source: str):
+        """Initializes Class
+
+        Args:
+            path (str): Final path of the file
+            source (str): Identifies what is downloaded (URL and parameters); a
+                partial file from a different source isn't resumed"""
+        self.path = path
+        self.part_path = f'{path}.part'
+        self.meta_path = f'{path}.part.json'
+        self.source = source
+        self.validator = None  # ETag or Last-Modified; sent as If-Range when resuming
+        self.size = None
+        self.parts = []
+        self.file = None
+        self.unsaved = 0
+
+    def load(self) -> bool:
+        """
+        Returns:
+            resumable (bool): A partial download of source exists"""
+        try:
+            with open(self.meta_path) as f:
+                meta = rapidjson.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if meta.get('source') != self.source or not os.path.exists(self.part_path):
+            return False
+
+        self.validator, self.size, self.parts = meta['validator'], meta['size'], meta['parts']
+        self.file = open(self.part_path, 'r+b')
+
+        return True
+
+    def reset(self):
+        self.validator, self.size, self.parts = None, None, []
+        if self.file:
+            self.file.close()
+        self.file = open(self.part_path, 'w+b')
+
+    def plan(self, size: int, part_size: int, first: Optional[List[int]] = None) -> List[List[int]]:
+        """Splits size bytes into parts of part_size.
+
+        Args:
+            size (int):
+            part_size (int):
+            first (Optional[List[int]]): The part already being fetched, if any
+
+        Returns:
+            parts (List[List[int]])"""
+        self.size = size
+        if first:
+            first[1] = min(first[1], size - 1)
+        self.parts = [first] if first else []
+        start = first[1] + 1 if first else 0
+        while start < size:
+            self.parts.append([start, min(start + part_size, size) - 1, 0])
+            start += part_size
+        self.file.truncate(size)
+
+        return self.parts
+
+    def pending(self) -> List[List[int]]:
+        return [p for p in self.parts if p[1] is None or p[2] < p[1] - p[0] + 1]
+
+    def write(self, part: List[int], chunk: bytes):
+        self.file.seek(part[0] + part[2])  # No await between seek and write; parts can share the file
+        self.file.write(chunk)
+        part[2] += len(chunk)
+
+        self.unsaved += len(chunk)
+        if self.unsaved >= self.SAVE_EVERY:
+            self.save()
+
+    def save(self):
+        self.file.flush()
+        self.unsaved = 0
+        tmp = f'{self.meta_path}.tmp'
+        with open(tmp, 'w') as f:
+            rapidjson.dump({'source': self.source, 'validator': self.validator, 'size': self.size, 'parts': self.parts}, f)
+        os.replace(tmp, self.meta_path)
+
+    def checksum(self, algorithm: str, hasher: Optional['hashlib._Hash'] = None, offset: Optional[int] = 0) -> str:
+        """Finishes a digest by reading the file from offset; bytes before it were
+        hashed as they arrived.
+
+        Args:
+            algorithm (str): Any hashlib algorithm
+            hasher (Optional[hashlib._Hash]): Digest of the first offset bytes
+            offset (Optional[int]):
+
+        Returns:
+            digest (str): Hex"""
+        hasher = hasher or hashlib.new(algorithm)
+        self.file.flush()
+        self.file.seek(offset)
+        for block in iter(lambda: self.file.read(2 ** 20), b''):
+            hasher.update(block)
+
+        return hasher.hexdigest()
+
+    def finish(self) -> int:
+        """Moves the completed file into place.
+
+        Returns:
+            size (int)"""
+        self.file.close()
+        os.replace(self.part_path, self.path)
+        self.discard()
+
+        return os.path.getsize(self.path)
+
+    def discard(self):
+        if self.file and not self.file.closed:
+            self.file.close()
+        for path in (self.part_path, self.meta_path):
+            if os.path.exists(path):
+                os.remove(path)
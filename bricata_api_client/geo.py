@@ -0,0 +1,219 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Geo Stream
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>."""
+import asyncio
+import logging
+import random
+import time
+from typing import Any, AsyncIterator, Optional
+
+import aiohttp as aio
+import rapidjson
+
+from bricata_api_client.client import BricataApiClient
+from bricata_api_client.stream import EventStream
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ('block', 'drop_oldest', 'drop_newest')
+
+
+class GeoStream:
+    """Long-lived consumer of /alerts/geo/stream/.
+
+    A reader task decodes events off the socket as they arrive into a bounded
+    queue that the async iterator drains. When the consumer falls behind, the
+    policy decides what gives:
+
+    - block: the reader stops reading, so TCP flow control slows the CMC
+    - drop_oldest: the oldest queued event is discarded for the new one
+    - drop_newest: the new event is discarded
+
+    Dropped events are counted in dropped. A dropped or failed connection is
+    re-opened with exponential backoff; the stream resumes from the last event
+    received (Last-Event-ID for server-sent events, else start_time from the last
+    event's timestamp). The backoff is only reset by a connection that delivered
+    events or stayed up HEALTHY seconds, so a CMC that keeps closing the stream
+    straight away isn't hammered. Reconnecting doesn't hold a concurrency slot,
+    so a stream never starves the client's other requests."""
+    END_POINT: str = '/alerts/geo/stream/'
+    QUEUE_SIZE: int = 1000  # Events buffered for the consumer.
+    HEALTHY: float = 30.0  # Seconds a connection lasts, without events, before the backoff resets
+
+    def __init__(self, client: BricataApiClient, params: Optional[dict] = None, queue_size: Optional[int] = None,
+                 policy: Optional[str] = 'block', idle_timeout: Optional[float] = 60.0,
+                 reconnect_delay: Optional[float] = 1.0, max_reconnect_delay: Optional[float] = 60.0):
+        """Initializes Class
+
+        Args:
+            client (BricataApiClient):
+            params (Optional[dict]): Query string, e.g. {'tags': 'ATO'}
+            queue_size (Optional[int]): Events buffered (default: QUEUE_SIZE)
+            policy (Optional[str]): block | drop_oldest | drop_newest
+            idle_timeout (Optional[float]): Reconnect if nothing, not even a
+                keep-alive, arrives for this many seconds
+            reconnect_delay (Optional[float]): First delay before reconnecting;
+                doubles, with jitter, up to max_reconnect_delay
+            max_reconnect_delay (Optional[float]):"""
+        if policy not in POLICIES:
+            raise ValueError(f'policy must be one of {POLICIES}')
+
+        self.client = client
+        self.params = dict(params or {})
+        self.queue = asyncio.Queue(maxsize=queue_size or self.QUEUE_SIZE)
+        self.policy = policy
+        self.idle_timeout = idle_timeout
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.last_id = None
+        self.last_timestamp = None
+        self.seen = set()  # Events at last_timestamp
+        self.received = 0
+        self.dropped = 0
+        self.reconnects = 0
+        self.reader = None
+        self.error = None
+
+    async def __aenter__(self):
+        self.start()
+
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self
+
+    async def __anext__(self) -> Any:
+        self.start()
+        event = await self.queue.get()
+        if event is StopAsyncIteration:
+            self.queue.put_nowait(event)  # Keep answering later calls the same way
+            if self.error:
+                raise self.error
+            raise StopAsyncIteration
+
+        return event
+
+    def start(self):
+        if not self.reader:
+            self.reader = asyncio.create_task(self.__read())
+
+    async def close(self):
+        if self.reader:
+            self.reader.cancel()
+            try:
+                await self.reader
+            except asyncio.CancelledError:
+                pass
+
+    async def __put(self, event: Any):
+        if self.policy == 'block':
+            await self.queue.put(event)
+            return
+
+        if self.queue.full():
+            self.dropped += 1
+            if self.policy == 'drop_newest':
+                return
+            self.queue.get_nowait()
+
+        self.queue.put_nowait(event)
+
+    async def __connect(self) -> aio.ClientResponse:
+        await self.client.ensure_login()
+
+        headers, params = {}, dict(self.params)
+        if self.last_id is not None:
+            headers['Last-Event-ID'] = self.last_id
+        elif self.last_timestamp:
+            params['start_time'] = self.last_timestamp
+
+        for attempt in range(2):
+            rejected = self.client.header['Authorization'] if self.client.header else None
+            response = await self.client.session.get(f'{self.client.cfg["URI"]["Base"]}{self.END_POINT}', params=params,
+                                                     headers=headers, timeout=aio.ClientTimeout(total=None,
+                                                                                                sock_read=self.idle_timeout))
+            if response.status == 401 and not attempt:
+                response.release()
+                await self.client.ensure_login(rejected)  # Token expired; shares the client's re-login
+                continue
+
+            response.raise_for_status()
+
+            return response
+
+    def __duplicate(self, event: Any) -> bool:
+        """Tracks the newest timestamp received and the events at it; True for
+        an event a time based resume has already delivered."""
+        ts = event.get('timestamp') if type(event) is dict else None
+        if not ts:
+            return False
+
+        key = hash(rapidjson.dumps(event, sort_keys=True))
+        if self.last_timestamp and (ts < self.last_timestamp or (ts == self.last_timestamp and key in self.seen)):
+            return True
+
+        if ts != self.last_timestamp:
+            self.last_timestamp, self.seen = ts, set()
+        self.seen.add(key)
+
+        return False
+
+    async def __consume(self, response: aio.ClientResponse):
+        decoder = EventStream(sse=response.content_type == 'text/event-stream')
+
+        async with response:
+            async for chunk in response.content.iter_any():
+                for event in decoder.feed(chunk):
+                    if decoder.id is not None:
+                        self.last_id = decoder.id
+                    elif self.__duplicate(event):
+                        continue
+
+                    self.received += 1
+                    await self.__put(event)
+
+    async def __read(self):
+        delay = self.reconnect_delay
+        try:
+            while True:
+                started, received = time.monotonic(), self.received
+                try:
+                    response = await self.__connect()
+                    await self.__consume(response)
+                    logger.debug('Geo stream ended; Reconnecting...')
+                except (aio.ClientError, asyncio.TimeoutError) as e:
+                    if isinstance(e, aio.ClientResponseError) and e.status in (400, 403, 404):
+                        raise  # Not going to get better by retrying
+                    logger.warning(f'Geo stream interrupted ({e!r}); Reconnecting...')
+
+                if self.received > received or time.monotonic() - started >= self.HEALTHY:
+                    delay = self.reconnect_delay  # The connection was good; reset the backoff
+                else:
+                    await asyncio.sleep(random.uniform(delay / 2, delay))
+                    delay = min(delay * 2, self.max_reconnect_delay)
+
+                self.reconnects += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.error = e
+            await self.queue.put(StopAsyncIteration)  # Surface the failure to the consumer
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Health
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>."""
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import aiohttp as aio
+import rapidjson
+
+from bricata_api_client.client import BricataApiClient
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SensorChange:
+    """
+    Attributes:
+        uuid (str):
+        kind (str): added | changed | removed
+        sensor (Optional[dict]): The sensor as listed by /sensors/; None when removed
+    """
+    uuid: str
+    kind: str
+    sensor: Optional[dict] = None
+
+
+class SensorHealthPoller:
+    """Polls sensor health and reports only the sensors whose health changed.
+
+    Each poll asks /sensors/health/count first; the full /sensors/ listing is
+    only fetched when that answer changes, or every full_interval seconds to
+    catch changes that leave the count alone (one sensor recovering as another
+    fails). The snapshot kept between polls is a hash of each sensor's health
+    fields, so delivery counters and other churn don't register as changes."""
+    FIELDS: Tuple[str, ...] = ('health', 'status')  # Sensor keys compared between polls.
+
+    def __init__(self, client: BricataApiClient, interval: Optional[float] = 10.0,
+                 full_interval: Optional[float] = 300.0, max_interval: Optional[float] = 300.0,
+                 fields: Optional[Tuple[str, ...]] = None):
+        """Initializes Class
+
+        Args:
+            client (BricataApiClient):
+            interval (Optional[float]): Seconds between polls
+            full_interval (Optional[float]): Seconds after which the listing is
+                fetched even if the count hasn't changed; None to never force it
+            max_interval (Optional[float]): Failed polls back off exponentially up to this
+            fields (Optional[Tuple[str, ...]]): Sensor keys that make up its health
+                (default: FIELDS)"""
+        self.client = client
+        self.interval = interval
+        self.full_interval = full_interval
+        self.max_interval = max_interval
+        self.fields = fields or self.FIELDS
+        self.count = None
+        self.snapshot = {}  # uuid -> hash of health fields
+        self.last_full = None
+        self.polls = 0
+        self.full_polls = 0
+
+    def __digest(self, sensor: dict) -> int:
+        return hash(rapidjson.dumps([sensor.get(f) for f in self.fields], sort_keys=True))
+
+    def diff(self, sensors: List[dict]) -> List[SensorChange]:
+        """Updates the snapshot from a full listing.
+
+        Args:
+            sensors (List[dict]):
+
+        Returns:
+            changes (List[SensorChange]): Sensors added, changed or removed since the last listing"""
+        changes, current = [], {}
+        for sensor in sensors:
+            uuid = sensor.get('uuid')
+            digest = current[uuid] = self.__digest(sensor)
+            previous = self.snapshot.get(uuid)
+            if previous is None:
+                changes.append(SensorChange(uuid=uuid, kind='added', sensor=sensor))
+            elif previous != digest:
+                changes.append(SensorChange(uuid=uuid, kind='changed', sensor=sensor))
+
+        changes += [SensorChange(uuid=uuid, kind='removed') for uuid in self.snapshot.keys() - current.keys()]
+        self.snapshot = current
+
+        return changes
+
+    async def poll(self) -> List[SensorChange]:
+        """One poll; the first always fetches the full listing.
+
+        Returns:
+            changes (List[SensorChange])
+
+        Raises:
+            RuntimeError: The CMC didn't answer"""
+        self.polls += 1
+        results = await self.client.get_sensor_health_count()
+        if results.failure:
+            raise RuntimeError(f'Sensor health count failed: {results.failure}')
+
+        count = results.success[0] if results.success else None
+        now = time.monotonic()
+        stale = self.last_full is None or (self.full_interval is not None and now - self.last_full >= self.full_interval)
+
+        if count == self.count and not stale:
+            return []
+
+        results = await self.client.get_sensors()
+        if results.failure:
+            raise RuntimeError(f'Sensor listing failed: {results.failure}')
+
+        sensors = results.success
+        if len(sensors) == 1 and type(sensors[0]) is dict and type(sensors[0].get('objects')) is list:
+            sensors = sensors[0]['objects']  # Paged envelope
+
+        self.full_polls += 1
+        self.count, self.last_full = count, now
+
+        return self.diff(sensors)
+
+    async def watch(self, polls: Optional[int] = None) -> AsyncIterator[SensorChange]:
+        """Polls every interval seconds, yielding changes as they're found.
+
+        The first poll yields every sensor as added. Polls run on a fixed
+        schedule, so a slow CMC doesn't stretch the interval; a failed poll backs
+        off exponentially, with jitter, up to max_interval.
+
+        Args:
+            polls (Optional[int]): Stop after this many polls (default: never)
+
+        Yields:
+            change (SensorChange)"""
+        delay, done = self.interval, 0
+        while polls is None or done < polls:
+            started = time.monotonic()
+            try:
+                for change in await self.poll():
+                    yield change
+                delay = self.interval
+            except (RuntimeError, aio.ClientError, asyncio.TimeoutError) as e:
+                delay = min(delay * 2, self.max_interval)
+                logger.warning(f'{e}; Retrying in up to {delay:.0f}s...')
+
+            done += 1
+            if polls is None or done < polls:
+                if delay == self.interval:
+                    wait = self.interval - (time.monotonic() - started)  # Fixed rate
+                else:
+                    wait = random.uniform(delay / 2, delay)
+                await asyncio.sleep(max(0.0, wait))
+
+    def stats(self) -> Dict[str, int]:
+        return {'polls': self.polls, 'full_polls': self.full_polls, 'sensors': len(self.snapshot)}
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Index
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>."""
+import datetime as dt
+import logging
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
+from dataclasses import replace
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+
+from bricata_api_client.client import BricataApiClient
+from bricata_api_client.models import Alert, alert_time_key, AlertQuery, AlertsFilter, time_key, to_datetime
+
+logger = logging.getLogger(__name__)
+
+Value = Union[str, int, Iterable[Union[str, int]]]
+
+
+def utc(value: Union[dt.datetime, str]) -> dt.datetime:
+    value = to_datetime(value)
+
+    return value.astimezone(dt.timezone.utc) if value.tzinfo else value.replace(tzinfo=dt.timezone.utc)
+
+
+class AlertIndex:
+    """In-memory inverted index over alerts, for filtering the same time range
+    many ways without going back to the CMC.
+
+    Every alert added gets an integer document id; tags, signature id, src/dst IP
+    and sensor each map to a posting list of those ids (an array of unsigned
+    ints). Posting lists are turned into int bitmaps the first time they're
+    queried, so intersections, unions and counts are single big-int operations;
+    facet counts check each posting against the match instead.
+    The time ranges fetched are tracked, and search only asks the CMC for the
+    parts of a query's range that aren't already indexed.
+
+    json_filter is evaluated by the CMC only; queries using it can't be answered
+    from the index."""
+    FIELDS: Tuple[str, ...] = ('tags', 'signature_id', 'src_ip', 'dst_ip', 'sensor')
+
+    def __init__(self):
+        self.alerts: List[Alert] = []
+        self.docs: Dict[str, int] = {}  # uuid -> document id
+        self.postings = {f: defaultdict(lambda: array('I')) for f in self.FIELDS}
+        self.bitmaps = {}  # (field, value) -> bitmap; built on first use, dropped when its postings grow
+        self.times: List[str] = []  # Document id -> time_key of its timestamp
+        self.windows: List[Tuple[dt.datetime, dt.datetime]] = []  # Ranges fully indexed; sorted, disjoint
+        self.group = None
+        self.__by_time = None  # (time_key, document id), sorted; rebuilt after adds
+
+    def __len__(self) -> int:
+        return len(self.alerts)
+
+    def add(self, record: Union[dict, Alert]) -> int:
+        """
+        Args:
+            record (Union[dict, Alert]): Alert record as returned by /alerts/
+
+        Returns:
+            doc (int): Document id; an alert already indexed keeps its id"""
+        alert = record if isinstance(record, Alert) else Alert.from_dict(record)
+        doc = self.docs.get(alert.uuid)
+        if doc is not None:
+            return doc
+
+        doc = len(self.alerts)
+        self.alerts.append(alert)
+        self.docs[alert.uuid] = doc
+        self.times.append(alert_time_key(alert.timestamp_str))
+        self.__by_time = None
+
+        for f in self.FIELDS:
+            values = getattr(alert, f)
+            for v in (values or ()) if f == 'tags' else (values,):
+                if v is not None:
+                    self.postings[f][v].append(doc)
+                    self.bitmaps.pop((f, v), None)
+
+        return doc
+
+    def extend(self, records: Iterable[Union[dict, Alert]]) -> int:
+        """
+        Returns:
+            count (int): Alerts that weren't already indexed"""
+        before = len(self.alerts)
+        for record in records:
+            self.add(record)
+
+        return len(self.alerts) - before
+
+    async def tee(self, records: AsyncIterator[Union[dict, Alert]]) -> AsyncIterator[Union[dict, Alert]]:
+        """Indexes records, e.g. from BricataApiClient.export_records, as they're passed on.
+
+        Yields:
+            record (Union[dict, Alert]): Unchanged"""
+        async for record in records:
+            self.add(record)
+            yield record
+
+    # Coverage
+    def missing(self, start_time: Union[dt.datetime, str],
+                end_time: Union[dt.datetime, str]) -> List[Tuple[dt.datetime, dt.datetime]]:
+        """
+        Returns:
+            gaps (List[Tuple[datetime.datetime, datetime.datetime]]): Parts of the range not yet fetched"""
+        start, end = utc(start_time), utc(end_time)
+        gaps = []
+        for s, e in self.windows:
+            if e < start:
+                continue
+            if s > end:
+                break
+            if s > start:
+                gaps.append((start, s))
+            start = max(start, e)
+
+        if start < end:
+            gaps.append((start, end))
+
+        return gaps
+
+    def cover(self, start_time: Union[dt.datetime, str], end_time: Union[dt.datetime, str]):
+        """Marks a range as fully indexed."""
+        windows = sorted(self.windows + [(utc(start_time), utc(end_time))])
+        merged = [windows[0]]
+        for s, e in windows[1:]:
+            if s <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], e))
+            else:
+                merged.append((s, e))
+        self.windows = merged
+
+    async def fetch(self, client: BricataApiClient, query: AlertQuery, shards: Optional[int] = None,
+                    failures: Optional[List[dict]] = None) -> int:
+        """Indexes every alert in the parts of query's time range not yet fetched.
+
+        Windows are exported without query's tags, so later filters can be answered
+        locally; a window is only marked fetched if all of its requests succeeded.
+
+        Args:
+            client (BricataApiClient):
+            query (AlertQuery): start_time is required; end_time defaults to now
+            shards (Optional[int]): See BricataApiClient.export_records
+            failures (Optional[List[dict]]): See BricataApiClient.export_records
+
+        Returns:
+            count (int): Alerts added"""
+        if not query.start_time:
+            raise ValueError('fetch requires query.start_time')
+        if self.windows and query.group != self.group:
+            raise ValueError(f'Index holds group {self.group!r}, not {query.group!r}')
+        self.group = query.group
+
+        end = query.end_time or dt.datetime.now(tz=dt.timezone.utc)
+        count = 0
+        for s, e in self.missing(query.start_time, end):
+            logger.debug(f'Indexing alerts from {s} to {e}...')
+
+            errors = []
+            window = replace(query, start_time=s, end_time=e, tags=None, tags_op=None, offset=None)
+            before = len(self.alerts)
+            async for _ in self.tee(client.export_records(window, shards=shards, failures=errors)):
+                pass
+            count += len(self.alerts) - before
+
+            if failures is not None:
+                failures.extend(errors)
+            if not errors:
+                self.cover(s, e)
+
+        return count
+
+    # Queries
+    def __bitmap(self, field: str, value: Union[str, int]) -> int:
+        bits = self.bitmaps.get((field, value))
+        if bits is None:
+            postings = self.postings[field].get(value)
+            if not postings:
+                return 0
+
+            buf = bytearray((len(self.alerts) + 7) >> 3)
+            for doc in postings:
+                buf[doc >> 3] |= 1 << (doc & 7)
+            bits = self.bitmaps[(field, value)] = int.from_bytes(buf, 'little')
+
+        return bits
+
+    def __any(self, field: str, values: Value) -> int:
+        if type(values) in (str, int):
+            values = (values,)
+
+        bits = 0
+        for v in values:
+            bits |= self.__bitmap(field, v)
+
+        return bits
+
+    def __between(self, start_time: Optional[Union[dt.datetime, str]], end_time: Optional[Union[dt.datetime, str]]) -> int:
+        if self.__by_time is None:
+            self.__by_time = sorted(zip(self.times, range(len(self.times))))
+
+        lo = bisect_left(self.__by_time, (time_key(start_time),)) if start_time else 0
+        hi = bisect_right(self.__by_time, (time_key(end_time), len(self.times))) if end_time else len(self.__by_time)
+        if hi - lo == len(self.alerts):
+            return (1 << len(self.alerts)) - 1
+
+        buf = bytearray((len(self.alerts) + 7) >> 3)
+        for _, doc in self.__by_time[lo:hi]:
+            buf[doc >> 3] |= 1 << (doc & 7)
+
+        return int.from_bytes(buf, 'little')
+
+    def match(self, tags: Optional[Union[str, Iterable[str]]] = None, tags_op: Optional[str] = 'or',
+              signature_id: Optional[Value] = None, src_ip: Optional[Value] = None, dst_ip: Optional[Value] = None,
+              sensor: Optional[Value] = None, start_time: Optional[Union[dt.datetime, str]] = None,
+              end_time: Optional[Union[dt.datetime, str]] = None) -> int:
+        """Criteria are ANDed together; several values for one field match any of them.
+
+        Args:
+            tags (Optional[Union[str, Iterable[str]]]): Comma separated, as in AlertQuery
+            tags_op (Optional[str]): and | or
+            signature_id (Optional[Value]):
+            src_ip (Optional[Value]):
+            dst_ip (Optional[Value]):
+            sensor (Optional[Value]):
+            start_time (Optional[Union[datetime.datetime, str]]): Inclusive
+            end_time (Optional[Union[datetime.datetime, str]]): Inclusive
+
+        Returns:
+            bitmap (int): Bit n is set if document n matches"""
+        bits = (1 << len(self.alerts)) - 1
+        if tags:
+            tags = tags.split(',') if type(tags) is str else list(tags)
+            if (tags_op or 'or').lower() == 'and':
+                for t in tags:
+                    bits &= self.__bitmap('tags', t)
+            else:
+                bits &= self.__any('tags', tags)
+
+        for f, values in (('signature_id', signature_id), ('src_ip', src_ip), ('dst_ip', dst_ip), ('sensor', sensor)):
+            if values is not None:
+                bits &= self.__any(f, values)
+
+        if start_time or end_time:
+            bits &= self.__between(start_time, end_time)
+
+        return bits
+
+    @staticmethod
+    def documents(bits: int) -> List[int]:
+        """
+        Returns:
+            docs (List[int]): Ids of the bits set, ascending"""
+        docs = []
+        for i, byte in enumerate(bits.to_bytes((bits.bit_length() + 7) >> 3, 'little')):
+            while byte:
+                low = byte & -byte
+                docs.append((i << 3) + low.bit_length() - 1)
+                byte ^= low
+
+        return docs
+
+    def filter(self, **criteria) -> List[Alert]:
+        """
+        Args:
+            **criteria: See match
+
+        Returns:
+            alerts (List[Alert]): Ordered by timestamp"""
+        docs = self.documents(self.match(**criteria))
+        docs.sort(key=self.times.__getitem__)
+
+        return [self.alerts[d] for d in docs]
+
+    def count(self, **criteria) -> int:
+        """
+        Args:
+            **criteria: See match"""
+        return bin(self.match(**criteria)).count('1')
+
+    def counts(self, field: str, **criteria) -> Counter:
+        """Facet counts, e.g. counts('signature_id', sensor='sensor-01').
+
+        Args:
+            field (str): One of FIELDS
+            **criteria: See match
+
+        Returns:
+            counts (Counter): Value -> matching alerts; values with none are left out"""
+        bits = self.match(**criteria)
+        if bits == (1 << len(self.alerts)) - 1:
+            return Counter({value: len(postings) for value, postings in self.postings[field].items() if postings})
+
+        # Postings are checked against the one match bitmap; a bitmap per value would cost N bits for each of them
+        buf = bits.to_bytes((len(self.alerts) + 7) >> 3, 'little')
+        counts = Counter()
+        for value, postings in self.postings[field].items():
+            n = sum(buf[doc >> 3] >> (doc & 7) & 1 for doc in postings)
+            if n:
+                counts[value] = n
+
+        return counts
+
+    def select(self, query: Union[AlertQuery, AlertsFilter]) -> List[Alert]:
+        """Answers an AlertQuery/AlertsFilter from the index; limit and offset are
+        paging controls and ignored.
+
+        Args:
+            query (Union[AlertQuery, AlertsFilter]):
+
+        Returns:
+            alerts (List[Alert]): Ordered by timestamp"""
+        if getattr(query, 'json_filter', None):
+            raise ValueError('json_filter is evaluated by the CMC; it can\'t be answered from the index')
+
+        return self.filter(tags=query.tags, tags_op=query.tags_op, start_time=query.start_time, end_time=query.end_time)
+
+    async def search(self, client: BricataApiClient, query: AlertQuery, failures: Optional[List[dict]] = None) -> List[Alert]:
+        """fetch, then select.
+
+        Args:
+            client (BricataApiClient):
+            query (AlertQuery):
+            failures (Optional[List[dict]]): See fetch
+
+        Returns:
+            alerts (List[Alert]): Ordered by timestamp"""
+        await self.fetch(client, query, failures=failures)
+
+        return self.select(query)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Limiter
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>."""
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limiter; a drop-in replacement for asyncio.Semaphore.
+
+    Every response is fed to record(). While latency stays within tolerance of
+    the baseline the limit grows by one per limit's worth of responses; a 429,
+    a 5xx or a latency spike multiplies it by backoff, at most once per
+    baseline latency. Latency is the time a slot was held, so time spent
+    queueing for a slot doesn't count as a spike."""
+
+    def __init__(self, initial: Optional[int] = 5, minimum: Optional[int] = 1, maximum: Optional[int] = 64,
+                 backoff: Optional[float] = 0.5, tolerance: Optional[float] = 2.0,
+                 on_change: Optional[Callable[[int], None]] = None, on_wait: Optional[Callable[[float], None]] = None,
+                 parent: Optional[asyncio.Semaphore] = None):
+        """Initializes Class
+
+        Args:
+            initial (Optional[int]): Starting concurrency
+            minimum (Optional[int]):
+            maximum (Optional[int]):
+            backoff (Optional[float]): Multiplier applied on congestion
+            tolerance (Optional[float]): Latency over baseline * tolerance is a spike
+            on_change (Optional[Callable[[int], None]]): Called with the new limit
+                whenever it changes
+            on_wait (Optional[Callable[[float], None]]): Called with the seconds
+                every acquisition waited for a slot
+            parent (Optional[asyncio.Semaphore]): Shared budget; a slot is only
+                held once one has also been taken from it, e.g. BricataApiPool's"""
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.on_change = on_change
+        self.on_wait = on_wait
+        self.parent = parent
+        self.current = float(max(minimum, min(initial, maximum)))
+        self.in_flight = 0
+        self.baseline = None
+        self.last_decrease = 0.0
+        self.condition = None
+        self.held = ContextVar(f'held_{id(self)}', default=None)  # (acquired, released) per task
+
+    @property
+    def limit(self) -> int:
+        return int(self.current)
+
+    def __condition(self) -> asyncio.Condition:
+        if not self.condition:  # Created lazily so it binds to the running loop
+            self.condition = asyncio.Condition()
+
+        return self.condition
+
+    async def __aenter__(self):
+        ts = time.monotonic()
+        condition = self.__condition()
+        async with condition:
+            await condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+        if self.parent:
+            try:
+                await self.parent.acquire()
+            except BaseException:  # Cancelled while waiting on the budget; give our slot back
+                await self.__release()
+                raise
+
+        acquired = time.monotonic()
+        self.held.set((acquired, None))
+        if self.on_wait:
+            self.on_wait(acquired - ts)
+
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        acquired, _ = self.held.get() or (time.monotonic(), None)
+        self.held.set((acquired, time.monotonic()))
+
+        if self.parent:
+            self.parent.release()
+        await self.__release()
+
+    async def __release(self):
+        condition = self.__condition()
+        async with condition:
+            self.in_flight -= 1
+            condition.notify_all()
+
+    def __set(self, value: float):
+        before = self.limit
+        self.current = max(self.minimum, min(value, self.maximum))
+
+        if self.limit != before:
+            logger.debug(f'Concurrency limit: {before} -> {self.limit}')
+            if self.on_change:
+                self.on_change(self.limit)
+
+    def record(self, status: Optional[int] = None, error: Optional[bool] = False, latency: Optional[float] = None):
+        """
+        Args:
+            status (Optional[int]): HTTP status, if known
+            error (Optional[bool]): The request failed without a response
+            latency (Optional[float]): Seconds the request took; defaults to how
+                long the current task last held a slot"""
+        if latency is None:
+            acquired, released = self.held.get() or (None, None)
+            if acquired is None:
+                return
+            latency = (released or time.monotonic()) - acquired
+
+        congested = error or (status is not None and (status == 429 or status >= 500))
+        if not congested and self.baseline is not None:
+            congested = latency > self.baseline * self.tolerance
+
+        if congested:
+            now = time.monotonic()
+            if now - self.last_decrease >= (self.baseline or latency):
+                self.last_decrease = now
+                self.__set(self.current * self.backoff)
+            return
+
+        self.baseline = latency if self.baseline is None else self.baseline * 0.9 + latency * 0.1
+        self.__set(self.current + 1 / self.current)
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Metrics
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>."""
+import logging
+import re
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from typing import Callable, List, Optional, Tuple
+
+import aiohttp as aio
+
+logger = logging.getLogger(__name__)
+
+BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+ID = re.compile(r'/(?:[0-9a-fA-F-]{16,}|\d+)(?=/|$)')  # uuids and numeric ids in a path
+
+
+def end_point_label(path: str) -> str:
+    """Collapses ids so /alert/{uuid} is one label rather than one per alert.
+
+    Args:
+        path (str):
+
+    Returns:
+        label (str)"""
+    return ID.sub('/{id}', path)
+
+
+class Histogram:
+    """Cumulative histogram in OpenMetrics form."""
+
+    def __init__(self, buckets: Optional[Tuple[float, ...]] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q quantile."""
+        target, seen = q * self.count, 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target and seen:
+                return bound
+
+        return 0.0
+
+    def samples(self, name: str, labels: str) -> List[str]:
+        lines, cumulative = [], 0
+        sep, braced = (',', f'{{{labels}}}') if labels else ('', '')
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f'{name}_bucket{{{labels}{sep}le="{le}"}} {cumulative}')
+        lines.append(f'{name}_sum{braced} {self.sum}')
+        lines.append(f'{name}_count{braced} {self.count}')
+
+        return lines
+
+
+class Metrics:
+    """Per end point request metrics collected through an aiohttp TraceConfig.
+
+    Records latency histograms, status codes, errors, bytes in/out, DNS and
+    connection set-up time (TCP + TLS), retries and time spent waiting for a
+    concurrency slot. Listeners are called with one dict per finished request;
+    openmetrics() renders everything in the OpenMetrics text format and serve()
+    exposes it over HTTP."""
+
+    def __init__(self, prefix: Optional[str] = 'bricata'):
+        """Initializes Class
+
+        Args:
+            prefix (Optional[str]): Metric name prefix"""
+        self.prefix = prefix
+        self.listeners = []
+        self.latency = defaultdict(Histogram)  # (method, end_point) -> Histogram
+        self.requests = Counter()  # (method, end_point, status)
+        self.errors = Counter()  # (method, end_point, exception)
+        self.bytes_in = Counter()  # end_point
+        self.bytes_out = Counter()  # end_point
+        self.retries = Counter()  # end_point
+        self.dns = Histogram()
+        self.connect = Histogram()
+        self.wait = Histogram()
+
+    def add_listener(self, listener: Callable[[dict], None]):
+        """
+        Args:
+            listener (Callable[[dict], None]): Called with method, end_point,
+                status, seconds and error for every finished request"""
+        self.listeners.append(listener)
+
+    def __emit(self, event: dict):
+        for listener in self.listeners:
+            try:
+                listener(event)
+            except Exception as e:  # A broken listener mustn't fail the request
+                logger.exception(e)
+
+    def observe_wait(self, seconds: float):
+        self.wait.observe(seconds)
+
+    def observe_retry(self, end_point: str):
+        self.retries[end_point_label(end_point)] += 1
+
+    def trace_config(self) -> aio.TraceConfig:
+        async def on_request_start(session, ctx, params):
+            ctx.start = time.perf_counter()
+            ctx.method = params.method.lower()
+            ctx.end_point = end_point_label(params.url.path)
+
+        async def on_request_chunk_sent(session, ctx, params):
+            self.bytes_out[ctx.end_point] += len(params.chunk)
+
+        async def on_response_chunk_received(session, ctx, params):
+            self.bytes_in[ctx.end_point] += len(params.chunk)
+
+        async def on_dns_resolvehost_start(session, ctx, params):
+            ctx.dns_start = time.perf_counter()
+
+        async def on_dns_resolvehost_end(session, ctx, params):
+            self.dns.observe(time.perf_counter() - ctx.dns_start)
+
+        async def on_connection_create_start(session, ctx, params):
+            ctx.connect_start = time.perf_counter()
+
+        async def on_connection_create_end(session, ctx, params):
+            self.connect.observe(time.perf_counter() - ctx.connect_start)
+
+        async def on_request_end(session, ctx, params):
+            seconds = time.perf_counter() - ctx.start
+            self.latency[(ctx.method, ctx.end_point)].observe(seconds)
+            self.requests[(ctx.method, ctx.end_point, params.response.status)] += 1
+            self.__emit({'method': ctx.method, 'end_point': ctx.end_point, 'status': params.response.status,
+                         'seconds': seconds, 'error': None})
+
+        async def on_request_exception(session, ctx, params):
+            seconds = time.perf_counter() - ctx.start
+            error = type(params.exception).__name__
+            self.errors[(ctx.method, ctx.end_point, error)] += 1
+            self.__emit({'method': ctx.method, 'end_point': ctx.end_point, 'status': None, 'seconds': seconds,
+                         'error': error})
+
+        trace_config = aio.TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_chunk_sent.append(on_request_chunk_sent)
+        trace_config.on_response_chunk_received.append(on_response_chunk_received)
+        trace_config.on_dns_resolvehost_start.append(on_dns_resolvehost_start)
+        trace_config.on_dns_resolvehost_end.append(on_dns_resolvehost_end)
+        trace_config.on_connection_create_start.append(on_connection_create_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_request_end.append(on_request_end)
+        trace_config.on_request_exception.append(on_request_exception)
+
+        return trace_config
+
+    def openmetrics(self) -> str:
+        """
+        Returns:
+            text (str): OpenMetrics text exposition"""
+        p = self.prefix
+        lines = [f'# TYPE {p}_request_duration_seconds histogram', f'# UNIT {p}_request_duration_seconds seconds']
+        for (method, end_point), histogram in sorted(self.latency.items()):
+            lines += histogram.samples(f'{p}_request_duration_seconds', f'method="{method}",end_point="{end_point}"')
+
+        lines.append(f'# TYPE {p}_requests counter')
+        for (method, end_point, status), count in sorted(self.requests.items()):
+            lines.append(f'{p}_requests_total{{method="{method}",end_point="{end_point}",status="{status}"}} {count}')
+
+        lines.append(f'# TYPE {p}_request_errors counter')
+        for (method, end_point, error), count in sorted(self.errors.items()):
+            lines.append(f'{p}_request_errors_total{{method="{method}",end_point="{end_point}",error="{error}"}} {count}')
+
+        for name, counter in (('received_bytes', self.bytes_in), ('sent_bytes', self.bytes_out),
+                              ('retries', self.retries)):
+            lines.append(f'# TYPE {p}_{name} counter')
+            for end_point, count in sorted(counter.items()):
+                lines.append(f'{p}_{name}_total{{end_point="{end_point}"}} {count}')
+
+        for name, histogram in (('dns_seconds', self.dns), ('connect_seconds', self.connect),
+                                ('concurrency_wait_seconds', self.wait)):
+            lines += [f'# TYPE {p}_{name} histogram', f'# UNIT {p}_{name} seconds']
+            lines += histogram.samples(f'{p}_{name}', '')
+
+        lines.append('# EOF')
+
+        return '\n'.join(lines) + '\n'
+
+    async def serve(self, host: Optional[str] = '127.0.0.1', port: Optional[int] = 9464) -> 'aio.web.AppRunner':
+        """Serves openmetrics() at http://host:port/metrics.
+
+        Returns:
+            runner (aiohttp.web.AppRunner): Call runner.cleanup() to stop"""
+        from aiohttp import web
+
+        async def handler(request):
+            return web.Response(text=self.openmetrics(),
+                                content_type='application/openmetrics-text',
+                                charset='utf-8',
+                                headers={'Cache-Control': 'no-cache'})
+
+        app = web.Application()
+        app.router.add_get('/metrics', handler)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+
+        return runner
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Mirror
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>."""
+import asyncio
+import hashlib
+import logging
+import sqlite3
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Tuple
+
+import rapidjson
+
+from bricata_api_client.client import BricataApiClient
+from bricata_api_client.models import PolicyRuleQuery
+
+logger = logging.getLogger(__name__)
+
+SCHEMA: str = '''
+CREATE TABLE IF NOT EXISTS rules (policy TEXT NOT NULL, type TEXT NOT NULL, id TEXT NOT NULL, version TEXT,
+                                  hash BLOB NOT NULL, data TEXT, history TEXT, PRIMARY KEY (policy, type, id));
+'''
+
+
+@dataclass
+class RuleDelta:
+    """
+    Attributes:
+        policy (str):
+        type (str):
+        added (List[str]): Rule ids new to the mirror
+        changed (List[str]): Rule ids whose version or hash changed
+        removed (List[str]): Rule ids no longer in the policy
+        unchanged (int): Rules skipped
+        failed (List[str]): Rule ids whose details couldn't be fetched; retried next run
+    """
+    policy: str
+    type: str
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    failed: List[str] = field(default_factory=list)
+
+
+class RuleMirror:
+    """Incrementally mirrors Suricata policy rules into a local SQLite file.
+
+    Each run pages through a policy's rule listing concurrently and compares every
+    rule's version and a 64 bit hash of its listing entry with the mirror; only
+    rules that are new or differ have their details (and, optionally, version
+    history) fetched. The delta is committed in one transaction per policy, and
+    rules whose details failed are left stale so the next run tries them again."""
+    PAGE_SIZE: int = 500  # Rules per listing page.
+    VERSION_KEYS: Tuple[str, ...] = ('version', 'rev')  # First one present is the rule's version.
+
+    def __init__(self, client: BricataApiClient, path: str, history: Optional[bool] = False):
+        """Initializes Class
+
+        Args:
+            client (BricataApiClient):
+            path (str): Full path to the SQLite file; created if missing.
+            history (Optional[bool]): Also mirror /rules/rule/suricata/{id}/history/
+                for rules that changed"""
+        self.client = client
+        self.history = history
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.db.close()
+
+    @staticmethod
+    def digest(rule: dict) -> bytes:
+        return hashlib.blake2b(rapidjson.dumps(rule, sort_keys=True).encode(), digest_size=8).digest()
+
+    def version(self, rule: dict) -> Optional[str]:
+        for k in self.VERSION_KEYS:
+            if rule.get(k) is not None:
+                return str(rule[k])
+
+        return None
+
+    def index(self, policy: str, type: str) -> dict:
+        """
+        Returns:
+            index (dict): Rule id -> (version, hash) as last mirrored"""
+        rows = self.db.execute('SELECT id, version, hash FROM rules WHERE policy = ? AND type = ?', (policy, type))
+
+        return {r[0]: (r[1], r[2]) for r in rows}
+
+    def rule(self, policy: str, type: str, rule_id: str) -> Optional[dict]:
+        row = self.db.execute('SELECT data FROM rules WHERE policy = ? AND type = ? AND id = ?',
+                              (policy, type, rule_id)).fetchone()
+
+        return rapidjson.loads(row[0]) if row and row[0] else None
+
+    async def __details(self, policy: str, type: str, rule_id: str) -> Tuple[Optional[dict], Optional[list]]:
+        query = PolicyRuleQuery(policy=policy, type=type, id=rule_id)
+        requests = [self.client.get_records(query)] + ([self.client.get_rule_history(rule_id)] if self.history else [])
+        results = await asyncio.gather(*requests)
+        if any(r.failure for r in results):
+            return None, None
+
+        details = results[0].success[0] if results[0].success else None
+        history = results[1].success if self.history else None
+
+        return details, history
+
+    async def run(self, policy: str, type: str) -> RuleDelta:
+        """Brings one policy's rules up to date.
+
+        Args:
+            policy (str): Policy name
+            type (str): Policy type
+
+        Returns:
+            delta (RuleDelta)"""
+        delta = RuleDelta(policy=policy, type=type)
+        index = self.index(policy, type)
+        seen, stale = set(), []
+
+        logger.debug(f'Mirroring rules of policy: {policy}/{type}...')
+
+        failures = []
+        async for rule in self.client.iter_records(PolicyRuleQuery(policy=policy, type=type, limit=self.PAGE_SIZE),
+                                                   failures=failures):
+            rule_id = str(rule.get('id'))
+            seen.add(rule_id)
+            version, digest = self.version(rule), self.digest(rule)
+            known = index.get(rule_id)
+
+            if known == (version, digest):
+                delta.unchanged += 1
+                continue
+
+            (delta.changed if known else delta.added).append(rule_id)
+            stale.append((rule_id, version, digest))
+
+        if failures:  # A partial listing would look like removals; keep the mirror as it is
+            raise RuntimeError(f'Listing rules of {policy}/{type} failed: {failures}')
+
+        rows, pending = [], iter(stale)
+
+        async def worker():
+            for rule_id, version, digest in pending:
+                details, history = await self.__details(policy, type, rule_id)
+                if details is None:
+                    delta.failed.append(rule_id)
+                    continue
+                rows.append((policy, type, rule_id, version, digest, rapidjson.dumps(details),
+                             rapidjson.dumps(history) if history is not None else None))
+
+        await asyncio.gather(*[worker() for _ in range(min(len(stale), self.client.limiter.maximum))])
+
+        delta.removed = sorted(index.keys() - seen)
+        with self.db:
+            self.db.executemany('INSERT OR REPLACE INTO rules (policy, type, id, version, hash, data, history) '
+                                'VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+            self.db.executemany('DELETE FROM rules WHERE policy = ? AND type = ? AND id = ?',
+                                [(policy, type, i) for i in delta.removed])
+
+        logger.debug(f'-> Complete; {len(delta.added)} added, {len(delta.changed)} changed, {len(delta.removed)} removed, '
+                     f'{delta.unchanged} unchanged, {len(delta.failed)} failed.')
+
+        return delta
+
+    async def run_all(self, policies: Iterable[Tuple[str, str]]) -> List[RuleDelta]:
+        """Mirrors several (policy, type) pairs concurrently; see run."""
+        return list(await asyncio.gather(*[self.run(policy, type) for policy, type in policies]))
@@ -18,6 +18,8 @@ copies or substantial portions of the Software.
 You should have received a copy of the SSPL along with this program.
 If not, see <https://www.mongodb.com/licensing/server-side-public-license>."""
 
-from bricata_api_client.models.alerts import AlertsFilter
+from bricata_api_client.models.alerts import Alert, alert_time_key, alert_timestamp, AlertsFilter, time_key
+from bricata_api_client.models.rules import SuricataRule
 from bricata_api_client.models.tags import TagRequest
-from bricata_api_client.models.query import AlertQuery
+from bricata_api_client.models.query import AlertQuery, MetadataGroupsQuery, MetadataQuery, MetadataTimelineQuery, \
+    PolicyRuleQuery, Query, to_datetime
@@ -20,13 +20,69 @@ If not, see <https://www.mongodb.com/licensing/server-side-public-license>."""
 
 import datetime as dt
 import logging
+import re
 from dataclasses import dataclass
-from typing import Union
+from sys import intern
+from typing import Optional, Tuple, Union
 
-from delorean import parse
+import rapidjson
+
+from bricata_api_client.models.query import RFC3339, to_datetime
 
 logger = logging.getLogger(__name__)
 
+CANONICAL = re.compile(r'^\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d\.\d{6}(?:Z|[+-]00:?00)$')  # Already a time_key, plus a UTC suffix
+
+
+def time_key(value: Union[dt.datetime, str]) -> str:
+    """
+    Args:
+        value (Union[datetime.datetime, str]): Naive datetimes are taken as UTC
+
+    Returns:
+        key (str): UTC, to the microsecond; keys compare in time order as strings"""
+    value = to_datetime(value)
+    if value.tzinfo:
+        value = value.astimezone(dt.timezone.utc)
+
+    return value.strftime('%Y-%m-%dT%H:%M:%S.%f')
+
+
+def alert_time_key(alert: Union[dict, 'Alert', str, None]) -> str:
+    """Sort/compare key for alerts whatever the precision or offset of their
+    timestamps; UTC microsecond timestamps, the usual case, are sliced rather
+    than parsed.
+
+    Args:
+        alert (Union[dict, Alert, str, None]): An alert, or its timestamp
+
+    Returns:
+        key (str): time_key of the timestamp; empty if there's none, or the
+            timestamp itself if it can't be parsed"""
+    timestamp = alert if alert is None or type(alert) is str else alert_timestamp(alert)
+    if not timestamp:
+        return ''
+    if CANONICAL.match(timestamp):
+        return timestamp[:26]
+
+    try:
+        return time_key(timestamp)
+    except (ValueError, OverflowError):
+        return timestamp
+
+
+def alert_timestamp(alert: Union[dict, 'Alert']) -> str:
+    """
+    Args:
+        alert (Union[dict, Alert]): Alert record as returned by /alerts/
+
+    Returns:
+        timestamp (str): RFC 3339; empty if the alert has none"""
+    if isinstance(alert, Alert):
+        return alert.timestamp_str or ''  # Falls back to data.timestamp as below
+
+    return alert.get('timestamp') or alert.get('data', {}).get('timestamp') or ''
+
 
 @dataclass
 class AlertsFilter:
@@ -57,19 +113,139 @@ class AlertsFilter:
 
     def __post_init__(self):
         if self.start_time:
-            if type(self.start_time) is str:
-                self.start_time = parse(self.start_time).datetime
-
-            if type(self.start_time) is dt.datetime:
-                self.start_time = self.start_time.strftime(fmt='%Y-%m-%dT%H:%M:%S.%f%z')
+            self.start_time = to_datetime(self.start_time).strftime(RFC3339)
 
         if self.end_time:
-            if type(self.end_time) is str:
-                self.end_time = parse(self.end_time).datetime
-
-            if type(self.end_time) is dt.datetime:
-                self.end_time = self.end_time.strftime(fmt='%Y-%m-%dT%H:%M:%S.%f%z')
+            self.end_time = to_datetime(self.end_time).strftime(RFC3339)
 
     @property
     def dict(self):
         return {k: v for k, v in self.__dict__.items() if v is not None}
+
+
+class Alert:
+    """Compact, read-only view of an alert record.
+
+    Frequently used fields are lifted out of the nested record into slots, with
+    signatures, tags and sensor names interned so a million alerts share one copy of
+    each; the timestamp is only parsed when first accessed. Everything else is kept
+    as a single JSON encoded bytes object rather than a tree of dicts, and decoded
+    again by rest/dict().
+
+    Attributes:
+        uuid (str):
+        signature (Optional[str]):
+        signature_id (Optional[int]):
+        sensor (Optional[str]):
+        tags (Optional[Tuple[str]]): None if the record has no tag field
+        src_ip (Optional[str]):
+        dst_ip (Optional[str]):
+        timestamp (Optional[datetime.datetime]): Parsed on first access
+        rest (dict): Remainder of the record; decoded on every access
+    """
+    __slots__ = ('uuid', 'signature', 'signature_id', 'sensor', 'tags', 'src_ip', 'dst_ip', '_rest', '_timestamp', '_parsed',
+                 '_data_timestamp')
+
+    # Slot -> path of the field in the record
+    FIELDS = {'signature':    ('data', 'alert', 'signature'),
+              'signature_id': ('data', 'alert', 'signature_id'),
+              'sensor':       ('data', 'host'),
+              'tags':         ('data', 'bricata', 'tag'),
+              'src_ip':       ('data', 'src_ip'),
+              'dst_ip':       ('data', 'dest_ip'),
+              '_timestamp':   ('timestamp',)}
+
+    def __init__(self, uuid: str, signature: Optional[str] = None, signature_id: Optional[int] = None,
+                 sensor: Optional[str] = None, tags: Optional[Tuple[str, ...]] = None, src_ip: Optional[str] = None,
+                 dst_ip: Optional[str] = None, timestamp: Optional[str] = None, rest: Optional[Union[dict, bytes]] = None):
+        self.uuid = uuid
+        self.signature = intern(signature) if signature else signature
+        self.signature_id = signature_id
+        self.sensor = intern(sensor) if sensor else sensor
+        self.tags = tuple(intern(t) for t in tags) if tags is not None else None
+        self.src_ip = src_ip
+        self.dst_ip = dst_ip
+        self._timestamp = timestamp
+        self._data_timestamp = None  # data.timestamp, when there's no top-level timestamp; left in rest
+        self._parsed = None
+        self._rest = rest if type(rest) is bytes else rapidjson.dumps(rest or {}).encode()
+
+    @classmethod
+    def from_dict(cls, alert: dict) -> 'Alert':
+        """
+        Args:
+            alert (dict): Alert record as returned by /alerts/; not modified
+
+        Returns:
+            alert (Alert)"""
+        rest = dict(alert)
+        values = {}
+        for slot, path in cls.FIELDS.items():
+            parent = rest
+            for key in path[:-1]:  # Copy each dict on the path before popping from it
+                child = parent.get(key)
+                if type(child) is not dict:
+                    break
+                parent[key] = parent = dict(child)
+            else:
+                if parent.get(path[-1]) is not None:  # Explicit nulls stay in rest, so dict() keeps them
+                    values[slot] = parent.pop(path[-1])
+
+        tags = values.get('tags')
+        if type(tags) is str:
+            tags = (tags,)
+
+        instance = cls(uuid=rest.pop('uuid') if rest.get('uuid') is not None else None,
+                       signature=values.get('signature'),
+                       signature_id=values.get('signature_id'),
+                       sensor=values.get('sensor'),
+                       tags=tags,
+                       src_ip=values.get('src_ip'),
+                       dst_ip=values.get('dst_ip'),
+                       timestamp=values.get('_timestamp'),
+                       rest=rest)
+        if instance._timestamp is None and type(rest.get('data')) is dict:
+            instance._data_timestamp = rest['data'].get('timestamp')
+
+        return instance
+
+    @property
+    def rest(self) -> dict:
+        return rapidjson.loads(self._rest)
+
+    def dict(self) -> dict:
+        """
+        Returns:
+            alert (dict): The original record"""
+        alert = self.rest
+        if self.uuid is not None:
+            alert['uuid'] = self.uuid
+
+        for slot, path in self.FIELDS.items():
+            value = getattr(self, slot)
+            if value is None:
+                continue
+
+            parent = alert
+            for key in path[:-1]:
+                parent = parent.setdefault(key, {})
+            parent[path[-1]] = list(value) if slot == 'tags' else value
+
+        return alert
+
+    @property
+    def timestamp(self) -> Optional[dt.datetime]:
+        if self._parsed is None and self.timestamp_str:
+            self._parsed = to_datetime(self.timestamp_str)
+
+        return self._parsed
+
+    @property
+    def timestamp_str(self) -> Optional[str]:
+        return self._timestamp or self._data_timestamp
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Alert) and self.dict() == other.dict()
+
+    def __repr__(self) -> str:
+        return f'Alert(uuid={self.uuid!r}, signature={self.signature!r}, timestamp={self._timestamp!r})'
@@ -21,7 +21,7 @@ If not, see <https://www.mongodb.com/licensing/server-side-public-license>."""
 import datetime as dt
 import logging
 from dataclasses import dataclass
-from typing import List, Optional, Union
+from typing import ClassVar, List, Optional, Tuple, Union
 
 from copy import deepcopy
 from delorean import Delorean, parse
@@ -31,6 +31,24 @@ from base_api_client.models import Record, sort_dict
 
 logger = logging.getLogger(__name__)
 
+RFC3339: str = '%Y-%m-%dT%H:%M:%S.%f%z'
+
+
+def to_datetime(value: Union[Delorean, dt.datetime, str]) -> dt.datetime:
+    """
+    Args:
+        value (Union[Delorean, datetime.datetime, str]): str is parsed with delorean
+
+    Returns:
+        datetime (datetime.datetime)"""
+    if isinstance(value, Delorean):
+        return value.datetime
+
+    if type(value) is str:
+        return parse(value).datetime
+
+    return value
+
 
 @dataclass
 class Query(Record):
@@ -48,13 +66,14 @@ class Query(Record):
     limit: Optional[int] = None
     offset: Optional[int] = None
 
+    PATH_PARAMS: ClassVar[Tuple[str, ...]] = ('id',)  # Fields that are part of the end point, not the query string
 
-@dataclass
-class AlertQuery(Query):
-    tags: Optional[str] = None
-    tags_op: Optional[str] = None
-    # Extras
-    id: Optional[str] = None
+    def __post_init__(self):
+        if self.start_time:
+            self.start_time = to_datetime(self.start_time).strftime(RFC3339)
+
+        if self.end_time:
+            self.end_time = to_datetime(self.end_time).strftime(RFC3339)
 
     def dict(self, cleanup: Optional[bool] = True, dct: Optional[dict] = None, sort_order: Optional[str] = 'asc') -> Union[dict, None]:
         """
@@ -65,16 +84,14 @@ class AlertQuery(Query):
 
         Returns:
             dict (dict):"""
-        if self.id:
+        if getattr(self, 'id', None):  # Single record; the id is part of the end point
             return None
 
         if not dct:
             dct = deepcopy(self.__dict__)
 
-        try:
-            del dct['id']
-        except KeyError:
-            pass
+        for k in self.PATH_PARAMS:
+            dct.pop(k, None)
 
         if cleanup:
             dct = {k: v for k, v in dct.items() if v is not None}
@@ -84,6 +101,14 @@ class AlertQuery(Query):
 
         return dct
 
+
+@dataclass
+class AlertQuery(Query):
+    tags: Optional[str] = None
+    tags_op: Optional[str] = None
+    # Extras
+    id: Optional[str] = None
+
     @property
     def end_point(self):
         if self.id:
@@ -97,3 +122,70 @@ class AlertQuery(Query):
             return None
 
         return 'objects'
+
+
+@dataclass
+class MetadataQuery(Query):
+    """Connection (flow) metadata; /metadata/activity/, or a single connection's
+    details from /metadata/connections/{id}/ when id is set."""
+    tags: Optional[str] = None
+    tags_op: Optional[str] = None
+    # Extras
+    id: Optional[str] = None
+
+    @property
+    def end_point(self):
+        if self.id:
+            return f'/metadata/connections/{self.id}/'
+
+        return '/metadata/activity/'
+
+    @property
+    def data_key(self):
+        if self.id:
+            return None
+
+        return 'objects'
+
+
+@dataclass
+class MetadataGroupsQuery(MetadataQuery):
+    """Group aggregation; set group to the field to aggregate on."""
+
+    @property
+    def end_point(self):
+        return '/metadata/groups/'
+
+
+@dataclass
+class MetadataTimelineQuery(MetadataQuery):
+    """Activity timeline."""
+
+    @property
+    def end_point(self):
+        return '/metadata/timeline/'
+
+
+@dataclass
+class PolicyRuleQuery(Query):
+    """Rules of a Suricata policy; a single rule's details when id is set."""
+    policy: Optional[str] = None
+    type: Optional[str] = None
+    # Extras
+    id: Optional[str] = None
+
+    PATH_PARAMS: ClassVar[Tuple[str, ...]] = ('policy', 'type', 'id')
+
+    @property
+    def end_point(self):
+        if self.id:
+            return f'/rules/policy/suricata/{self.policy}/{self.type}/rule/{self.id}/'
+
+        return f'/rules/policy/suricata/{self.policy}/{self.type}/rule/'
+
+    @property
+    def data_key(self):
+        if self.id:
+            return None
+
+        return 'objects'
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Models.Rules
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>."""
+
+import logging
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+SID = re.compile(r'\bsid\s*:\s*(\d+)\s*;')
+
+
+@dataclass
+class SuricataRule:
+    """
+    Attributes:
+        rule (str): The rule text, e.g. alert tcp any any -> any any (msg:"..."; sid:1000001; rev:1;)
+        id (Optional[str]): CMC rule id; set to update an existing rule
+        group (Optional[str]): Rule group
+        description (Optional[str]):
+    """
+    rule: str
+    id: Optional[str] = None
+    group: Optional[str] = None
+    description: Optional[str] = None
+
+    @property
+    def sid(self) -> Optional[int]:
+        m = SID.search(self.rule)
+
+        return int(m.group(1)) if m else None
+
+    @property
+    def dict(self):
+        return {k: v for k, v in self.__dict__.items() if v is not None and k != 'id'}
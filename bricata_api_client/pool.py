@@ -0,0 +1,232 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Pool
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>."""
+import asyncio
+import heapq
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Union
+
+from base_api_client import Results
+
+from bricata_api_client.client import BricataApiClient
+from bricata_api_client.models import alert_time_key, AlertQuery, AlertsFilter
+
+logger = logging.getLogger(__name__)
+
+
+class BricataApiPool:
+    """One authenticated BricataApiClient per CMC, queried concurrently.
+
+    Every client keeps its own pooled session and adaptive limiter; all of them
+    also draw from one shared budget, so fanning out to many appliances never has
+    more than budget requests in flight. Records are tagged with the name of the
+    CMC they came from under SOURCE. Appliances that fail to log in are left out
+    and listed in unavailable rather than failing the whole pool."""
+    SOURCE: str = 'cmc'  # Key added to every record naming the CMC it came from.
+    BUDGET: int = 32  # Default number of requests in flight across all CMCs.
+    QUEUE_SIZE: int = 1000  # Records buffered by iter_records before producers wait.
+
+    def __init__(self, cfgs: Union[Dict[str, Union[str, dict]], List[Union[str, dict]]], budget: Optional[int] = None,
+                 **kwargs):
+        """Initializes Class
+
+        Args:
+            cfgs (Union[Dict[str, Union[str, dict]], List[Union[str, dict]]]):
+                Name to cfg, or a list of cfgs named by their URI.Base; see
+                BricataApiClient
+            budget (Optional[int]): Requests in flight across all CMCs (default: BUDGET)
+            **kwargs: Passed to every BricataApiClient, e.g. token_cache, metrics"""
+        if type(cfgs) is not dict:
+            clients = [BricataApiClient(cfg=cfg, **kwargs) for cfg in cfgs]
+            self.clients = {bac.cfg['URI']['Base']: bac for bac in clients}
+        else:
+            self.clients = {name: BricataApiClient(cfg=cfg, **kwargs) for name, cfg in cfgs.items()}
+
+        self.budget = budget or self.BUDGET
+        self.unavailable = {}  # name -> exception
+
+    async def __aenter__(self):
+        shared = asyncio.Semaphore(self.budget)  # Created here so it binds to the running loop
+        for bac in self.clients.values():
+            bac.limiter.parent = shared
+
+        entered = await asyncio.gather(*[self.__enter(name, bac) for name, bac in self.clients.items()])
+        for name, error in zip(list(self.clients), entered):
+            if error:
+                logger.error(f'{name} unavailable: {error!r}')
+                self.unavailable[name] = error
+                del self.clients[name]
+
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await asyncio.gather(*[bac.__aexit__(exc_type, exc_val, exc_tb) for bac in self.clients.values()],
+                             return_exceptions=True)
+
+    @staticmethod
+    async def __enter(name: str, bac: BricataApiClient) -> Optional[Exception]:
+        try:
+            await bac.__aenter__()
+            if not (bac.token_cache and bac.token_cache.get(bac.token_key)):  # A cached token is applied on first use
+                await bac.login()
+        except Exception as e:
+            await bac.session.close()
+            return e
+
+        return None
+
+    def __tag(self, name: str, record: dict) -> dict:
+        return {**record, self.SOURCE: name}  # A copy; the client may have it cached
+
+    def __failures(self, name: str, failures: list) -> List[dict]:
+        return [self.__tag(name, f) if type(f) is dict else {self.SOURCE: name, 'error': f} for f in failures]
+
+    async def gather(self, fn: Callable[[BricataApiClient], Awaitable[Any]]) -> Dict[str, Any]:
+        """Calls fn with every client concurrently.
+
+        Args:
+            fn (Callable[[BricataApiClient], Awaitable[Any]]): e.g. lambda bac: bac.get_tags()
+
+        Returns:
+            results (Dict[str, Any]): Name to fn's result, or the exception it raised"""
+        names = list(self.clients)
+        results = await asyncio.gather(*[fn(self.clients[name]) for name in names], return_exceptions=True)
+
+        return dict(zip(names, results))
+
+    async def merge(self, fn: Callable[[BricataApiClient], Awaitable[Results]]) -> Results:
+        """Calls fn with every client concurrently and merges the Results.
+
+        Args:
+            fn (Callable[[BricataApiClient], Awaitable[Results]]): e.g. lambda bac: bac.get_alerts()
+
+        Returns:
+            results (Results): Success and failure records tagged with SOURCE"""
+        merged = Results(data=[])
+        merged.success, merged.failure = [], []
+
+        for name, results in (await self.gather(fn)).items():
+            if isinstance(results, Exception):
+                logger.error(f'{name}: {results!r}')
+                merged.failure += self.__failures(name, [repr(results)])
+                continue
+
+            merged.success += [self.__tag(name, r) for r in results.success]
+            merged.failure += self.__failures(name, results.failure)
+
+        return merged
+
+    async def get_records(self, query: Union[AlertQuery]) -> Results:
+        return await self.merge(lambda bac: bac.get_records(query))
+
+    async def get_alerts(self, filters: Optional[AlertsFilter] = None) -> Results:
+        return await self.merge(lambda bac: bac.get_alerts(filters))
+
+    async def iter_records(self, query: Union[AlertQuery], failures: Optional[List[dict]] = None) -> AsyncIterator[dict]:
+        """Iterates every CMC's records concurrently, yielding them as they arrive.
+
+        Each CMC is paged with iter_records; a bounded queue makes fast CMCs wait
+        for the consumer rather than buffering without limit.
+
+        Args:
+            query (Union[AlertQuery]): See BricataApiClient.iter_records
+            failures (Optional[List[dict]]): If provided, failed requests are
+                appended to it tagged with SOURCE; otherwise they are only logged.
+
+        Yields:
+            record (dict): Tagged with SOURCE; unordered across CMCs"""
+        queue = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+        done = object()
+
+        async def produce(name: str, bac: BricataApiClient):
+            errors = []
+            try:
+                async for record in bac.iter_records(query, failures=errors):
+                    await queue.put(self.__tag(name, record))
+            except Exception as e:
+                logger.error(f'{name}: {e!r}')
+                errors.append(repr(e))
+            finally:
+                if failures is not None:
+                    failures.extend(self.__failures(name, errors))
+                await queue.put(done)
+
+        producers = [asyncio.create_task(produce(name, bac)) for name, bac in self.clients.items()]
+        remaining = len(producers)
+
+        try:
+            while remaining:
+                record = await queue.get()
+                if record is done:
+                    remaining -= 1
+                    continue
+                yield record
+        finally:
+            for t in producers:
+                t.cancel()
+
+    async def export_records(self, query: AlertQuery, failures: Optional[List[dict]] = None,
+                             **kwargs) -> AsyncIterator[dict]:
+        """Exports a time range from every CMC concurrently, merged in timestamp order.
+
+        Each CMC's export_records is already ordered, so the streams are merged
+        with a heap holding one record per CMC.
+
+        Args:
+            query (AlertQuery): See BricataApiClient.export_records
+            failures (Optional[List[dict]]): As iter_records
+            **kwargs: Passed to BricataApiClient.export_records, e.g. shards
+
+        Yields:
+            record (dict): Tagged with SOURCE; ordered by timestamp"""
+        names = list(self.clients)
+        errors = {name: [] for name in names}
+        streams = [self.clients[name].export_records(query, failures=errors[name], **kwargs) for name in names]
+
+        async def advance(i: int) -> Optional[tuple]:
+            try:
+                record = await streams[i].__anext__()
+            except StopAsyncIteration:
+                return None
+            except Exception as e:
+                logger.error(f'{names[i]}: {e!r}')
+                errors[names[i]].append(repr(e))
+                return None
+
+            return alert_time_key(record), i, record  # Offsets and fraction widths differ between CMCs
+
+        heap = [head for head in await asyncio.gather(*[advance(i) for i in range(len(streams))]) if head]
+        heapq.heapify(heap)
+
+        try:
+            while heap:
+                _, i, record = heap[0]
+                yield self.__tag(names[i], record)
+
+                head = await advance(i)
+                if head:
+                    heapq.heapreplace(heap, head)
+                else:
+                    heapq.heappop(heap)
+        finally:
+            for stream in streams:
+                await stream.aclose()
+            if failures is not None:
+                for name, errs in errors.items():
+                    failures.extend(self.__failures(name, errs))
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Retry
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>."""
+import logging
+import random
+from collections import deque
+from dataclasses import dataclass, field
+from typing import ClassVar, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Attributes:
+        attempts (int): Total tries, including the first
+        backoff (float): Base delay in seconds; doubles every attempt
+        max_backoff (float): Cap on a single delay in seconds
+        jitter (bool): Sleep a random time up to the delay (full jitter)
+        statuses (Tuple[int]): HTTP statuses that are retried
+        methods (Tuple[str]): HTTP methods that are retried; must be idempotent
+        hedge (Optional[float]): For GETs, send a second request if the first
+            hasn't answered after this many seconds, or after the observed p95
+            latency once enough samples exist; None disables hedging
+    """
+    attempts: int = 3
+    backoff: float = 0.5
+    max_backoff: float = 30.0
+    jitter: bool = True
+    statuses: Tuple[int, ...] = (429, 500, 502, 503, 504)
+    methods: Tuple[str, ...] = ('get', 'put', 'delete')
+    hedge: Optional[float] = None
+    latencies: deque = field(default_factory=lambda: deque(maxlen=500), repr=False, compare=False)
+
+    SAMPLES: ClassVar[int] = 20  # Minimum latencies recorded before p95 is used
+
+    def __post_init__(self):
+        if self.attempts < 1:
+            raise ValueError(f'RetryPolicy.attempts must be at least 1, got {self.attempts}')
+
+    def delay(self, attempt: int) -> float:
+        """
+        Args:
+            attempt (int): Zero-based number of the attempt that just failed
+
+        Returns:
+            delay (float): Seconds to sleep before the next attempt"""
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+
+        return random.uniform(0, delay) if self.jitter else delay
+
+    def hedge_delay(self) -> Optional[float]:
+        if self.hedge is None:
+            return None
+
+        if len(self.latencies) < self.SAMPLES:
+            return self.hedge
+
+        ordered = sorted(self.latencies)
+
+        return ordered[int(len(ordered) * 0.95) - 1]
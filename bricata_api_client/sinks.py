@@ -0,0 +1,207 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Sinks
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>."""
+import bz2
+import gzip
+import logging
+import lzma
+import sys
+from typing import List, Optional, Union
+
+import rapidjson
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Optional; pip install bricata-api-client[arrow]
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+
+class Sink:
+    """Writes records in fixed-size batches.
+
+    Subclasses implement write_batch; records may be dicts or models with a dict()
+    method (e.g. Alert)."""
+    BATCH_SIZE: int = 10000  # Records per batch written
+
+    def __init__(self, path: str, batch_size: Optional[int] = None):
+        """Initializes Class
+
+        Args:
+            path (str): Full path of the output file; '-' is stdout where supported
+            batch_size (Optional[int]): Records per batch (default: BATCH_SIZE)"""
+        self.path = path
+        self.batch_size = batch_size or self.BATCH_SIZE
+        self.buffer = []
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def _dict(record: Union[dict, object]) -> dict:
+        return record if type(record) is dict else record.dict()
+
+    def write(self, record: Union[dict, object]):
+        self.buffer.append(record)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            batch, self.buffer = self.buffer, []
+            self.write_batch(batch)
+
+    def write_batch(self, batch: List[Union[dict, object]]):
+        raise NotImplementedError
+
+    def close(self):
+        self.flush()
+
+
+class NdjsonSink(Sink):
+    """Newline delimited JSON; optionally gzip, bz2 or xz compressed."""
+    OPENERS = {None: open, 'gzip': gzip.open, 'bz2': bz2.open, 'xz': lzma.open}
+
+    def __init__(self, path: str, batch_size: Optional[int] = None, compression: Optional[str] = None,
+                 append: Optional[bool] = False):
+        """Initializes Class
+
+        Args:
+            path (str): See Sink
+            batch_size (Optional[int]): See Sink
+            compression (Optional[str]): gzip | bz2 | xz
+            append (Optional[bool]): Append to an existing file, e.g. when resuming"""
+        Sink.__init__(self, path, batch_size)
+        if path == '-':
+            self.file = sys.stdout.buffer
+        else:
+            self.file = self.OPENERS[compression](path, 'ab' if append else 'wb')
+
+    def write_batch(self, batch: List[Union[dict, object]]):
+        self.file.write(b''.join(rapidjson.dumps(self._dict(r)).encode() + b'\n' for r in batch))
+        self.count += len(batch)
+
+    def close(self):
+        Sink.close(self)
+        if self.file is sys.stdout.buffer:
+            self.file.flush()
+        else:
+            self.file.close()
+
+
+class ArrowSink(Sink):
+    """Arrow IPC stream file. Unless a schema is given it's inferred from the
+    first batches; later batches are cast to it, so fields it lacks are dropped.
+
+    A field that's null (or an empty list) in every record so far has no type
+    yet, so rows are held back until each field has been seen with a value, or
+    MAX_PENDING rows are waiting. A field still untyped then can't take values
+    later; pass a schema for data like that."""
+    MAX_PENDING: int = 50000  # Rows held back while waiting for types
+
+    def __init__(self, path: str, batch_size: Optional[int] = None, compression: Optional[str] = None,
+                 schema: Optional['pa.Schema'] = None):
+        """Initializes Class
+
+        Args:
+            path (str): See Sink; '-' is stdout
+            batch_size (Optional[int]): See Sink
+            compression (Optional[str]): lz4 | zstd
+            schema (Optional[pyarrow.Schema]): Skips inference"""
+        if pa is None:
+            raise ImportError('pyarrow is required for Arrow/Parquet sinks; pip install bricata-api-client[arrow]')
+
+        Sink.__init__(self, path, batch_size)
+        self.compression = compression
+        self.schema = schema
+        self.writer = None
+        self.pending = []
+
+    @property
+    def _target(self) -> Union[str, object]:
+        return sys.stdout.buffer if self.path == '-' else self.path
+
+    def _open(self, schema: 'pa.Schema'):
+        options = pa.ipc.IpcWriteOptions(compression=self.compression)
+        self.writer = pa.ipc.new_stream(self._target, schema, options=options)
+
+    @staticmethod
+    def _untyped(t: 'pa.DataType') -> bool:
+        if pa.types.is_null(t):
+            return True
+        if pa.types.is_list(t) or pa.types.is_large_list(t):
+            return ArrowSink._untyped(t.value_type)
+        if pa.types.is_struct(t):
+            return any(ArrowSink._untyped(f.type) for f in t)
+
+        return False
+
+    def write_batch(self, batch: List[Union[dict, object]], final: Optional[bool] = False):
+        rows = [self._dict(r) for r in batch]
+        if self.schema is None:
+            rows, self.pending = self.pending + rows, []
+            if not rows:
+                return
+
+            table = pa.Table.from_pylist(rows)
+            if not final and len(rows) < self.MAX_PENDING and any(self._untyped(f.type) for f in table.schema):
+                self.pending = rows
+                return
+
+            self.schema = table.schema
+        else:
+            table = pa.Table.from_pylist(rows, schema=self.schema)
+
+        if self.writer is None:
+            self._open(self.schema)
+        self.writer.write_table(table)
+        self.count += len(rows)
+
+    def close(self):
+        Sink.close(self)
+        if self.pending:
+            self.write_batch([], final=True)
+        if self.writer:
+            self.writer.close()
+        if self.path == '-':
+            sys.stdout.buffer.flush()
+
+
+class ParquetSink(ArrowSink):
+    """Parquet file; each batch becomes a row group."""
+
+    def __init__(self, path: str, batch_size: Optional[int] = None, compression: Optional[str] = 'zstd',
+                 schema: Optional['pa.Schema'] = None):
+        """Initializes Class
+
+        Args:
+            path (str): See ArrowSink
+            batch_size (Optional[int]): See Sink
+            compression (Optional[str]): snappy | gzip | brotli | lz4 | zstd
+            schema (Optional[pyarrow.Schema]): See ArrowSink"""
+        ArrowSink.__init__(self, path, batch_size, compression, schema)
+
+    def _open(self, schema: 'pa.Schema'):
+        self.writer = pq.ParquetWriter(self._target, schema, compression=self.compression or 'none')
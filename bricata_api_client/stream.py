@@ -0,0 +1,262 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Stream
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>."""
+import codecs
+import csv
+import logging
+import re
+from typing import Any, List, Optional, Union
+
+import rapidjson
+
+logger = logging.getLogger(__name__)
+
+TOKEN = re.compile(rb'["\\\[\]{},]')  # Bytes that change parser state outside a string
+STRING = re.compile(rb'["\\]')  # Bytes that change parser state inside a string
+
+
+class JsonArrayStream:
+    """Incrementally decodes the elements of one array in a JSON document.
+
+    Bytes are fed as they arrive; only the element currently being received is
+    buffered, so memory is bounded by the largest element rather than the body.
+    With key set, the array is the value of that key in the top-level object
+    (e.g. {"objects": [...]}); without it, the document itself is the array."""
+
+    def __init__(self, key: Optional[str] = 'objects'):
+        """Initializes Class
+
+        Args:
+            key (Optional[str]): Top-level key holding the array"""
+        self.key = key.encode() if key else None
+        self.buf = bytearray()
+        self.pos = 0
+        self.depth = 0
+        self.in_str = False
+        self.str_start = 0
+        self.last_key = None
+        self.in_array = False
+        self.done = False
+        self.elem_from = 0
+        self.array_depth = 2 if key else 1
+
+    def __emit(self, end: int, out: List[Any]):
+        element = bytes(self.buf[self.elem_from:end]).strip()
+        if element:
+            out.append(rapidjson.loads(element))
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """
+        Args:
+            chunk (bytes):
+
+        Returns:
+            elements (List[Any]): Elements completed by this chunk"""
+        out = []
+        if self.done:
+            return out
+
+        self.buf += chunk
+        buf = self.buf
+
+        while True:
+            if self.in_str:
+                m = STRING.search(buf, self.pos)
+                if not m:
+                    self.pos = len(buf)
+                    break
+
+                i = m.start()
+                if buf[i] == 0x5c:  # Backslash; skip the escaped byte
+                    if i + 1 >= len(buf):
+                        self.pos = i
+                        break
+                    self.pos = i + 2
+                    continue
+
+                self.in_str = False
+                self.pos = i + 1
+                if not self.in_array and self.depth == 1:
+                    self.last_key = bytes(buf[self.str_start + 1:i])
+                continue
+
+            m = TOKEN.search(buf, self.pos)
+            if not m:
+                self.pos = len(buf)
+                break
+
+            i = m.start()
+            c = buf[i]
+            self.pos = i + 1
+
+            if c == 0x22:  # "
+                self.in_str = True
+                self.str_start = i
+            elif c in (0x7b, 0x5b):  # { [
+                self.depth += 1
+                if not self.in_array and c == 0x5b and self.depth == self.array_depth \
+                        and (self.key is None or self.last_key == self.key):
+                    self.in_array = True
+                    self.elem_from = i + 1
+            elif c in (0x7d, 0x5d):  # } ]
+                if self.in_array and self.depth == self.array_depth:  # End of the array
+                    self.__emit(i, out)
+                    self.in_array = False
+                    self.done = True
+                    break
+
+                self.depth -= 1
+                if self.in_array and self.depth == self.array_depth:  # End of a container element
+                    self.__emit(i + 1, out)
+                    self.elem_from = i + 1
+            elif c == 0x2c and self.in_array and self.depth == self.array_depth:  # , between elements
+                self.__emit(i, out)
+                self.elem_from = i + 1
+
+        # Drop everything no longer needed
+        keep = self.elem_from if self.in_array else (self.str_start if self.in_str else self.pos)
+        keep = min(keep, self.pos)
+        if keep:
+            del buf[:keep]
+            self.pos -= keep
+            self.str_start -= keep
+            self.elem_from -= keep
+
+        if self.done:
+            self.buf = bytearray()
+
+        return out
+
+
+class EventStream:
+    """Incrementally decodes a live stream of JSON events.
+
+    Handles server-sent events (text/event-stream; "id:" and "data:" fields,
+    events separated by a blank line) and newline delimited JSON. Only the
+    incomplete trailing line is buffered between chunks."""
+
+    def __init__(self, sse: Optional[bool] = True):
+        """Initializes Class
+
+        Args:
+            sse (Optional[bool]): Server-sent events; otherwise one JSON document per line"""
+        self.sse = sse
+        self.buf = b''
+        self.id = None  # Id of the last complete event; sent as Last-Event-ID on reconnect
+        self.event_id = None
+        self.data = []
+
+    def __decode(self, data: bytes) -> Any:
+        try:
+            return rapidjson.loads(data)
+        except ValueError:
+            return data.decode(errors='replace')
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """
+        Args:
+            chunk (bytes): The next bytes received
+
+        Returns:
+            events (List[Any]): Events completed by chunk, decoded"""
+        *lines, self.buf = (self.buf + chunk).split(b'\n')
+        out = []
+
+        for line in lines:
+            line = line.rstrip(b'\r')
+            if not self.sse:
+                if line.strip():
+                    out.append(self.__decode(line))
+                continue
+
+            if not line:  # Blank line dispatches the event
+                if self.data:
+                    out.append(self.__decode(b'\n'.join(self.data)))
+                    self.data = []
+                if self.event_id is not None:
+                    self.id = self.event_id
+                continue
+
+            if line.startswith(b':'):  # Comment / keep-alive
+                continue
+
+            name, _, value = line.partition(b':')
+            value = value[1:] if value.startswith(b' ') else value
+            if name == b'data':
+                self.data.append(value)
+            elif name == b'id':
+                self.event_id = value.decode()
+
+        return out
+
+
+class CsvStream:
+    """Incrementally decodes CSV rows.
+
+    Only the incomplete trailing record is buffered between chunks; a record is
+    complete at a newline outside quotes, so quoted fields may hold newlines."""
+
+    def __init__(self, header: Optional[bool] = True, encoding: Optional[str] = 'utf-8-sig', **fmtparams):
+        """Initializes Class
+
+        Args:
+            header (Optional[bool]): The first row names the fields; rows are dicts
+            encoding (Optional[str]): utf-8-sig drops a byte order mark
+            **fmtparams: Passed to csv.reader, e.g. delimiter"""
+        self.header = header
+        self.fields = None
+        self.decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        self.fmtparams = fmtparams
+        self.buf = ''
+
+    def __rows(self, records: List[str]) -> List[Union[dict, list]]:
+        rows = list(csv.reader(records, **self.fmtparams))
+        if not self.header:
+            return rows
+
+        if self.fields is None and rows:
+            self.fields, rows = rows[0], rows[1:]
+
+        return [dict(zip(self.fields, row)) for row in rows]
+
+    def feed(self, chunk: bytes, final: Optional[bool] = False) -> List[Union[dict, list]]:
+        """
+        Args:
+            chunk (bytes): The next bytes received
+            final (Optional[bool]): No more bytes follow; flushes a last record
+                without a trailing newline
+
+        Returns:
+            rows (List[Union[dict, list]]): Rows completed by chunk"""
+        *lines, self.buf = (self.buf + self.decoder.decode(chunk, final)).split('\n')
+        records, pending, quotes = [], '', 0
+
+        for line in lines:
+            pending += line + '\n'
+            quotes += line.count('"')
+            if quotes % 2 == 0:  # Balanced quotes; the newline ends the record
+                records.append(pending)
+                pending, quotes = '', 0
+
+        self.buf = pending + self.buf
+        if final and self.buf:
+            records.append(self.buf)
+            self.buf = ''
+
+        return self.__rows([r for r in records if r.strip()])
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Sync
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>."""
+import logging
+import sqlite3
+from dataclasses import replace
+from typing import List, Optional, Tuple
+
+import rapidjson
+
+from bricata_api_client.client import BricataApiClient
+from bricata_api_client.models import alert_time_key, alert_timestamp, AlertQuery
+
+logger = logging.getLogger(__name__)
+
+SCHEMA: str = '''
+CREATE TABLE IF NOT EXISTS alerts (uuid TEXT PRIMARY KEY, timestamp TEXT NOT NULL, data TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS alerts_timestamp ON alerts (timestamp);
+CREATE TABLE IF NOT EXISTS checkpoint (name TEXT PRIMARY KEY, timestamp TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS checkpoint_seen (name TEXT NOT NULL, uuid TEXT NOT NULL, PRIMARY KEY (name, uuid));
+'''
+
+
+class AlertSync:
+    """Incrementally mirrors alerts into a local SQLite file.
+
+    The newest alert timestamp synced (the high-water mark) and the uuids seen at
+    that timestamp are committed in the same transaction as the alerts, so an
+    interrupted run resumes from the last committed batch without gaps or
+    duplicates. A run with failed requests stops short of the first failure and
+    raises, so the next run fetches what was missed."""
+    BATCH: int = 500  # Number of alerts upserted per transaction.
+
+    def __init__(self, client: BricataApiClient, path: str, name: Optional[str] = 'alerts'):
+        """Initializes Class
+
+        Args:
+            client (BricataApiClient):
+            path (str): Full path to the SQLite file; created if missing.
+            name (Optional[str]): Checkpoint name, for syncing several queries
+                into one file."""
+        self.client = client
+        self.name = name
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.db.close()
+
+    def checkpoint(self) -> Tuple[Optional[str], set]:
+        """
+        Returns:
+            checkpoint (Tuple[Optional[str], set]): High-water mark (an alert_time_key) and the uuids seen at it"""
+        row = self.db.execute('SELECT timestamp FROM checkpoint WHERE name = ?', (self.name,)).fetchone()
+        if not row:
+            return None, set()
+
+        seen = self.db.execute('SELECT uuid FROM checkpoint_seen WHERE name = ?', (self.name,)).fetchall()
+
+        return alert_time_key(row[0]), {r[0] for r in seen}  # Marks saved before keys were normalised still compare
+
+    def __commit(self, batch: List[dict], mark: str, seen: set, mark_changed: bool):
+        with self.db:
+            self.db.executemany('INSERT OR REPLACE INTO alerts (uuid, timestamp, data) VALUES (?, ?, ?)',
+                                [(a['uuid'], alert_timestamp(a), rapidjson.dumps(a)) for a in batch])
+            self.db.execute('INSERT OR REPLACE INTO checkpoint (name, timestamp) VALUES (?, ?)', (self.name, mark))
+            if mark_changed:
+                self.db.execute('DELETE FROM checkpoint_seen WHERE name = ?', (self.name,))
+            self.db.executemany('INSERT OR IGNORE INTO checkpoint_seen (name, uuid) VALUES (?, ?)',
+                                [(self.name, u) for u in seen])
+
+    async def run(self, query: Optional[AlertQuery] = None) -> int:
+        """Fetches and stores every alert newer than the checkpoint.
+
+        Args:
+            query (Optional[AlertQuery]): Filters to sync; start_time is only
+                used on the first run, before a checkpoint exists.
+
+        Returns:
+            count (int): Number of new alerts stored
+
+        Raises:
+            RuntimeError: A request failed after its retries; alerts before the
+                failure are stored and the checkpoint stops short of it, so the
+                next run fetches the rest"""
+        query = query or AlertQuery()
+        mark, seen = self.checkpoint()
+
+        if mark:
+            query = replace(query, start_time=mark, end_time=None)
+        elif not query.start_time:
+            raise ValueError('The first sync requires query.start_time')
+
+        logger.debug(f'Syncing alerts from {query.start_time}...')
+
+        count, batch, mark_changed, failures = 0, [], False, []
+        records = self.client.export_records(query, failures=failures)
+        try:
+            async for alert in records:
+                if failures:  # Windows are yielded in time order; this alert may follow the hole
+                    break
+
+                ts = alert_time_key(alert)
+                if mark and (ts < mark or (ts == mark and alert['uuid'] in seen)):
+                    continue
+
+                if ts != mark:
+                    mark, seen, mark_changed = ts, set(), True
+                seen.add(alert['uuid'])
+                batch.append(alert)
+
+                if len(batch) >= self.BATCH:
+                    self.__commit(batch, mark, seen, mark_changed)
+                    count, batch, mark_changed = count + len(batch), [], False
+        finally:
+            await records.aclose()
+
+        if batch:
+            self.__commit(batch, mark, seen, mark_changed)
+            count += len(batch)
+
+        if failures:
+            raise RuntimeError(f'Sync incomplete; stored {count} alert(s) up to {mark}, then {len(failures)} request(s) failed: '
+                               f'{failures[:3]}')
+
+        logger.debug(f'-> Complete; Stored {count}, new alerts.')
+
+        return count
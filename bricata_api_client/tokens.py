@@ -0,0 +1,129 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Tokens
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>."""
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+import rapidjson
+
+try:
+    import fcntl
+except ImportError:  # Windows; the file is still replaced atomically, just not locked
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class TokenCache:
+    """In-memory token cache shared by every client given the same instance.
+
+    Subclass and override get/set/delete for a custom backend. Keys are built
+    from the CMC base URI and username; values are Authorization header values."""
+
+    def __init__(self, ttl: Optional[float] = None):
+        """Initializes Class
+
+        Args:
+            ttl (Optional[float]): Seconds a token is trusted; None trusts it
+                until the CMC rejects it."""
+        self.ttl = ttl
+        self.tokens = {}
+
+    def _expired(self, stored: float) -> bool:
+        return self.ttl is not None and time.time() - stored > self.ttl
+
+    def get(self, key: str) -> Optional[str]:
+        token, stored = self.tokens.get(key, (None, 0))
+        if token and self._expired(stored):
+            self.delete(key)
+            return None
+
+        return token
+
+    def set(self, key: str, token: str):
+        self.tokens[key] = (token, time.time())
+
+    def delete(self, key: str):
+        self.tokens.pop(key, None)
+
+
+class FileTokenCache(TokenCache):
+    """Token cache persisted to a JSON file so separate processes share tokens.
+
+    Reads take a shared lock and writes an exclusive lock on a sidecar .lock
+    file; writes replace the file atomically."""
+
+    def __init__(self, path: str, ttl: Optional[float] = None):
+        """Initializes Class
+
+        Args:
+            path (str): Full path to the cache file; created if missing.
+            ttl (Optional[float]): See TokenCache"""
+        TokenCache.__init__(self, ttl=ttl)
+        self.path = path
+
+    @contextmanager
+    def __lock(self, exclusive: bool):
+        with open(f'{self.path}.lock', 'a') as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def __read(self) -> dict:
+        try:
+            with open(self.path) as f:
+                return rapidjson.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def __write(self, tokens: dict):
+        tmp = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as f:
+            rapidjson.dump(tokens, f)
+        os.chmod(tmp, 0o600)
+        os.replace(tmp, self.path)
+
+    def get(self, key: str) -> Optional[str]:
+        with self.__lock(exclusive=False):
+            token, stored = self.__read().get(key, (None, 0))
+
+        if token and self._expired(stored):
+            self.delete(key)
+            return None
+
+        return token
+
+    def set(self, key: str, token: str):
+        with self.__lock(exclusive=True):
+            tokens = self.__read()
+            tokens[key] = (token, time.time())
+            self.__write(tokens)
+
+    def delete(self, key: str):
+        with self.__lock(exclusive=True):
+            tokens = self.__read()
+            if tokens.pop(key, None) is not None:
+                self.__write(tokens)
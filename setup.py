@@ -49,7 +49,8 @@ def main() -> NoReturn:
                        'Topic :: Internet',
                        'Topic :: Internet :: WWW/HTTP'],
           description='Bricata API Client Library',
-          entry_points={'console_scripts': []},
+          entry_points={'console_scripts': ['bricata-export=bricata_api_client.cli:main']},
+          extras_require={'arrow': ['pyarrow']},
           include_package_data=True,
           install_requires=['aiohttp',
                             'base-api-client',
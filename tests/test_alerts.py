@@ -17,15 +17,19 @@ copies or substantial portions of the Software.
 
 You should have received a copy of the SSPL along with this program.
 If not, see <https://www.mongodb.com/licensing/server-side-public-license>."""
+import asyncio
 import time
+from datetime import timedelta
 
 import pytest
+from delorean import Delorean
 from os import getenv
 from random import choice
 
 from base_api_client import bprint, Results, tprint
+from benchmarks.stub_server import serve, StubConfig
 from bricata_api_client import BricataApiClient
-from bricata_api_client.models import AlertsFilter, AlertQuery
+from bricata_api_client.models import alert_timestamp, AlertsFilter, AlertQuery
 
 
 @pytest.mark.asyncio
@@ -46,6 +50,57 @@ async def test_get_alerts():
     bprint(f'-> Completed in {(time.perf_counter() - ts):f} seconds.')
 
 
+@pytest.mark.asyncio
+async def test_iter_records():
+    ts = time.perf_counter()
+
+    bprint('Test: Iterate Alerts')
+    async with BricataApiClient(cfg=f'{getenv("CFG_HOME")}/bricata_api_client.toml') as bac:
+        failures = []
+        records = [r async for r in bac.iter_records(AlertQuery(limit=25), failures=failures)]
+
+        assert len(records) >= 1
+        assert not failures
+        assert len({r['uuid'] for r in records}) == len(records)  # No page was yielded twice
+
+        print('Records:', len(records))
+
+    bprint(f'-> Completed in {(time.perf_counter() - ts):f} seconds.')
+
+
+@pytest.mark.asyncio
+async def test_stream_records():
+    ts = time.perf_counter()
+
+    bprint('Test: Stream Alerts')
+    async with BricataApiClient(cfg=f'{getenv("CFG_HOME")}/bricata_api_client.toml') as bac:
+        records = [r async for r in bac.stream_records(AlertQuery(limit=500))]
+        results = await bac.get_records(AlertQuery(limit=500))
+
+        assert [r['uuid'] for r in records] == [r['uuid'] for r in results.success]
+
+    bprint(f'-> Completed in {(time.perf_counter() - ts):f} seconds.')
+
+
+@pytest.mark.asyncio
+async def test_export_records():
+    ts = time.perf_counter()
+
+    bprint('Test: Export Alerts')
+    async with BricataApiClient(cfg=f'{getenv("CFG_HOME")}/bricata_api_client.toml') as bac:
+        failures = []
+        query = AlertQuery(start_time=Delorean().datetime - timedelta(days=1), limit=50)
+        records = [r async for r in bac.export_records(query, shards=8, failures=failures)]
+
+        assert not failures
+        assert len({r['uuid'] for r in records}) == len(records)  # Deduplicated
+        assert [alert_timestamp(r) for r in records] == sorted(alert_timestamp(r) for r in records)  # Ordered
+
+        print('Records:', len(records))
+
+    bprint(f'-> Completed in {(time.perf_counter() - ts):f} seconds.')
+
+
 # @pytest.mark.asyncio
 # async def test_get_alerts_filtered():
 #     ts = time.perf_counter()
@@ -146,3 +201,61 @@ async def test_tag_untag_alert():
         assert 'Testing' not in results.success[0]['data']['bricata']['tag']
 
     bprint(f'-> Completed in {(time.perf_counter() - ts):f} seconds.')
+
+
+@pytest.mark.asyncio
+async def test_tag_untag_alerts():
+    ts = time.perf_counter()
+
+    bprint('Test: Tag Alerts')
+    async with BricataApiClient(cfg=f'{getenv("CFG_HOME")}/bricata_api_client.toml') as bac:
+        results = await bac.get_records(AlertQuery(limit=10))
+
+        assert type(results) is Results
+        assert len(results.success) >= 1
+        assert not results.failure
+
+        uids = [a['uuid'] for a in results.success]
+
+        results = await bac.tag_alerts(tag='Testing', uuids=uids)  # Tag alerts
+        assert not results.failure
+        assert len(results.success) == len(uids)
+
+        results = await bac.untag_alerts(tag='Testing', uuids=uids)  # Untag alerts
+        assert not results.failure
+        assert len(results.success) == len(uids)
+
+    bprint(f'-> Completed in {(time.perf_counter() - ts):f} seconds.')
+
+
+@pytest.mark.asyncio
+async def test_get_alert_coalesced():
+    ts = time.perf_counter()
+
+    bprint('Test: Get Alert, Coalesced')
+    async with BricataApiClient(cfg=f'{getenv("CFG_HOME")}/bricata_api_client.toml') as bac:
+        results = await bac.get_alerts()
+        uid = results.success[0]['uuid']
+
+        results = await asyncio.gather(*[bac.get_alert(uuid=uid) for _ in range(20)])  # One request to the CMC
+
+        assert all(len(r.success) == 1 and not r.failure for r in results)
+        assert len({id(r.success[0]) for r in results}) == len(results)  # Every caller got its own copy
+        assert not bac.in_flight
+
+    bprint(f'-> Completed in {(time.perf_counter() - ts):f} seconds.')
+
+
+@pytest.mark.asyncio
+async def test_offline_get_alert_coalesced():
+    async with serve(StubConfig(alerts=10, latency=0.05)) as (stub, cfg):
+        async with BricataApiClient(cfg=cfg) as bac:
+            uid = f'{3:032x}'
+            results = await asyncio.gather(*[bac.get_alert(uuid=uid) for _ in range(20)])
+
+            assert all(r.success[0]['uuid'] == uid and not r.failure for r in results)
+            assert stub.requests[f'/alert/{uid}'] == 1 and stub.requests['/login/'] == 1
+            assert not bac.in_flight
+
+            await bac.get_alert(uuid=uid)  # Nothing in flight; sent again
+            assert stub.requests[f'/alert/{uid}'] == 2
@@ -23,7 +23,7 @@ import pytest
 from os import getenv
 
 from base_api_client import bprint, Results, tprint
-from bricata_api_client import BricataApiClient
+from bricata_api_client import BricataApiClient, FileTokenCache
 
 
 @pytest.mark.asyncio
@@ -68,3 +68,44 @@ async def test_logout():
         tprint(results)
 
     bprint(f'-> Completed in {(time.perf_counter() - ts):f} seconds.')
+
+
+@pytest.mark.asyncio
+async def test_login_keeps_session():
+    ts = time.perf_counter()
+
+    bprint('Test: Login Keeps Session')
+    async with BricataApiClient(cfg=f'{getenv("CFG_HOME")}/bricata_api_client.toml') as bac:
+        await bac.warm_up(2)
+        session = bac.session
+
+        await bac.login()
+        await bac.login()
+
+        assert bac.session is session  # Pooled connections survive re-login
+        assert bac.session.headers['Authorization'] == bac.header['Authorization']
+
+    bprint(f'-> Completed in {(time.perf_counter() - ts):f} seconds.')
+
+
+@pytest.mark.asyncio
+async def test_token_cache(tmp_path):
+    ts = time.perf_counter()
+
+    bprint('Test: Token Cache')
+    cache = FileTokenCache(path=str(tmp_path / 'tokens.json'))
+    async with BricataApiClient(cfg=f'{getenv("CFG_HOME")}/bricata_api_client.toml', token_cache=cache, logout=False) as bac:
+        await bac.get_tags()
+        token = cache.get(bac.token_key)
+
+        assert token == bac.header['Authorization']
+
+    async with BricataApiClient(cfg=f'{getenv("CFG_HOME")}/bricata_api_client.toml', token_cache=cache) as bac:
+        results = await bac.get_tags()  # Reuses the cached token; no /login/
+
+        assert not results.failure
+        assert bac.header['Authorization'] == token
+
+    assert cache.get(bac.token_key) is None  # Logged out on exit
+
+    bprint(f'-> Completed in {(time.perf_counter() - ts):f} seconds.')
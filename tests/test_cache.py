@@ -0,0 +1,77 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Test Cache
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>."""
+import time
+
+import pytest
+from os import getenv
+
+from base_api_client import bprint, Results
+from bricata_api_client import BricataApiClient, DiskResponseCache, ResponseCache
+from bricata_api_client.cache import CacheEntry
+from bricata_api_client.models import TagRequest
+
+
+@pytest.mark.parametrize('backend', ['memory', 'disk'])
+def test_cache_lru_invalidate(backend, tmp_path):
+    cache = ResponseCache(max_entries=2) if backend == 'memory' else DiskResponseCache(str(tmp_path / 'c.db'), max_entries=2)
+
+    for i, end_point in enumerate(['/tags/', '/alert/a', '/alert/b']):
+        cache.set(cache.key(end_point), CacheEntry(end_point=end_point, result={'status': 200, 'i': i}, stored=time.time()))
+
+    assert cache.get(cache.key('/tags/')) is None  # Least recently used; evicted
+    assert cache.get(cache.key('/alert/a')).result == {'status': 200, 'i': 1}
+
+    cache.invalidate('/alerts/a/tag/ATO/')  # Writes to /alerts/ invalidate /alert/{uuid}
+
+    assert cache.get(cache.key('/alert/a')) is None
+    assert cache.get(cache.key('/alert/b')) is None
+
+
+def test_cache_cacheable():
+    cache = ResponseCache()
+
+    assert cache.cacheable('get', '/tags/')
+    assert cache.cacheable('GET', '/alert/0123')
+    assert not cache.cacheable('put', '/tags/x/')
+    assert not cache.cacheable('get', '/alerts/')
+    assert cache.key('/x', {'b': 1, 'a': 2}) == cache.key('/x', {'a': 2, 'b': 1})
+
+
+@pytest.mark.asyncio
+async def test_cached_get_tags():
+    ts = time.perf_counter()
+
+    bprint('Test: Cached Get Tags')
+    async with BricataApiClient(cfg=f'{getenv("CFG_HOME")}/bricata_api_client.toml', cache=ResponseCache()) as bac:
+        results = await bac.get_tags()
+
+        assert type(results) is Results
+        assert not results.failure
+        assert bac.cache.entries
+
+        await bac.put_tag(TagRequest(name='sea_test_cache'))  # Invalidates /tags/
+        assert not bac.cache.entries
+
+        results = await bac.get_tags()
+        assert 'sea_test_cache' in [t['name'] for t in results.success]
+
+        await bac.delete_tag(tag_name='sea_test_cache')
+
+    bprint(f'-> Completed in {(time.perf_counter() - ts):f} seconds.')
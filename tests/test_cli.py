@@ -0,0 +1,102 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Test CLI
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>."""
+import datetime as dt
+
+import pytest
+import rapidjson
+
+from benchmarks.stub_server import EPOCH, serve, StubConfig
+from bricata_api_client import BricataApiClient
+from bricata_api_client.cli import Checkpoint, export, main, make_parser, parse_time
+from bricata_api_client.models import alert_time_key
+
+
+def test_parse_time():
+    now = dt.datetime.now(tz=dt.timezone.utc)
+
+    assert parse_time(None) is None
+    assert abs((now - parse_time('2h')) - dt.timedelta(hours=2)) < dt.timedelta(seconds=5)
+    assert parse_time('2020-01-01T00:00:00Z') == dt.datetime(2020, 1, 1, tzinfo=dt.timezone.utc)
+
+
+def test_checkpoint(tmp_path):
+    path = str(tmp_path / 'alerts.ckpt')
+    ckpt = Checkpoint(path)
+    for ts, uuid in (('2020-01-01T00:00:01Z', 'a'), ('2020-01-01T00:00:02Z', 'b'), ('2020-01-01T00:00:02Z', 'c')):
+        assert not ckpt.skip(alert_time_key(ts), uuid)
+        ckpt.advance(alert_time_key(ts), uuid)
+    ckpt.save(ckpt.state())
+
+    resumed = Checkpoint(path)
+
+    assert resumed.skip(alert_time_key('2020-01-01T00:00:01Z'), 'a')
+    assert resumed.skip(alert_time_key('2020-01-01T00:00:02Z'), 'c')
+    assert not resumed.skip(alert_time_key('2020-01-01T00:00:02Z'), 'd')  # Same second, not yet written
+    assert not resumed.skip(alert_time_key('2020-01-01T00:00:03Z'), 'e')
+
+
+def test_checkpoint_normalised_marks(tmp_path):
+    path = str(tmp_path / 'alerts.ckpt')
+    with open(path, 'w') as f:
+        f.write(rapidjson.dumps({'mark': '2020-01-01T12:00:01+02:00', 'seen': ['a']}))  # Saved raw by an older version
+
+    resumed = Checkpoint(path)
+
+    assert resumed.mark == '2020-01-01T10:00:01.000000'
+    assert resumed.skip(alert_time_key('2020-01-01T10:00:01Z'), 'a')
+    assert resumed.skip(alert_time_key('2020-01-01T10:00:00.500Z'), 'b')
+    assert not resumed.skip(alert_time_key('2020-01-01T10:00:01.250Z'), 'c')  # Sorts below the raw mark as a string
+
+
+def test_checkpoint_requires_ndjson_file():
+    with pytest.raises(SystemExit):
+        main(['-c', 'cfg.toml', '--start', '1h', '-f', 'parquet', '-o', 'x.parquet', '--checkpoint', 'x.ckpt'])
+
+    with pytest.raises(SystemExit):
+        main(['-c', 'cfg.toml', '--start', '1h', '--checkpoint', 'x.ckpt'])
+
+
+@pytest.mark.asyncio
+async def test_offline_checkpoint_failures(tmp_path, monkeypatch):
+    output = tmp_path / 'alerts.ndjson'
+    end = EPOCH + dt.timedelta(seconds=2999)
+    args = make_parser().parse_args(['-c', 'stub', '--start', EPOCH.isoformat(), '--end', end.isoformat(),
+                                     '-o', str(output), '--checkpoint', str(tmp_path / 'alerts.ckpt'), '--page-size', '100',
+                                     '--batch-size', '100', '-q'])
+    login = BricataApiClient.login
+
+    async with serve(StubConfig(alerts=3000, seed=2)) as (stub, cfg):
+        args.config = cfg
+
+        async def flaky_login(self, *a, **kw):
+            result = await login(self, *a, **kw)
+            stub.error_rate = 0.5  # After logging in, so only the alert requests fail
+            return result
+
+        monkeypatch.setattr(BricataApiClient, 'login', flaky_login)
+        assert await export(args) == 1
+
+        monkeypatch.setattr(BricataApiClient, 'login', login)
+        stub.error_rate = 0.0
+        assert await export(args) == 0
+
+        with open(output) as f:
+            uuids = [rapidjson.loads(line)['uuid'] for line in f]
+        assert sorted(uuids) == [f'{i:032x}' for i in range(3000)]  # Nothing skipped, nothing written twice
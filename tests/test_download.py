@@ -0,0 +1,76 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Test Download
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>.
+
+Runs against benchmarks.stub_server; needs no CMC."""
+import asyncio
+import hashlib
+import os
+
+import pytest
+
+from benchmarks.stub_server import blob, serve, StubConfig
+from bricata_api_client import BricataApiClient, RetryPolicy
+
+
+@pytest.mark.asyncio
+async def test_offline_download(tmp_path):
+    async with serve(StubConfig(capture_size=3 * 2 ** 20 + 123)) as (stub, cfg):
+        data = blob(stub.capture_size)
+        async with BricataApiClient(cfg=cfg) as bac:
+            path = str(tmp_path / 'capture.pcap')
+            result = await bac.download_capture('sensor-01', path, part_size=2 ** 18,
+                                                expected=hashlib.sha256(data).hexdigest())
+            assert result.ranged and result.size == len(data)
+            with open(path, 'rb') as f:
+                assert f.read() == data
+
+            stub.ranges = False  # Streamed in one piece
+            result = await bac.download_system_logs(str(tmp_path / 'cmc.log'), checksum='md5')
+            assert not result.ranged and result.checksum == hashlib.md5(data).hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_offline_download_resume(tmp_path):
+    path = str(tmp_path / 'sensor.log')
+    async with serve(StubConfig(capture_size=2 ** 20, capture_cut=2 ** 18)) as (stub, cfg):
+        data = blob(stub.capture_size)
+        async with BricataApiClient(cfg=cfg, retry_policies={'*': RetryPolicy(attempts=1)}) as bac:
+            with pytest.raises(Exception):
+                await bac.download_sensor_logs('sensor-01', path, part_size=2 ** 19, parts=1)
+            assert os.path.exists(f'{path}.part') and not os.path.exists(path)
+
+            stub.capture_cut = 0
+            result = await bac.download_sensor_logs('sensor-01', path, part_size=2 ** 19, checksum='sha256')
+            assert result.resumed and result.checksum == hashlib.sha256(data).hexdigest()
+            assert not os.path.exists(f'{path}.part')
+
+
+@pytest.mark.asyncio
+async def test_offline_download_relogin_one_slot(tmp_path):
+    async with serve(StubConfig(capture_size=2 ** 20, token_uses=2)) as (stub, cfg):
+        cfg['Options'].update(Concurrency=1, MaxConcurrency=1)  # Login has to wait for a range's slot
+        data = blob(stub.capture_size)
+        async with BricataApiClient(cfg=cfg, retry_policies={'*': RetryPolicy(attempts=1)}) as bac:
+            path = str(tmp_path / 'capture.pcap')
+            result = await asyncio.wait_for(bac.download_capture('sensor-01', path, part_size=2 ** 18, parts=2), timeout=10)
+            assert result.ranged and stub.logins > 1
+            with open(path, 'rb') as f:
+                assert f.read() == data
+
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Test Geo
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>.
+
+Runs against benchmarks.stub_server; needs no CMC."""
+import asyncio
+
+import pytest
+
+from benchmarks.stub_server import serve, StubConfig
+from bricata_api_client import BricataApiClient, GeoStream
+
+
+@pytest.mark.asyncio
+async def test_offline_geo_stream():
+    async with serve(StubConfig(geo_events=50, geo_disconnect=20)) as (stub, cfg):
+        async with BricataApiClient(cfg=cfg) as bac:
+            async with GeoStream(bac, reconnect_delay=0.01) as stream:
+                events = [await stream.__anext__() for _ in range(50)]
+            assert [e['uuid'] for e in events] == [f'{i:032x}' for i in range(50)]  # Resumed without gaps
+            assert stream.reconnects >= 2
+
+            async with GeoStream(bac, queue_size=5, policy='drop_oldest') as stream:
+                while stream.received < 50:
+                    await asyncio.sleep(0.01)  # Consumer stalls
+                events = [await stream.__anext__() for _ in range(5)]
+            assert [e['uuid'] for e in events] == [f'{i:032x}' for i in range(45, 50)]
+            assert stream.dropped == 45
+
+
+@pytest.mark.asyncio
+async def test_offline_geo_stream_backoff():
+    async with serve(StubConfig(geo_events=3, geo_close=True, token_uses=2)) as (stub, cfg):
+        async with BricataApiClient(cfg=cfg) as bac:
+            async with GeoStream(bac, reconnect_delay=0.05, max_reconnect_delay=0.4) as stream:
+                events = [await stream.__anext__() for _ in range(3)]
+                await asyncio.sleep(1)  # Every reconnect from here on gets an empty stream
+            assert [e['uuid'] for e in events] == [f'{i:032x}' for i in range(3)]
+            assert 3 <= stream.reconnects < 15  # Backed off rather than reconnecting in a tight loop
+            assert stub.logins > 1 and bac.header['Authorization'] == f'Bearer stub-token-{stub.logins}'
+
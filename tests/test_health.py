@@ -0,0 +1,43 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Test Health
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>.
+
+Runs against benchmarks.stub_server; needs no CMC."""
+import pytest
+
+from benchmarks.stub_server import serve, StubConfig
+from bricata_api_client import BricataApiClient, SensorHealthPoller
+
+
+@pytest.mark.asyncio
+async def test_offline_sensor_health():
+    async with serve(StubConfig(sensors={f's{i}': 'ok' for i in range(100)})) as (stub, cfg):
+        async with BricataApiClient(cfg=cfg) as bac:
+            poller = SensorHealthPoller(bac, interval=0.01)
+            changes = [c async for c in poller.watch(polls=3)]
+            assert len(changes) == 100 and {c.kind for c in changes} == {'added'}
+            assert poller.full_polls == 1  # Count unchanged; listing not re-fetched
+
+            stub.sensors['s7'] = 'critical'
+            del stub.sensors['s9']
+            changes = await poller.poll()
+            assert sorted((c.uuid, c.kind) for c in changes) == [('s7', 'changed'), ('s9', 'removed')]
+
+            history = await bac.get_sensor_health_history('s7')
+            assert history.success[0]['status'] == 'critical'
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Test Index
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>."""
+from copy import deepcopy
+from datetime import timedelta
+
+import pytest
+
+from benchmarks.stub_server import EPOCH, serve, StubConfig
+from bricata_api_client import AlertIndex, BricataApiClient
+from bricata_api_client.models import alert_time_key, AlertQuery, AlertsFilter
+
+
+def alert(i: int, tags: tuple = ()) -> dict:
+    return {'uuid':      f'{i:032x}',
+            'timestamp': f'2020-01-01T12:00:{i:02d}.000000Z',
+            'data':      {'alert':   {'signature': f'ET POLICY Test {i % 3}', 'signature_id': 2000000 + i % 3},
+                          'host':    f'sensor-{i % 2}',
+                          'src_ip':  f'10.0.0.{i}',
+                          'dest_ip': '192.168.0.1',
+                          'bricata': {'tag': list(tags)}}}
+
+
+ALERTS = [alert(i, ('ATO',) if i % 2 else ('ATO', 'Malware') if i % 3 == 0 else ()) for i in range(30)]
+
+
+def test_index_filters():
+    index = AlertIndex()
+    assert index.extend(reversed(deepcopy(ALERTS))) == 30
+    assert index.extend(deepcopy(ALERTS[:5])) == 0  # Already indexed
+
+    assert index.count() == 30
+    assert index.count(tags='ATO') == 20
+    assert index.count(tags='ATO,Malware', tags_op='and') == 5
+    assert index.count(tags=['Malware', 'Missing']) == 5
+    assert index.count(signature_id=2000001, sensor='sensor-1') == 5
+    assert index.count(src_ip=['10.0.0.1', '10.0.0.2', '10.0.0.99']) == 2
+    assert index.count(dst_ip='192.168.0.2') == 0
+
+    alerts = index.filter(tags='ATO', start_time='2020-01-01T12:00:10Z', end_time='2020-01-01T12:00:19Z')
+    assert [a.uuid for a in alerts] == [f'{i:032x}' for i in range(10, 20) if i % 2 or i % 3 == 0]
+
+
+def test_index_counts_and_select():
+    index = AlertIndex()
+    index.extend(ALERTS)
+
+    assert index.counts('sensor', tags='Malware') == {'sensor-0': 5}
+    assert sum(index.counts('signature_id').values()) == 30
+    assert index.counts('src_ip', tags='ATO', sensor='sensor-0') == {f'10.0.0.{i}': 1 for i in range(0, 30, 6)}
+    assert set(index.bitmaps) == {('tags', 'Malware'), ('tags', 'ATO'), ('sensor', 'sensor-0')}  # None cached per src_ip
+    assert len(index.select(AlertQuery(tags='Malware'))) == 5
+    with pytest.raises(ValueError):
+        index.select(AlertsFilter(json_filter='{"src_ip": "10.0.0.1"}'))
+
+
+def test_index_coverage():
+    index = AlertIndex()
+    index.cover('2020-01-01T00:00:00Z', '2020-01-01T01:00:00Z')
+    index.cover('2020-01-01T02:00:00Z', '2020-01-01T03:00:00Z')
+
+    gaps = index.missing('2020-01-01T00:30:00Z', '2020-01-01T04:00:00Z')
+    assert [(s.hour, e.hour) for s, e in gaps] == [(1, 2), (3, 4)]
+
+    index.cover('2020-01-01T01:00:00Z', '2020-01-01T02:00:00Z')
+    assert len(index.windows) == 1 and not index.missing('2020-01-01T00:00:00Z', '2020-01-01T03:00:00Z')
+
+
+def test_index_timestamp_formats():
+    index = AlertIndex()
+    for i, ts in enumerate(('2020-01-01T11:59:59.999999Z', '2020-01-01T12:00:00.123Z', '2020-01-01T12:00:00Z',
+                            '2020-01-01T07:00:01.000000-05:00', '2020-01-01T12:00:02.000000+0000')):
+        index.add({'uuid': str(i), 'timestamp': ts})
+
+    assert alert_time_key('2020-01-01T12:00:00.123Z') == '2020-01-01T12:00:00.123000'
+    assert [a.uuid for a in index.filter(start_time='2020-01-01T12:00:00Z', end_time='2020-01-01T12:00:01Z')] == ['2', '1', '3']
+
+
+@pytest.mark.asyncio
+async def test_offline_alert_index():
+    async with serve(StubConfig(alerts=3000, tags={f'{i:032x}': {'ATO'} for i in range(0, 3000, 3)})) as (stub, cfg):
+        async with BricataApiClient(cfg=cfg) as bac:
+            index = AlertIndex()
+            query = AlertQuery(start_time=EPOCH, end_time=EPOCH + timedelta(seconds=1999), tags='ATO', limit=500)
+            alerts = await index.search(bac, query)
+            assert len(alerts) == 667 and len(index) == 2000
+
+            wider = AlertQuery(start_time=EPOCH + timedelta(seconds=1000), end_time=EPOCH + timedelta(seconds=2999), limit=500)
+            gap = (EPOCH + timedelta(seconds=1999), EPOCH + timedelta(seconds=2999))
+            assert index.missing(wider.start_time, wider.end_time) == [gap]
+            assert await index.fetch(bac, wider) == 1000
+            assert await index.fetch(bac, wider) == 0 and not index.missing(wider.start_time, wider.end_time)
+
+            assert index.count(tags='ATO') == 1000
+            assert index.count(sensor='sensor-01', start_time=wider.start_time) == 125
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Test Limiter
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>."""
+import asyncio
+
+import pytest
+
+from bricata_api_client.limiter import AdaptiveLimiter
+
+
+def test_limiter_aimd():
+    changes = []
+    limiter = AdaptiveLimiter(initial=4, maximum=8, on_change=changes.append)
+
+    for _ in range(20):
+        limiter.record(status=200, latency=0.1)  # Flat latency; additive increase
+
+    assert limiter.limit > 4
+
+    before = limiter.limit
+    limiter.record(status=503, latency=0.1)  # Multiplicative decrease
+
+    assert limiter.limit == max(1, int(before * 0.5))
+    assert changes[-1] == limiter.limit
+
+    limiter.record(status=429, latency=0.1)  # Within cool-down; no second decrease
+    assert limiter.limit == max(1, int(before * 0.5))
+
+
+@pytest.mark.asyncio
+async def test_limiter_bounds_concurrency():
+    limiter = AdaptiveLimiter(initial=3)
+    running, peak = 0, 0
+
+    async def work():
+        nonlocal running, peak
+        async with limiter:
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*[work() for _ in range(20)])
+
+    assert peak == 3
+
+
+@pytest.mark.asyncio
+async def test_limiter_shared_parent():
+    parent = asyncio.Semaphore(4)
+    limiters = [AdaptiveLimiter(initial=3, parent=parent) for _ in range(3)]
+    running, peak = 0, 0
+
+    async def work(limiter):
+        nonlocal running, peak
+        async with limiter:
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*[work(limiters[i % 3]) for i in range(30)])
+
+    assert peak == 4
+    assert all(limiter.in_flight == 0 for limiter in limiters)
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Test Metadata
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>.
+
+Runs against benchmarks.stub_server; needs no CMC."""
+import pytest
+
+from benchmarks.stub_server import serve, StubConfig
+from bricata_api_client import BricataApiClient
+from bricata_api_client.models import MetadataQuery
+
+
+@pytest.mark.asyncio
+async def test_offline_metadata():
+    async with serve(StubConfig(connections=2500)) as (stub, cfg):
+        async with BricataApiClient(cfg=cfg) as bac:
+            records = [r async for r in bac.iter_metadata(MetadataQuery(limit=200))]
+            assert [r['uid'] for r in records] == [f'C{i:016x}' for i in range(2500)]
+
+            results = await bac.get_metadata(MetadataQuery(id=records[42]['uid']))
+            assert results.success == [records[42]]
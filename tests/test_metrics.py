@@ -0,0 +1,64 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Test Metrics
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>."""
+import pytest
+
+from benchmarks.stub_server import start, StubConfig
+from bricata_api_client import BricataApiClient, Metrics
+from bricata_api_client.metrics import end_point_label, Histogram
+
+
+def test_end_point_label():
+    assert end_point_label('/alert/0123456789abcdef0123456789abcdef') == '/alert/{id}'
+    assert end_point_label('/alerts/0123456789abcdef0123456789abcdef/tag/ATO/') == '/alerts/{id}/tag/ATO/'
+    assert end_point_label('/rules/rule/suricata/2000001/') == '/rules/rule/suricata/{id}/'
+    assert end_point_label('/alerts/') == '/alerts/'
+
+
+def test_histogram():
+    histogram = Histogram(buckets=(0.1, 1.0, float('inf')))
+    for value in (0.05, 0.5, 0.5, 5):
+        histogram.observe(value)
+
+    assert histogram.quantile(0.5) == 1.0
+    assert histogram.samples('x', '') == ['x_bucket{le="0.1"} 1', 'x_bucket{le="1.0"} 3', 'x_bucket{le="+Inf"} 4',
+                                          'x_sum 6.05', 'x_count 4']
+
+
+@pytest.mark.asyncio
+async def test_metrics_offline():
+    events = []
+    metrics = Metrics()
+    metrics.add_listener(events.append)
+
+    runner, cfg = await start(StubConfig(alerts=10))
+    try:
+        async with BricataApiClient(cfg=cfg, metrics=metrics) as bac:
+            await bac.get_alert('0' * 32)
+            await bac.get_tags()
+    finally:
+        await runner.cleanup()
+
+    text = metrics.openmetrics()
+
+    assert {(e['method'], e['end_point'], e['status']) for e in events} >= {('get', '/alert/{id}', 200),
+                                                                            ('get', '/tags/', 200)}
+    assert 'bricata_requests_total{method="get",end_point="/alert/{id}",status="200"} 1' in text
+    assert metrics.bytes_in['/alert/{id}'] > 0
+    assert text.endswith('# EOF\n')
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Test Models
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>."""
+from copy import deepcopy
+
+from bricata_api_client.models import Alert, alert_time_key, alert_timestamp, MetadataGroupsQuery, MetadataQuery, SuricataRule
+
+ALERT = {'uuid':      '0123456789abcdef0123456789abcdef',
+         'timestamp': '2020-01-01T12:00:00.000000Z',
+         'data':      {'alert':   {'signature': 'ET POLICY Test', 'signature_id': 2000001, 'severity': 2},
+                       'host':    'sensor-001',
+                       'src_ip':  '10.0.0.1',
+                       'dest_ip': '192.168.0.1',
+                       'bricata': {'tag': ['ATO']}}}
+
+
+def test_alert_round_trip():
+    original = deepcopy(ALERT)
+    alert = Alert.from_dict(ALERT)
+
+    assert ALERT == original  # Input isn't modified
+    assert alert.dict() == ALERT
+    assert alert.signature == 'ET POLICY Test'
+    assert alert.tags == ('ATO',)
+    assert alert.sensor == 'sensor-001'
+    assert alert_timestamp(alert) == ALERT['timestamp']
+    assert Alert.from_dict({'uuid': 'x'}).dict() == {'uuid': 'x'}
+
+
+def test_alert_nulls_and_nested_timestamp():
+    record = {'uuid': None, 'data': {'timestamp': '2020-01-01T12:00:00.000000Z', 'src_ip': None, 'alert': {'signature': None}}}
+    alert = Alert.from_dict(record)
+
+    assert alert.dict() == record  # Explicit nulls survive the round trip
+    assert alert.src_ip is None and alert.signature is None
+    assert alert_timestamp(alert) == alert_timestamp(record) == '2020-01-01T12:00:00.000000Z'
+
+
+def test_alert_interned():
+    a, b = Alert.from_dict(deepcopy(ALERT)), Alert.from_dict(deepcopy(ALERT))
+
+    assert a.signature is b.signature
+    assert a.tags[0] is b.tags[0]
+    assert not hasattr(a, '__dict__')
+
+
+def test_alert_time_key():
+    forms = ['2020-01-01T12:00:01Z', '2020-01-01T12:00:01.250Z', '2020-01-01T07:00:01.500000-05:00',
+             '2020-01-01T12:00:01.750000+0000']
+    keys = [alert_time_key(ts) for ts in forms]
+
+    assert keys == ['2020-01-01T12:00:01.000000', '2020-01-01T12:00:01.250000', '2020-01-01T12:00:01.500000',
+                    '2020-01-01T12:00:01.750000']
+    assert alert_time_key({'data': {'timestamp': forms[1]}}) == keys[1]
+    assert alert_time_key(Alert.from_dict({'uuid': 'x', 'timestamp': forms[2]})) == keys[2]
+    assert alert_time_key(None) == '' and alert_time_key('garbage') == 'garbage'
+
+
+def test_metadata_query():
+    query = MetadataQuery(tags='ATO', limit=500)
+
+    assert query.end_point == '/metadata/activity/'
+    assert query.dict() == {'limit': 500, 'tags': 'ATO'}
+
+    detail = MetadataQuery(id='CHhAvVGS1DHFjwGM9')
+
+    assert detail.end_point == '/metadata/connections/CHhAvVGS1DHFjwGM9/'
+    assert detail.dict() is None and detail.data_key is None
+
+    assert MetadataGroupsQuery(group='dest_port').dict() == {'group': 'dest_port'}
+
+
+def test_suricata_rule():
+    rule = SuricataRule(rule='alert tcp any any -> any any (msg:"Test"; sid: 1000001; rev:1;)', id='42')
+
+    assert rule.sid == 1000001
+    assert rule.dict == {'rule': rule.rule}
+    assert SuricataRule(rule='alert tcp any any -> any any (msg:"No sid";)').sid is None
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Test Paging
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>.
+
+Runs against benchmarks.stub_server; needs no CMC."""
+from datetime import timedelta
+
+import pytest
+
+from benchmarks.stub_server import EPOCH, serve, StubConfig
+from bricata_api_client import BricataApiClient
+from bricata_api_client.models import AlertQuery
+
+
+@pytest.mark.asyncio
+async def test_offline_paging():
+    async with serve(StubConfig(alerts=1234)) as (stub, cfg):
+        async with BricataApiClient(cfg=cfg) as bac:
+            records = [r async for r in bac.iter_records(AlertQuery(limit=100))]
+            assert [r['uuid'] for r in records] == [f'{i:032x}' for i in range(1234)]
+
+            records = [r async for r in bac.iter_records(AlertQuery(offset=1000, limit=100))]
+            assert [r['uuid'] for r in records] == [f'{i:032x}' for i in range(1000, 1234)]
+            assert not [r async for r in bac.iter_records(AlertQuery(offset=2000, limit=100))]
+
+            query = AlertQuery(start_time=EPOCH, end_time=EPOCH + timedelta(seconds=1233), limit=100)
+            records = [r async for r in bac.export_records(query, shards=3)]
+            assert [r['uuid'] for r in records] == [f'{i:032x}' for i in range(1234)]
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Test Pool
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>.
+
+Runs against benchmarks.stub_server; needs no CMC."""
+from datetime import timedelta
+
+import pytest
+
+from benchmarks.stub_server import EPOCH, serve, StubConfig
+from bricata_api_client import BricataApiPool
+from bricata_api_client.models import AlertQuery
+
+
+@pytest.mark.asyncio
+async def test_offline_pool():
+    async with serve(StubConfig(alerts=300, latency=0.001)) as (_, east), \
+            serve(StubConfig(alerts=200, latency=0.001)) as (_, west):
+        cfgs = {'east': east, 'west': west, 'down': {**west, 'URI': {'Base': 'http://127.0.0.1:9'}}}
+        async with BricataApiPool(cfgs=cfgs, budget=4) as pool:
+            assert list(pool.unavailable) == ['down']
+
+            records = [r async for r in pool.iter_records(AlertQuery(limit=50))]
+            assert len(records) == 500
+            assert sum(r[pool.SOURCE] == 'east' for r in records) == 300
+
+            query = AlertQuery(start_time=EPOCH, end_time=EPOCH + timedelta(seconds=299), limit=50)
+            records = [r async for r in pool.export_records(query, shards=2)]
+            assert len(records) == 500
+            assert [r['timestamp'] for r in records] == sorted(r['timestamp'] for r in records)
+
+
+class FakeClient:
+    def __init__(self, timestamps: list):
+        self.timestamps = timestamps
+
+    async def export_records(self, query, failures=None, **kwargs):
+        for ts in self.timestamps:
+            yield {'uuid': ts, 'timestamp': ts}
+
+
+@pytest.mark.asyncio
+async def test_pool_export_mixed_timestamp_formats():
+    pool = BricataApiPool(cfgs={})
+    pool.clients = {'east': FakeClient(['2020-01-01T10:00:01Z', '2020-01-01T12:00:03+02:00']),
+                    'west': FakeClient(['2020-01-01T10:00:01.500Z', '2020-01-01T10:00:02.000001Z'])}
+
+    records = [r async for r in pool.export_records(AlertQuery())]
+
+    assert [r['timestamp'] for r in records] == ['2020-01-01T10:00:01Z', '2020-01-01T10:00:01.500Z',
+                                                 '2020-01-01T10:00:02.000001Z', '2020-01-01T12:00:03+02:00']
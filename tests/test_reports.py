@@ -0,0 +1,46 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Test Reports
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>.
+
+Runs against benchmarks.stub_server; needs no CMC."""
+import pytest
+
+from benchmarks.stub_server import serve, StubConfig
+from bricata_api_client import BricataApiClient
+
+
+@pytest.mark.asyncio
+async def test_offline_reports(tmp_path):
+    async with serve(StubConfig(alerts=5000, report_polls=2)) as (stub, cfg):
+        async with BricataApiClient(cfg=cfg) as bac:
+            entry = await bac.wait_for_report('stub-report', interval=0.01)
+            assert entry['seq'] == 2
+
+            result = await bac.fetch_report('stub-report', str(tmp_path / 'nightly.csv'), seq=1)
+            assert result.size > 0
+
+            rows = [r async for r in bac.iter_report_rows('/system/reports/alerts/')]
+            assert [r['uuid'] for r in rows] == [f'{i:032x}' for i in range(5000)]
+
+            rows = [r async for r in bac.iter_report_rows('/system/-export', method='post', json={'type': 'alerts'})]
+            assert len(rows) == 5000 and rows[0]['data']['host'] == 'sensor-00'
+
+            result = await bac.export_report(str(tmp_path / 'export.ndjson'), {'type': 'alerts'})
+            with open(result.path) as f:
+                assert sum(1 for _ in f) == 5000
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Test Retry
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>."""
+import time
+
+import pytest
+from os import getenv
+
+from base_api_client import bprint, Results
+from bricata_api_client import BricataApiClient, RetryPolicy
+
+
+def test_retry_delay():
+    policy = RetryPolicy(backoff=1, max_backoff=5, jitter=False)
+
+    assert [policy.delay(a) for a in range(5)] == [1, 2, 4, 5, 5]
+    assert all(0 <= RetryPolicy(backoff=1).delay(3) <= 8 for _ in range(100))
+
+    with pytest.raises(ValueError):
+        RetryPolicy(attempts=0)
+
+
+def test_hedge_delay():
+    policy = RetryPolicy(hedge=0.5)
+
+    assert policy.hedge_delay() == 0.5  # Not enough samples yet
+
+    policy.latencies.extend(i / 100 for i in range(1, 101))
+
+    assert policy.hedge_delay() == 0.95
+    assert RetryPolicy().hedge_delay() is None
+
+
+@pytest.mark.asyncio
+async def test_hedged_get_alert():
+    ts = time.perf_counter()
+
+    bprint('Test: Hedged Get Alert')
+    policies = {'/alert/*': RetryPolicy(hedge=0.25), '*': RetryPolicy()}
+    async with BricataApiClient(cfg=f'{getenv("CFG_HOME")}/bricata_api_client.toml', retry_policies=policies) as bac:
+        results = await bac.get_alerts()
+        uid = results.success[0]['uuid']
+
+        for _ in range(5):
+            results = await bac.get_alert(uuid=uid)
+
+            assert type(results) is Results
+            assert len(results.success) == 1
+            assert not results.failure
+
+        assert len(policies['/alert/*'].latencies) >= 5
+
+    bprint(f'-> Completed in {(time.perf_counter() - ts):f} seconds.')
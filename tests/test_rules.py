@@ -0,0 +1,79 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Test Rules
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>.
+
+Runs against benchmarks.stub_server; needs no CMC."""
+import asyncio
+
+import pytest
+
+from benchmarks.stub_server import serve, StubConfig
+from bricata_api_client import BricataApiClient, RuleMirror, SuricataRule
+
+
+@pytest.mark.asyncio
+async def test_offline_suricata_rules(tmp_path):
+    lines = [f'alert tcp any any -> any any (msg:"Stub {i}"; sid:{1000000 + i}; rev:1;)' for i in range(5000)]
+    path = tmp_path / 'local.rules'
+    path.write_text('# Generated\n' + '\n'.join(lines) + '\n')
+    async with serve() as (stub, cfg):
+        async with BricataApiClient(cfg=cfg) as bac:
+            for compress in (False, True):
+                result = await bac.upload_suricata_rules(str(path), compress=compress)
+                assert result['imported'] == 5000 and result['filename'].endswith('.gz') == compress
+
+            results = await bac.put_suricata_rules(SuricataRule(rule=r) for r in lines[:200])
+            assert len(results.success) == 200 and len(stub.rules) == 200
+
+            updated = [SuricataRule(rule=r['rule'].replace('rev:1', 'rev:2'), id=r['id']) for r in list(stub.rules.values())[:50]]
+            results = await bac.put_suricata_rules(updated)
+            assert len(results.success) == 50
+            assert sum('rev:2' in r['rule'] for r in stub.rules.values()) == 50
+
+
+@pytest.mark.asyncio
+async def test_offline_upload_relogin_one_slot(tmp_path):
+    path = tmp_path / 'local.rules'
+    path.write_text('alert tcp any any -> any any (msg:"Stub"; sid:1000000; rev:1;)\n' * 1000)
+    async with serve(StubConfig(token_uses=1)) as (stub, cfg):
+        cfg['Options'].update(Concurrency=1, MaxConcurrency=1)  # Login has to wait for the upload's slot
+        async with BricataApiClient(cfg=cfg) as bac:
+            await bac.upload_suricata_rules(str(path))  # Uses up the token
+            result = await asyncio.wait_for(bac.upload_suricata_rules(str(path), compress=True), timeout=10)
+            assert result['imported'] == 1000 and stub.logins == 2
+
+
+@pytest.mark.asyncio
+async def test_offline_rule_mirror(tmp_path):
+    rules = {f'r{i}': {'id': f'r{i}', 'rule': f'alert ip any any -> any any (sid:{i};)'} for i in range(1200)}
+    async with serve(StubConfig(rules=rules)) as (stub, cfg):
+        async with BricataApiClient(cfg=cfg) as bac:
+            with RuleMirror(bac, str(tmp_path / 'rules.db'), history=True) as mirror:
+                delta = await mirror.run('default', 'ids')
+                assert len(delta.added) == 1200 and stub.rule_fetches == 1200
+
+                delta = await mirror.run('default', 'ids')
+                assert delta.unchanged == 1200 and not delta.added + delta.changed and stub.rule_fetches == 1200
+
+                stub.rules['r7']['rev'] = 2
+                stub.rules['r9']['enabled'] = False
+                del stub.rules['r11']
+                delta = await mirror.run('default', 'ids')
+                assert sorted(delta.changed) == ['r7', 'r9'] and delta.removed == ['r11'] and stub.rule_fetches == 1202
+                assert mirror.rule('default', 'ids', 'r7')['rev'] == 2 and mirror.rule('default', 'ids', 'r11') is None
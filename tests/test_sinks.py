@@ -0,0 +1,82 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Test Sinks
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>."""
+import gzip
+
+import pytest
+import rapidjson
+
+from bricata_api_client.models import Alert
+from bricata_api_client.sinks import ArrowSink, NdjsonSink, ParquetSink
+
+RECORDS = [{'uuid': f'{i:032x}', 'timestamp': '2020-01-01T00:00:00Z', 'data': {'bricata': {'tag': ['ATO']}}}
+           for i in range(25)]
+
+
+def test_ndjson_sink(tmp_path):
+    path = str(tmp_path / 'alerts.ndjson.gz')
+    with NdjsonSink(path, batch_size=10, compression='gzip') as sink:
+        for record in RECORDS[:20]:
+            sink.write(record)
+        for record in RECORDS[20:]:
+            sink.write(Alert.from_dict(record))  # Models are written as dicts
+
+    with gzip.open(path) as f:
+        assert [rapidjson.loads(line) for line in f] == RECORDS
+
+    assert sink.count == len(RECORDS)
+
+
+def test_parquet_sink(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+
+    path = str(tmp_path / 'alerts.parquet')
+    with ParquetSink(path, batch_size=10) as sink:
+        for record in RECORDS:
+            sink.write(record)
+
+    table = pq.read_table(path)
+
+    assert table.num_rows == len(RECORDS)
+    assert table.to_pylist() == RECORDS
+
+
+def test_parquet_sink_untyped_first_batch(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+
+    untagged = [{'uuid': f'{i:032x}', 'data': {'bricata': {'tag': []}, 'note': None}} for i in range(20)]
+    path = str(tmp_path / 'alerts.parquet')
+    with ParquetSink(path, batch_size=10) as sink:
+        for record in untagged + RECORDS:  # The first batches give tag no element type
+            sink.write(record)
+
+    table = pq.read_table(path)
+
+    assert table.num_rows == len(untagged) + len(RECORDS) == sink.count
+    assert table.to_pylist()[-1]['data']['bricata']['tag'] == ['ATO']
+
+
+def test_arrow_sink_stdout(capsysbinary):
+    pa = pytest.importorskip('pyarrow')
+
+    with ArrowSink('-', batch_size=10) as sink:
+        for record in RECORDS:
+            sink.write(record)
+
+    assert pa.ipc.open_stream(capsysbinary.readouterr().out).read_all().to_pylist() == RECORDS
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Test Stream
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>."""
+import asyncio
+
+import pytest
+import rapidjson
+
+from benchmarks.stub_server import serve, StubConfig
+from bricata_api_client import BricataApiClient
+from bricata_api_client.models import AlertQuery
+from bricata_api_client.stream import EventStream, JsonArrayStream
+
+OBJECTS = [{'uuid': str(i), 'msg': 'tricky \\"}], {[', 'data': {'tag': ['a', 'b']}} for i in range(25)] + [1, 'x', None, [2]]
+DOC = rapidjson.dumps({'meta': {'limit': [1, 2]}, 'objects': OBJECTS, 'total': len(OBJECTS)}).encode()
+
+
+def test_stream_any_chunking():
+    for size in (1, 2, 7, 64, len(DOC)):
+        decoder = JsonArrayStream()
+        records = []
+        for i in range(0, len(DOC), size):
+            records.extend(decoder.feed(DOC[i:i + size]))
+
+        assert records == OBJECTS
+
+
+def test_stream_bounded_buffer():
+    decoder = JsonArrayStream()
+    largest = max(len(rapidjson.dumps(o)) for o in OBJECTS)
+
+    for i in range(0, len(DOC), 16):
+        decoder.feed(DOC[i:i + 16])
+        assert len(decoder.buf) <= largest + 32  # Never more than one element (plus a chunk)
+
+
+def test_stream_bare_array():
+    assert JsonArrayStream(key=None).feed(b'[1, {"a": [2]}, "b"]') == [1, {'a': [2]}, 'b']
+    assert JsonArrayStream().feed(b'{"objects": []}') == []
+
+
+def test_event_stream():
+    raw = b': keep-alive\n\nid: 1\ndata: {"a": 1}\n\nid: 2\r\ndata: {"a":\r\ndata: 2}\r\n\r\ndata: plain\n\n'
+    for size in (1, 3, len(raw)):
+        decoder = EventStream()
+        events = [e for i in range(0, len(raw), size) for e in decoder.feed(raw[i:i + size])]
+
+        assert events == [{'a': 1}, {'a': 2}, 'plain']
+        assert decoder.id == '2'
+
+    decoder = EventStream(sse=False)
+
+    assert decoder.feed(b'{"x": 1}\n{"y"') == [{'x': 1}]
+    assert decoder.feed(b': 2}\n\n') == [{'y': 2}]
+
+
+@pytest.mark.asyncio
+async def test_offline_stream_relogin():
+    async with serve(StubConfig(alerts=500)) as (stub, cfg):
+        async with BricataApiClient(cfg=cfg) as bac:
+            await bac.login()
+            for stream in (lambda: bac.stream_records(AlertQuery(limit=100)),
+                           lambda: bac.iter_report_rows('/system/reports/alerts/')):
+                bac.header['Authorization'] = bac.session.headers['Authorization'] = 'Bearer expired'
+                assert [r async for r in stream()]
+                assert bac.header['Authorization'] != 'Bearer expired'
+
+
+@pytest.mark.asyncio
+async def test_offline_stream_relogin_one_slot():
+    async with serve(StubConfig(alerts=500, token_uses=1)) as (stub, cfg):
+        cfg['Options'].update(Concurrency=1, MaxConcurrency=1)  # Login has to wait for the stream's slot
+        async with BricataApiClient(cfg=cfg) as bac:
+            await bac.login()
+            await collect(bac.stream_records(AlertQuery(limit=1)))  # Uses up the token
+            for stream in (lambda: bac.stream_records(AlertQuery(limit=100)),
+                           lambda: bac.iter_report_rows('/system/reports/alerts/')):
+                logins = stub.logins
+                assert await asyncio.wait_for(collect(stream()), timeout=10)
+                assert stub.logins == logins + 1
+
+
+async def collect(stream) -> list:
+    return [r async for r in stream]
+
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3.8
+"""Bricata API Client: Test Sync
+Copyright © 2019 Jerod Gawne <https://github.com/jerodg/>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the Server Side Public License (SSPL) as
+published by MongoDB, Inc., either version 1 of the
+License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+SSPL for more details.
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+You should have received a copy of the SSPL along with this program.
+If not, see <https://www.mongodb.com/licensing/server-side-public-license>."""
+import time
+from datetime import timedelta
+
+import pytest
+from delorean import Delorean
+from os import getenv
+
+from base_api_client import bprint
+from benchmarks.stub_server import EPOCH, serve, StubConfig
+from bricata_api_client import AlertSync, BricataApiClient, RetryPolicy
+from bricata_api_client.models import AlertQuery
+
+
+@pytest.mark.asyncio
+async def test_sync(tmp_path):
+    ts = time.perf_counter()
+
+    bprint('Test: Sync Alerts')
+    async with BricataApiClient(cfg=f'{getenv("CFG_HOME")}/bricata_api_client.toml') as bac:
+        with AlertSync(bac, path=str(tmp_path / 'alerts.db')) as sync:
+            count = await sync.run(AlertQuery(start_time=Delorean().datetime - timedelta(hours=1)))
+            mark, seen = sync.checkpoint()
+
+            assert count >= 1
+            assert mark
+            assert seen
+
+            count = await sync.run()  # Nothing new should be re-downloaded
+            print('Second run:', count)
+
+            assert sync.checkpoint()[0] >= mark
+
+    bprint(f'-> Completed in {(time.perf_counter() - ts):f} seconds.')
+
+
+@pytest.mark.asyncio
+async def test_offline_sync_failures(tmp_path):
+    async with serve(StubConfig(alerts=3000, seed=1)) as (stub, cfg):
+        async with BricataApiClient(cfg=cfg, retry_policies={'*': RetryPolicy(attempts=1)}) as bac:
+            await bac.login()
+            with AlertSync(bac, path=str(tmp_path / 'alerts.db')) as sync:
+                query = AlertQuery(start_time=EPOCH, limit=100)
+                stub.error_rate = 0.2
+                with pytest.raises(RuntimeError):
+                    await sync.run(query)
+
+                stub.error_rate = 0.0
+                await sync.run(query)
+                stored = {r[0] for r in sync.db.execute('SELECT uuid FROM alerts')}
+                assert stored == {f'{i:032x}' for i in range(3000)}  # The retry run filled the hole
+
+
+class FakeClient:
+    def __init__(self, alerts: list):
+        self.alerts = alerts
+
+    async def export_records(self, query, failures=None):
+        for alert in self.alerts:
+            yield alert
+
+
+@pytest.mark.asyncio
+async def test_sync_mixed_timestamp_formats(tmp_path):
+    client = FakeClient([{'uuid': 'a', 'timestamp': '2020-01-01T12:00:01Z'}])
+    with AlertSync(client, path=str(tmp_path / 'alerts.db')) as sync:
+        assert await sync.run(AlertQuery(start_time='2020-01-01T00:00:00Z')) == 1
+
+        # Later, though it sorts below '...12:00:01Z' as a string
+        client.alerts = [{'uuid': 'a', 'timestamp': '2020-01-01T12:00:01.000Z'},
+                         {'uuid': 'b', 'timestamp': '2020-01-01T12:00:01.250Z'}]
+        assert await sync.run() == 1
+        assert sync.checkpoint() == ('2020-01-01T12:00:01.250000', {'b'})
+
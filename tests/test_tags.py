@@ -23,6 +23,7 @@ import pytest
 from os import getenv
 
 from base_api_client import bprint, Results, tprint
+from benchmarks.stub_server import serve, StubConfig
 from bricata_api_client import BricataApiClient
 from bricata_api_client.models import TagRequest
 
@@ -92,3 +93,17 @@ async def test_delete_tag():
         assert 'sea_test' not in tags  # Check if tag was deleted
 
     bprint(f'-> Completed in {(time.perf_counter() - ts):f} seconds.')
+
+
+@pytest.mark.asyncio
+async def test_offline_tagging_with_errors():
+    async with serve(StubConfig(alerts=50, error_rate=0.2)) as (stub, cfg):  # Retries absorb the 503s
+        async with BricataApiClient(cfg=cfg) as bac:
+            uids = [f'{i:032x}' for i in range(50)]
+            results = await bac.tag_alerts(uids, 'Testing')
+
+            assert type(results) is Results
+            assert len(results.success) + len(results.failure) == len(uids)
+
+            with pytest.raises(ValueError):
+                await bac.untag_alerts(tag='Testing')